@@ -0,0 +1,77 @@
+"""Add trade_stats and trade_stats_hourly tables
+
+Revision ID: 2a83efb10560
+Revises: 2c9b04f56945
+Create Date: 2026-10-17 11:20:14.318702
+
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a83efb10560'
+down_revision: Union[str, None] = '2c9b04f56945'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Matches trade_stats.HOURLY_RETENTION_HOURS when this revision was written
+HOURLY_RETENTION_HOURS = 48
+
+
+def upgrade() -> None:
+    op.create_table(
+        'trade_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('total_trades', sa.Integer(), nullable=False),
+        sa.Column('total_realized_profit', sa.Float(), nullable=False),
+        sa.Column('max_budget', sa.Float(), nullable=True),
+        sa.Column('min_budget', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'trade_stats_hourly',
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        sa.Column('trade_count', sa.Integer(), nullable=False),
+        sa.Column('profit_loss', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('hour'),
+    )
+    # Seed both tables from existing trades
+    op.execute(
+        "INSERT INTO trade_stats (id, total_trades, total_realized_profit, max_budget, min_budget, updated_at) "
+        "SELECT 1, count(*), coalesce(sum(CASE WHEN profit_loss > 0 THEN profit_loss END), 0.0), "
+        "max(budget), min(budget), CURRENT_TIMESTAMP FROM trades"
+    )
+    # Hours are bucketed in Python rather than with a dialect's date functions, and written
+    # through the DateTime type so later upserts from record_trades hit the same primary keys
+    trades = sa.table('trades', sa.column('timestamp', sa.DateTime()), sa.column('profit_loss', sa.Float()))
+    cutoff = (datetime.now() - timedelta(hours=HOURLY_RETENTION_HOURS)).replace(minute=0, second=0, microsecond=0)
+    rows = op.get_bind().execute(
+        sa.select(trades.c.timestamp, trades.c.profit_loss).where(trades.c.timestamp >= cutoff)
+    )
+    buckets = defaultdict(lambda: [0, 0.0])
+    for timestamp, profit_loss in rows:
+        bucket = buckets[timestamp.replace(minute=0, second=0, microsecond=0)]
+        bucket[0] += 1
+        bucket[1] += profit_loss or 0.0
+    hourly = sa.table(
+        'trade_stats_hourly',
+        sa.column('hour', sa.DateTime()),
+        sa.column('trade_count', sa.Integer()),
+        sa.column('profit_loss', sa.Float()),
+    )
+    if buckets:
+        op.bulk_insert(hourly, [
+            {'hour': hour, 'trade_count': count, 'profit_loss': profit_loss}
+            for hour, (count, profit_loss) in buckets.items()
+        ])
+
+
+def downgrade() -> None:
+    op.drop_table('trade_stats_hourly')
+    op.drop_table('trade_stats')
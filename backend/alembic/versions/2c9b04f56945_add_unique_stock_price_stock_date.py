@@ -0,0 +1,33 @@
+"""Add unique (stock_id, date) constraint to stock_prices
+
+Revision ID: 2c9b04f56945
+Revises: 9fa319a4948e
+Create Date: 2026-10-17 10:41:52.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c9b04f56945'
+down_revision: Union[str, None] = '9fa319a4948e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the first row of any duplicated (stock_id, date) pair before adding the constraint
+    op.execute(
+        "DELETE FROM stock_prices WHERE id NOT IN "
+        "(SELECT MIN(id) FROM stock_prices GROUP BY stock_id, date)"
+    )
+    with op.batch_alter_table("stock_prices", schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_stock_price_stock_date', ['stock_id', 'date'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("stock_prices", schema=None) as batch_op:
+        batch_op.drop_constraint('uq_stock_price_stock_date', type_='unique')
@@ -0,0 +1,32 @@
+"""Add company_profiles table
+
+Revision ID: 4e36eabee640
+Revises: 90463452030f
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e36eabee640'
+down_revision: Union[str, None] = '90463452030f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'company_profiles',
+        sa.Column('symbol', sa.String(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('fetched_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.PrimaryKeyConstraint('symbol'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('company_profiles')
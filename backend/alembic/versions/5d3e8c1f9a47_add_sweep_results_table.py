@@ -0,0 +1,51 @@
+"""Add sweep_results table
+
+Revision ID: 5d3e8c1f9a47
+Revises: b61d0e4f7a2c
+Create Date: 2026-10-17 13:05:22.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d3e8c1f9a47'
+down_revision: Union[str, None] = 'b61d0e4f7a2c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sweep_results',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sweep', sa.String(), nullable=False),
+        sa.Column('bars_key', sa.String(), nullable=False),
+        sa.Column('price_increment', sa.Float(), nullable=False),
+        sa.Column('ladder_depth', sa.Integer(), nullable=False),
+        sa.Column('order_quantity', sa.Float(), nullable=False),
+        sa.Column('reentry_offset', sa.Float(), nullable=False),
+        sa.Column('bars', sa.Integer(), nullable=False),
+        sa.Column('buy_fills', sa.Integer(), nullable=False),
+        sa.Column('sell_fills', sa.Integer(), nullable=False),
+        sa.Column('realized_pnl', sa.Float(), nullable=False),
+        sa.Column('unrealized_pnl', sa.Float(), nullable=False),
+        sa.Column('total_pnl', sa.Float(), nullable=False),
+        sa.Column('max_drawdown', sa.Float(), nullable=False),
+        sa.Column('max_drawdown_pct', sa.Float(), nullable=False),
+        sa.Column('max_capital_used', sa.Float(), nullable=False),
+        sa.Column('seconds', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'sweep', 'bars_key', 'price_increment', 'ladder_depth', 'order_quantity', 'reentry_offset',
+            name='uq_sweep_result_params',
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sweep_results')
@@ -0,0 +1,27 @@
+"""Add enriched_at column to stocks
+
+Revision ID: 7c2e9b4d1f60
+Revises: 5d3e8c1f9a47
+Create Date: 2026-10-17 15:12:48.203561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9b4d1f60'
+down_revision: Union[str, None] = '5d3e8c1f9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('stocks', sa.Column('enriched_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('stocks', schema=None) as batch_op:
+        batch_op.drop_column('enriched_at')
@@ -0,0 +1,45 @@
+"""Add benchmark_prices and benchmark_sector_weights tables
+
+Revision ID: 9fa319a4948e
+Revises: 4e36eabee640
+Create Date: 2026-10-17 10:03:27.561190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9fa319a4948e'
+down_revision: Union[str, None] = '4e36eabee640'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'benchmark_prices',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('symbol', sa.String(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('close', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('symbol', 'date', name='uq_benchmark_price_symbol_date'),
+    )
+    op.create_table(
+        'benchmark_sector_weights',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('symbol', sa.String(), nullable=False),
+        sa.Column('sector', sa.String(), nullable=False),
+        sa.Column('weight', sa.Float(), nullable=False),
+        sa.Column('as_of', sa.Date(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('symbol', 'sector', name='uq_benchmark_sector_weight_symbol_sector'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('benchmark_sector_weights')
+    op.drop_table('benchmark_prices')
@@ -0,0 +1,38 @@
+"""Add trade_daily_pnl rollup table
+
+Revision ID: b61d0e4f7a2c
+Revises: 2a83efb10560
+Create Date: 2026-10-17 11:52:40.127593
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b61d0e4f7a2c'
+down_revision: Union[str, None] = '2a83efb10560'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'trade_daily_pnl',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('trade_count', sa.Integer(), nullable=False),
+        sa.Column('profit_loss', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day'),
+    )
+    # Seed the rollup from existing trades
+    op.execute(
+        "INSERT INTO trade_daily_pnl (day, trade_count, profit_loss) "
+        "SELECT date(timestamp), count(*), sum(profit_loss) FROM trades "
+        "WHERE profit_loss IS NOT NULL GROUP BY date(timestamp)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('trade_daily_pnl')
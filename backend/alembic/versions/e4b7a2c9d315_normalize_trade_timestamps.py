@@ -0,0 +1,29 @@
+"""Normalize trade timestamps written by the server default
+
+Revision ID: e4b7a2c9d315
+Revises: 7c2e9b4d1f60
+Create Date: 2026-10-17 16:40:22.517093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7a2c9d315'
+down_revision: Union[str, None] = '7c2e9b4d1f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # On SQLite, rows that took CURRENT_TIMESTAMP are stored without microseconds and sort
+    # before the '.000000' form SQLAlchemy binds, which breaks the trades keyset cursor.
+    # Other databases store a real timestamp type and need nothing.
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("UPDATE trades SET timestamp = timestamp || '.000000' WHERE length(timestamp) = 19")
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,58 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def analyze_holdings(
+    tickers: List[str],
+    quantities: List[float],
+    purchase_prices: List[float],
+    sectors: List[Optional[str]],
+    current_prices: Dict[str, Optional[float]],
+) -> dict:
+    """
+    Compute weights, sector distribution and overall return for a set of holdings in one pass.
+
+    Holdings without a current price count as zero value and are left out of the return,
+    matching the behaviour of the per-holding loop this replaces.
+
+    Returns:
+        dict: total_value, weights (ticker -> % of total value), sector_values
+        (sector -> current value), sector_percentages (sector -> % of total value)
+        and portfolio_return (%).
+    """
+    quantity = np.asarray(quantities, dtype=float)
+    purchase_price = np.asarray(purchase_prices, dtype=float)
+    price = np.array([current_prices.get(ticker) or np.nan for ticker in tickers], dtype=float)
+
+    priced = ~np.isnan(price)
+    values = np.where(priced, quantity * np.nan_to_num(price), 0.0)
+    total_value = float(values.sum())
+
+    if total_value:
+        weights = values / total_value * 100
+    else:
+        weights = np.zeros_like(values)
+
+    sector_names, sector_index = np.unique(
+        np.array([sector or "Unknown" for sector in sectors], dtype=object).astype(str),
+        return_inverse=True,
+    )
+    sector_values = np.bincount(sector_index, weights=values, minlength=len(sector_names))
+
+    invested = float((quantity * purchase_price)[priced].sum())
+    current = float(values[priced].sum())
+    portfolio_return = (current - invested) / invested * 100 if invested else 0.0
+
+    return {
+        "total_value": total_value,
+        "weights": dict(zip(tickers, weights.tolist())),
+        "sector_values": dict(zip(sector_names.tolist(), sector_values.tolist())),
+        "sector_percentages": dict(
+            zip(
+                sector_names.tolist(),
+                (sector_values / total_value * 100 if total_value else np.zeros_like(sector_values)).tolist(),
+            )
+        ),
+        "portfolio_return": portfolio_return,
+    }
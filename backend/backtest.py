@@ -0,0 +1,282 @@
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import bar_store
+import bot
+
+# NQ futures trade in quarter-point ticks
+SYNTHETIC_TICK_SIZE = 0.25
+
+
+@dataclass(frozen=True)
+class BacktestResult:
+    bars: int
+    buy_fills: int
+    sell_fills: int
+    realized_pnl: float
+    unrealized_pnl: float
+    final_equity: float
+    max_drawdown: float
+    max_drawdown_pct: float
+    max_capital_used: float
+    avg_capital_used: float
+    seconds: float
+    bars_per_second: float
+
+    def summary(self) -> str:
+        return "\n".join(f"{name:>18}: {value:,.2f}" if isinstance(value, float) else f"{name:>18}: {value:,}"
+                         for name, value in asdict(self).items())
+
+
+class _NullJournal:
+    """Stands in for the bot's state journal; a backtest keeps state in memory only."""
+
+    def record(self, event):
+        pass
+
+
+def load_bars_csv(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read 1-minute bars from a CSV with a timestamp column (timestamp, datetime or date)
+    and a close column. Returns (timestamps as datetime64[s], closes as float64).
+    """
+    frame = pd.read_csv(path)
+    columns = {name.lower(): name for name in frame.columns}
+    time_column = next(columns[name] for name in ("timestamp", "datetime", "date") if name in columns)
+    frame = frame.dropna(subset=[columns["close"]]).sort_values(time_column)
+    timestamps = pd.to_datetime(frame[time_column]).dt.tz_localize(None).to_numpy(dtype="datetime64[s]")
+    return timestamps, frame[columns["close"]].to_numpy(dtype=float)
+
+
+def synthetic_bars(
+    count: int,
+    start_price: float = 20000.0,
+    volatility: float = 8.0,
+    seed: int = 0,
+    start: str = "2024-01-02T00:00:00",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Random-walk 1-minute closes rounded to the tick size, for benchmarks and smoke runs.
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0.0, volatility, count)
+    closes = np.round((start_price + np.cumsum(steps)) / SYNTHETIC_TICK_SIZE) * SYNTHETIC_TICK_SIZE
+    timestamps = np.datetime64(start, "s") + np.arange(count) * np.timedelta64(60, "s")
+    return timestamps, closes
+
+
+class _FillRecorder:
+    """
+    Stands in for the shared trade writer: tracks fills and the open quantity in memory.
+    """
+
+    def __init__(self):
+        self.fills: List[tuple] = []
+        self.open_quantity = 0.0
+
+    async def submit(self, trade: dict):
+        quantity = trade["quantity"]
+        self.open_quantity += quantity if trade["action"] == "Buy" else -quantity
+        self.fills.append((trade["timestamp"], trade["action"], trade["price"], quantity))
+
+
+def _clock(timestamps: np.ndarray) -> List[str]:
+    return np.char.replace(np.datetime_as_string(timestamps, unit="s"), "T", " ").tolist()
+
+
+def _to_ticks(closes: np.ndarray) -> List[int]:
+    """Closes as integer ticks, the strategy's price unit, converted in one pass."""
+    return np.round(closes * bot.PRICE_SCALE).astype(np.int64).tolist()
+
+
+@contextmanager
+def _quiet():
+    """Silence the bot's per-fill logging for the duration of a backtest."""
+    logging.disable(logging.INFO)
+    try:
+        yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def run_backtest(
+    timestamps: np.ndarray,
+    closes: np.ndarray,
+    initial_budget: Decimal = Decimal("1000000"),
+    ticker: str = "BACKTEST",
+    config: Optional[bot.BotConfig] = None,
+) -> BacktestResult:
+    """
+    Replay bars through a fresh BotInstance (its process_tick) with a simulated clock.
+    Pass `config` to backtest strategy settings other than the defaults; its budget
+    then replaces `initial_budget`.
+
+    Each bar's close is treated as one live tick at the bar's timestamp. Equity is
+    cash plus open positions marked at the close, sampled every bar for drawdown;
+    capital used is the cost of the open positions at their buy prices.
+    """
+    config = config or bot.BotConfig(ticker, budget=initial_budget)
+    recorder = _FillRecorder()
+    instance = bot.BotInstance(config, trade_writer=recorder, journal=_NullJournal())
+
+    clock = _clock(timestamps)
+    prices = _to_ticks(closes)
+    equity = np.empty(len(prices))
+    capital_used = np.empty(len(prices))
+    start_budget = float(config.budget)
+
+    async def replay():
+        for index, (current_time, current_price) in enumerate(zip(clock, prices)):
+            await instance.process_tick(current_price, current_time)
+            cash = instance.budget / bot.CASH_SCALE
+            equity[index] = cash + recorder.open_quantity * current_price / bot.PRICE_SCALE
+            capital_used[index] = sum(
+                position["buy_price"] * position["quantity"] for position in instance.positions_dict.values()
+            ) / bot.CASH_SCALE
+
+    with _quiet():
+        started = time.perf_counter()
+        asyncio.run(replay())
+        seconds = time.perf_counter() - started
+        realized = instance.total_profit_loss / bot.CASH_SCALE
+        last_price = prices[-1] if prices else 0
+        unrealized = sum(
+            (last_price - position["buy_price"]) * position["quantity"]
+            for position in instance.positions_dict.values()
+        ) / bot.CASH_SCALE
+
+    if len(prices):
+        peaks = np.maximum.accumulate(equity)
+        drawdowns = peaks - equity
+        worst = int(drawdowns.argmax())
+        max_drawdown = float(drawdowns[worst])
+        max_drawdown_pct = float(drawdowns[worst] / peaks[worst] * 100) if peaks[worst] else 0.0
+        final_equity = float(equity[-1])
+        max_capital, avg_capital = float(capital_used.max()), float(capital_used.mean())
+    else:
+        max_drawdown = max_drawdown_pct = max_capital = avg_capital = 0.0
+        final_equity = start_budget
+
+    return BacktestResult(
+        bars=len(prices),
+        buy_fills=sum(1 for fill in recorder.fills if fill[1] == "Buy"),
+        sell_fills=sum(1 for fill in recorder.fills if fill[1] == "Sell"),
+        realized_pnl=realized,
+        unrealized_pnl=unrealized,
+        final_equity=final_equity,
+        max_drawdown=max_drawdown,
+        max_drawdown_pct=max_drawdown_pct,
+        max_capital_used=max_capital,
+        avg_capital_used=avg_capital,
+        seconds=seconds,
+        bars_per_second=len(prices) / seconds if seconds else 0.0,
+    )
+
+
+def benchmark(sizes=(10_000, 100_000, 350_000)):
+    """
+    Print strategy throughput in bars per second on synthetic data.
+    350,000 bars is roughly one year of nearly 24h futures minute bars.
+    """
+    for size in sizes:
+        timestamps, closes = synthetic_bars(size)
+        result = run_backtest(timestamps, closes)
+        print(f"{size:>9,} bars: {result.seconds:7.2f}s  {result.bars_per_second:>10,.0f} bars/s  "
+              f"({result.buy_fills + result.sell_fills:,} fills)")
+
+
+def tick_benchmark(count: int = 100_000, seed: int = 0, strategy=bot) -> float:
+    """
+    Return the strategy's CPU cost per tick in microseconds: process time spent in
+    process_tick alone over `count` synthetic bars, excluding backtest bookkeeping.
+
+    `strategy` is the bot module to measure. Versions from before the fixed-point
+    strategy (no PRICE_SCALE) are fed Decimal prices, so the same harness times both.
+    """
+    timestamps, closes = synthetic_bars(count, seed=seed)
+    if hasattr(strategy, "PRICE_SCALE"):
+        prices = _to_ticks(closes)
+    else:
+        prices = [Decimal(str(close)) for close in closes.tolist()]
+    clock = _clock(timestamps)
+    instance = strategy.BotInstance(strategy.BotConfig("BENCHMARK"), trade_writer=_FillRecorder(), journal=_NullJournal())
+
+    async def replay():
+        started = time.process_time()
+        for current_time, current_price in zip(clock, prices):
+            await instance.process_tick(current_price, current_time)
+        return time.process_time() - started
+
+    with _quiet():
+        seconds = asyncio.run(replay())
+    return seconds / count * 1e6
+
+
+def baseline_tick_benchmark(backend_dir: str, count: int = 100_000, seed: int = 0) -> float:
+    """
+    Run tick_benchmark against the bot.py (and its sibling modules) in another checkout's
+    backend directory, e.g. the Decimal strategy of commit 780bbaf:
+
+        git worktree add /tmp/decimal-bot 780bbaf
+        python backtest.py --tick-benchmark 100000 --baseline /tmp/decimal-bot/backend
+
+    The other strategy is imported in a child process so its modules do not clash with
+    this one's, and from a scratch directory because older versions open trading_bot.log
+    on import.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    script = (
+        "import importlib.util, sys\n"
+        f"sys.path[:0] = [{os.path.abspath(backend_dir)!r}, {here!r}]\n"
+        f"spec = importlib.util.spec_from_file_location('backtest', {os.path.join(here, 'backtest.py')!r})\n"
+        "backtest = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(backtest)\n"
+        f"print(backtest.tick_benchmark({count}, {seed}))\n"
+    )
+    with tempfile.TemporaryDirectory() as scratch:
+        output = subprocess.run([sys.executable, "-c", script], cwd=scratch, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the grid bot on 1-minute bars.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="CSV of 1-minute bars with timestamp and close columns")
+    source.add_argument("--synthetic", type=int, metavar="BARS", help="Generate this many random-walk bars")
+    source.add_argument("--bars", metavar="TICKER", help="Recorded bars for this ticker from the bar store")
+    source.add_argument("--benchmark", action="store_true", help="Report bars/second on synthetic data")
+    source.add_argument("--tick-benchmark", type=int, metavar="BARS", help="Report CPU microseconds per strategy tick")
+    parser.add_argument("--baseline", metavar="DIR", help="With --tick-benchmark, also time the bot.py in this backend directory")
+    parser.add_argument("--bars-dir", default=bar_store.BAR_STORE_DIR, help="Bar store directory for --bars")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic bars")
+    parser.add_argument("--budget", type=Decimal, default=Decimal("1000000"), help="Starting budget")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+    elif args.tick_benchmark:
+        print(f"{tick_benchmark(args.tick_benchmark, args.seed):.2f} us/tick CPU over {args.tick_benchmark:,} ticks")
+        if args.baseline:
+            baseline = baseline_tick_benchmark(args.baseline, args.tick_benchmark, args.seed)
+            print(f"{baseline:.2f} us/tick CPU for the baseline in {args.baseline}")
+    else:
+        if args.csv:
+            timestamps, closes = load_bars_csv(args.csv)
+        elif args.bars:
+            timestamps, closes = bar_store.load_closes(args.bars_dir, args.bars)
+        else:
+            timestamps, closes = synthetic_bars(args.synthetic, seed=args.seed)
+        print(run_backtest(timestamps, closes, args.budget).summary())
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from price_feed import PriceFeed, Tick
+
+logger = logging.getLogger(__name__)
+
+BAR_STORE_DIR = os.getenv("BAR_STORE_DIR", "bars")
+# Prices are stored as integer cents, the bot's tick size
+PRICE_SCALE = 100
+BAR_FILE_SUFFIX = ".bars"
+
+# One fixed-width little-endian record per bar: 48 bytes, no header, so a file is a
+# flat array that can be memory-mapped as-is
+BAR_DTYPE = np.dtype([
+    ("timestamp", "<i8"),  # epoch seconds (UTC) of the bar open
+    ("open", "<i8"),
+    ("high", "<i8"),
+    ("low", "<i8"),
+    ("close", "<i8"),
+    ("volume", "<i8"),
+])
+
+
+def _ticker_dir(root: str, ticker: str) -> str:
+    return os.path.join(root, re.sub(r"[^A-Za-z0-9]+", "_", ticker).strip("_"))
+
+
+def bar_path(root: str, ticker: str, day: date) -> str:
+    """File holding one instrument's bars for one UTC day."""
+    return os.path.join(_ticker_dir(root, ticker), f"{day.isoformat()}{BAR_FILE_SUFFIX}")
+
+
+def _utc_day(timestamp: int) -> date:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).date()
+
+
+def _cents(value) -> int:
+    return int(round(value * PRICE_SCALE))
+
+
+def _from_cents(cents: int) -> Decimal:
+    return Decimal(cents) / PRICE_SCALE
+
+
+class BarRecorder:
+    """
+    Appends every bar received from a feed to per-instrument, per-day binary files.
+
+    A feed repeats the forming bar as its close changes; a repeat of the last bar
+    written overwrites that record in place, so each file holds one record per bar
+    with its latest values. Records are written unbuffered, one write per bar, so a
+    crash loses at most the record being written.
+    """
+
+    def __init__(self, root: str = BAR_STORE_DIR):
+        self.root = root
+        self.bars_written = 0
+        self._files: Dict[str, tuple] = {}  # ticker -> (day, file, last record written or None)
+
+    def record(self, tick: Tick):
+        close = _cents(tick.price)
+        bar = [
+            tick.timestamp,
+            close if tick.open is None else _cents(tick.open),
+            close if tick.high is None else _cents(tick.high),
+            close if tick.low is None else _cents(tick.low),
+            close,
+            tick.volume,
+        ]
+
+        day = _utc_day(tick.timestamp)
+        entry = self._files.get(tick.ticker)
+        if entry is None or entry[0] != day:
+            if entry is not None:
+                entry[1].close()
+            entry = self._open(tick.ticker, day)
+        _, f, last = entry
+
+        if last is not None and tick.timestamp == last[0]:
+            # Update of the forming bar: keep its open and widen its range
+            bar[1] = last[1]
+            bar[2] = max(bar[2], last[2])
+            bar[3] = min(bar[3], last[3])
+            f.seek(-BAR_DTYPE.itemsize, os.SEEK_END)
+        elif last is not None and tick.timestamp < last[0]:
+            logger.debug(f"[{tick.ticker}] Skipping out-of-order bar at {tick.timestamp}.")
+            return
+        else:
+            f.seek(0, os.SEEK_END)
+            self.bars_written += 1
+        f.write(np.array([tuple(bar)], dtype=BAR_DTYPE).tobytes())
+        self._files[tick.ticker] = (day, f, bar)
+
+    def _open(self, ticker: str, day: date) -> tuple:
+        path = bar_path(self.root, ticker, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        f = open(path, "r+b" if os.path.exists(path) else "w+b", buffering=0)
+        size = f.seek(0, os.SEEK_END)
+        # Drop a partial record left by a crash mid-write
+        whole = size - size % BAR_DTYPE.itemsize
+        if whole != size:
+            f.truncate(whole)
+        last = None
+        if whole:
+            f.seek(whole - BAR_DTYPE.itemsize)
+            last = list(np.frombuffer(f.read(BAR_DTYPE.itemsize), dtype=BAR_DTYPE)[0].tolist())
+        return day, f, last
+
+    def close(self):
+        for _, f, _ in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+def open_bar_file(path: str) -> np.ndarray:
+    """Memory-map one bar file as a read-only structured array (no copy)."""
+    count = os.path.getsize(path) // BAR_DTYPE.itemsize
+    if not count:
+        return np.empty(0, dtype=BAR_DTYPE)
+    return np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+
+
+def bar_days(root: str, ticker: str) -> List[date]:
+    """Days with a bar file for `ticker`, oldest first."""
+    directory = _ticker_dir(root, ticker)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        date.fromisoformat(name[:-len(BAR_FILE_SUFFIX)])
+        for name in os.listdir(directory)
+        if name.endswith(BAR_FILE_SUFFIX)
+    )
+
+
+def load_bars(root: str, ticker: str, start: Optional[date] = None, end: Optional[date] = None) -> np.ndarray:
+    """
+    All bars for `ticker` from start to end (inclusive UTC days) as one structured array
+    in time order. Prices are integer cents; divide by PRICE_SCALE for dollars.
+    """
+    days = [day for day in bar_days(root, ticker) if (start is None or day >= start) and (end is None or day <= end)]
+    arrays = [open_bar_file(bar_path(root, ticker, day)) for day in days]
+    if not arrays:
+        return np.empty(0, dtype=BAR_DTYPE)
+    return np.concatenate(arrays)
+
+
+def load_closes(root: str, ticker: str, start: Optional[date] = None, end: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Bars as (timestamps as datetime64[s], closes as float64), the backtester's input."""
+    bars = load_bars(root, ticker, start, end)
+    return bars["timestamp"].astype("datetime64[s]"), bars["close"] / PRICE_SCALE
+
+
+class BarFileFeed(PriceFeed):
+    """Replays recorded bars for one or more instruments in time order, as fast as they are consumed."""
+
+    def __init__(self, root: str, tickers: List[str], start: Optional[date] = None, end: Optional[date] = None):
+        self.root = root
+        self.tickers = list(tickers)
+        self.start = start
+        self.end = end
+
+    async def _ticks(self):
+        frames = [load_bars(self.root, ticker, self.start, self.end) for ticker in self.tickers]
+        if not frames:
+            return
+        # Merge instruments by bar time; a stable sort keeps each instrument's own order
+        records = np.concatenate(frames)
+        owners = np.concatenate([np.full(len(bars), index) for index, bars in enumerate(frames)])
+        order = np.argsort(records["timestamp"], kind="stable")
+        for index, (timestamp, open_, high, low, close, volume) in zip(owners[order].tolist(), records[order].tolist()):
+            yield Tick(
+                self.tickers[index],
+                timestamp,
+                _from_cents(close),
+                _from_cents(open_),
+                _from_cents(high),
+                _from_cents(low),
+                volume,
+            )
+            # Let other tasks (such as the trade writer) run between ticks
+            await asyncio.sleep(0)
@@ -0,0 +1,163 @@
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+import yfinance as yf
+from sqlalchemy import delete
+from sqlalchemy.future import select
+
+from cache import AsyncTTLCache
+from database import async_session_maker, upsert_insert
+from market_executor import run_market_io
+from models import BenchmarkPrice, BenchmarkSectorWeight
+from price_store import last_completed_session
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_SYMBOL = "^GSPC"
+# Days of closes kept for the benchmark, enough for multi-year comparison windows
+BENCHMARK_HISTORY_DAYS = int(os.getenv("BENCHMARK_HISTORY_DAYS", 5 * 366))
+# How long a loaded snapshot is served from memory before it is re-read from the database
+BENCHMARK_MEMORY_TTL_SECONDS = float(os.getenv("BENCHMARK_MEMORY_TTL_SECONDS", 3600))
+# Trigger a refresh on read when the newest stored close is older than this many days
+BENCHMARK_STALE_DAYS = 4
+
+_snapshots = AsyncTTLCache("benchmark", ttl_seconds=BENCHMARK_MEMORY_TTL_SECONDS, max_size=8)
+
+
+@dataclass(frozen=True)
+class BenchmarkSnapshot:
+    symbol: str
+    dates: np.ndarray  # datetime64[D], ascending
+    closes: np.ndarray  # float64, aligned with dates
+    sector_weights: Dict[str, float]
+
+    @property
+    def last_date(self) -> Optional[date]:
+        return self.dates[-1].item() if len(self.dates) else None
+
+    def window_return(self, start: date, end: Optional[date] = None) -> Optional[float]:
+        """
+        Percentage return from the first close on or after `start`
+        to the last close on or before `end`. Returns None when the window has no data.
+        """
+        lo = np.searchsorted(self.dates, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(self.dates, np.datetime64(end, "D"), side="right") if end else len(self.dates)
+        if hi - lo < 1:
+            return None
+        start_price, end_price = self.closes[lo], self.closes[hi - 1]
+        return float((end_price - start_price) / start_price * 100)
+
+
+def _normalize_sector_weights(raw) -> Dict[str, float]:
+    """
+    yfinance reports sectorWeightings either as a dict or as a list of single-entry dicts.
+    """
+    if isinstance(raw, dict):
+        return {str(k): float(v) for k, v in raw.items()}
+    weights = {}
+    for item in raw or []:
+        if isinstance(item, dict):
+            weights.update({str(k): float(v) for k, v in item.items()})
+    return weights
+
+
+async def refresh_benchmark(symbol: str = BENCHMARK_SYMBOL):
+    """
+    Download closes missing from the database plus current sector weights and store them.
+    Scheduled once per trading day after the close.
+    """
+    async with async_session_maker() as session:
+        last_stored = (
+            await session.execute(
+                select(BenchmarkPrice.date)
+                .where(BenchmarkPrice.symbol == symbol)
+                .order_by(BenchmarkPrice.date.desc())
+                .limit(1)
+            )
+        ).scalar_one_or_none()
+
+        today = date.today()
+        # Re-fetch the last stored day as well in case it was stored before the close
+        start = last_stored or today - timedelta(days=BENCHMARK_HISTORY_DAYS)
+        ticker = yf.Ticker(symbol)
+
+        rows = []
+        if start <= today:
+            history = await run_market_io(ticker.history, start=start.isoformat(), end=(today + timedelta(days=1)).isoformat())
+            rows = [
+                {"symbol": symbol, "date": idx.date(), "close": float(row["Close"])}
+                for idx, row in history.iterrows()
+            ]
+
+        info = await run_market_io(lambda: ticker.info)
+        sector_weights = _normalize_sector_weights(info.get("sectorWeightings"))
+
+        if rows:
+            stmt = upsert_insert(BenchmarkPrice)
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["symbol", "date"], set_={"close": stmt.excluded.close}
+                ),
+                rows,
+            )
+        if sector_weights:
+            await session.execute(delete(BenchmarkSectorWeight).where(BenchmarkSectorWeight.symbol == symbol))
+            await session.execute(
+                upsert_insert(BenchmarkSectorWeight),
+                [
+                    {"symbol": symbol, "sector": sector, "weight": weight, "as_of": today}
+                    for sector, weight in sector_weights.items()
+                ],
+            )
+        await session.commit()
+
+    _snapshots.invalidate(symbol)
+    logger.info(f"[BENCHMARK] Refreshed {symbol}: {len(rows)} new closes, {len(sector_weights)} sector weights")
+
+
+async def _read_snapshot(symbol: str) -> BenchmarkSnapshot:
+    async with async_session_maker() as session:
+        prices = (
+            await session.execute(
+                select(BenchmarkPrice.date, BenchmarkPrice.close)
+                .where(BenchmarkPrice.symbol == symbol)
+                .order_by(BenchmarkPrice.date)
+            )
+        ).all()
+        weights = (
+            await session.execute(
+                select(BenchmarkSectorWeight.sector, BenchmarkSectorWeight.weight)
+                .where(BenchmarkSectorWeight.symbol == symbol)
+            )
+        ).all()
+
+    return BenchmarkSnapshot(
+        symbol=symbol,
+        dates=np.array([row.date for row in prices], dtype="datetime64[D]"),
+        closes=np.array([row.close for row in prices], dtype=float),
+        sector_weights={sector: weight for sector, weight in weights},
+    )
+
+
+async def _load_snapshot(symbol: str) -> BenchmarkSnapshot:
+    snapshot = await _read_snapshot(symbol)
+    last_date = snapshot.last_date
+    if last_date is None or (last_completed_session() - last_date).days > BENCHMARK_STALE_DAYS:
+        # The scheduled refresh has not populated this yet (fresh install or missed runs)
+        try:
+            await refresh_benchmark(symbol)
+            snapshot = await _read_snapshot(symbol)
+        except Exception as e:
+            logger.error(f"[BENCHMARK] Refresh for {symbol} failed, serving stored data: {e}")
+    return snapshot
+
+
+async def get_benchmark(symbol: str = BENCHMARK_SYMBOL) -> BenchmarkSnapshot:
+    """
+    Return the in-memory benchmark snapshot, loading it from the database when needed.
+    """
+    return await _snapshots.get(symbol, lambda: _load_snapshot(symbol))
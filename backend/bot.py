@@ -1,455 +1,721 @@
+import argparse
 import asyncio
 import aiohttp
 import time as time_module
 import math
 import csv
 import os
+import re
 import pytz
 import json
+from dataclasses import dataclass
 from datetime import datetime, time as datetime_time
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from models import Trade
+from collections import Counter
+from bar_store import BAR_STORE_DIR, BarFileFeed, BarRecorder
+from bot_journal import StateJournal
+from bot_metrics import BOT_METRICS_HOST, BOT_METRICS_PORT, TickerMetrics, start_metrics_server
+from order_book import OrderBook
+from price_feed import PriceFeed, ReplayFeed, SocketFeed, Tick, YahooPoller
+from trade_writer import TradeWriter
 from decimal import Decimal
-
-# Configure logging
-logging.basicConfig(
-    filename='trading_bot.log',
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s:%(message)s'
-)
-
-# Global Variables
-state_file = "bot_state.json"  # File to store the bot's state
-budget = Decimal('1000000')    # $1,000,000 initial budget
-ticker = 'NQ=F'
-price_increment = Decimal('10')  # Use $10 increments
-
-# Initialize state variables
-buy_orders = []         # Each entry is (price, quantity)
-# We'll store sells as (price, quantity, position_id) to link to a unique position
-sell_orders = []        
-positions_dict = {}     # {position_id: {'buy_price': Decimal, 'quantity': Decimal}}
-occupied_prices = set() # Track price levels that are occupied (either buy or sell)
-prev_price_cents = None
-total_profit_loss = Decimal('0.0')
-position_id_counter = 0  # To assign unique IDs to each position
+from typing import Optional
+
+# Instruments to trade, comma separated; overridden by tickers given on the command line
+BOT_TICKERS = os.getenv("BOT_TICKERS", "NQ=F")
+DEFAULT_BUDGET = Decimal('1000000')    # $1,000,000 initial budget per instrument
+DEFAULT_PRICE_INCREMENT = Decimal('10')  # Use $10 increments
+DEFAULT_LADDER_DEPTH = 10                 # Buy levels kept below the price
+DEFAULT_ORDER_QUANTITY = Decimal('0.1')   # Units per order
+DEFAULT_REENTRY_OFFSET = Decimal('100')   # Re-entry buy this many points below a filled buy
+# Record every live bar to the binary bar store for replays and backtests
+BOT_RECORD_BARS = os.getenv("BOT_RECORD_BARS", "true").lower() == "true"
+# Seconds between order book printouts per instrument; 0 keeps stdout quiet
+BOT_STATUS_INTERVAL_SECONDS = float(os.getenv("BOT_STATUS_INTERVAL_SECONDS", 0))
+# A slow quote for one instrument must not hold up its next poll
+FETCH_TIMEOUT_SECONDS = float(os.getenv("BOT_FETCH_TIMEOUT_SECONDS", 10))
+# The strategy works in integers: prices in ticks of 1/PRICE_SCALE, quantities in lots of
+# 1/QUANTITY_SCALE and money in cash units of one tick times one lot
+PRICE_SCALE = 100
+QUANTITY_SCALE = 1000
+CASH_SCALE = PRICE_SCALE * QUANTITY_SCALE
+SELL_GAP_TICKS = 10 * PRICE_SCALE         # New buys stay at least $10 below the lowest sell
+RUNAWAY_TICKS = 10 * PRICE_SCALE          # Add a buy when price runs more than $10 above the ladder
+# NQ=F was the only instrument before multi-ticker support; it keeps the original state files
+LEGACY_TICKER = 'NQ=F'
 
 # Database setup with asynchronous engine
 DATABASE_URL = "sqlite+aiosqlite:///stock_manager.db"
 engine = create_async_engine(DATABASE_URL, echo=False)
 async_session_maker = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
-def save_state():
-    global buy_orders, sell_orders, positions_dict, budget, total_profit_loss, occupied_prices, prev_price_cents, position_id_counter
-
-    def convert_decimals(obj):
-        """Recursively convert Decimal objects to float."""
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, (list, tuple)):
-            return [convert_decimals(i) for i in obj]
-        elif isinstance(obj, set):
-            return [convert_decimals(i) for i in obj]
-        else:
-            return obj
-
-    # Convert the positions_dict keys (position_id) to string if needed
-    positions_out = {str(k): v for k, v in positions_dict.items()}
-
-    state = {
-        "buy_orders": convert_decimals(buy_orders),
-        "sell_orders": convert_decimals(sell_orders),
-        "positions_dict": convert_decimals(positions_out),
-        "budget": float(budget),
-        "total_profit_loss": float(total_profit_loss),
-        "occupied_prices": convert_decimals(list(occupied_prices)),
-        "prev_price_cents": prev_price_cents,
-        "position_id_counter": position_id_counter
-    }
-
-    try:
-        import tempfile
-        with tempfile.NamedTemporaryFile("w", delete=False) as tmp_file:
-            json.dump(state, tmp_file)
-            tmp_filename = tmp_file.name
-        os.replace(tmp_filename, state_file)  # Atomically replace the old file
-    except Exception as e:
-        logging.error(f"Failed to save state: {e}")
-
-
-def load_state():
-    global buy_orders, sell_orders, positions_dict, budget, total_profit_loss, occupied_prices, prev_price_cents, position_id_counter
-
-    def convert_to_decimal(obj):
-        """Recursively convert numeric types to Decimal."""
-        if isinstance(obj, list):
-            return [convert_to_decimal(i) for i in obj]
-        elif isinstance(obj, dict):
-            return {k: convert_to_decimal(v) for k, v in obj.items()}
-        elif isinstance(obj, float) or isinstance(obj, int):
-            return Decimal(str(obj))
-        else:
-            return obj
-
-    if os.path.exists(state_file):
-        try:
-            with open(state_file, "r") as f:
-                state = json.load(f)
-            buy_orders = convert_to_decimal(state.get("buy_orders", []))
-            sell_orders = convert_to_decimal(state.get("sell_orders", []))
-            positions_loaded = convert_to_decimal(state.get("positions_dict", {}))
-            # convert position keys back to int
-            positions_dict = {int(k): v for k, v in positions_loaded.items()}
-            budget = Decimal(str(state.get("budget", '1000000')))
-            total_profit_loss = Decimal(str(state.get("total_profit_loss", '0.0')))
-            occupied_prices = set(convert_to_decimal(state.get("occupied_prices", [])))
-            prev_price_cents = state.get("prev_price_cents", None)
-            position_id_counter = state.get("position_id_counter", 0)
-            logging.info("Bot state loaded successfully.")
-        except (ValueError, json.JSONDecodeError) as e:
-            logging.error(f"Failed to load state: {e}. Resetting state to defaults.")
-            reset_state()
-    else:
-        # Initialize default values if no state file exists
-        reset_state()
-
-def reset_state():
-    global buy_orders, sell_orders, positions_dict, occupied_prices, budget, total_profit_loss, prev_price_cents, position_id_counter
-    buy_orders = []
-    sell_orders = []
-    positions_dict = {}
-    occupied_prices = set()
-    budget = Decimal('1000000')
-    total_profit_loss = Decimal('0.0')
-    prev_price_cents = None
-    position_id_counter = 0
-
-
-async def log_trade(timestamp, action, price, quantity, budget, profit_loss):
-    """Log trade details to the database."""
-    try:
-        async with async_session_maker() as session:
-            trade = Trade(
-                timestamp=datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S"),
-                action=action,
-                ticker=ticker,
-                price=Decimal(str(price)),
-                quantity=Decimal(str(quantity)),
-                profit_loss=Decimal(str(round(profit_loss, 2))),
-                budget=Decimal(str(round(budget, 2)))
-            )
-            session.add(trade)
-            await session.commit()
-            logging.info(f"Logged trade: {action} {quantity} {ticker} at ${price}")
-    except Exception as e:
-        logging.error(f"Failed to log trade: {e}")
 
-def is_market_open():
-    """Check if the market is currently open based on futures trading hours."""
-    tz = pytz.timezone('US/Eastern')
-    now = datetime.now(tz)
-    current_weekday = now.weekday()
-    current_time = now.time()
-
-    # Sunday: open at 6 PM
-    if current_weekday == 6:
-        return current_time >= datetime_time(18, 0)
-    # Monday-Thursday: 24 hours, except brief maintenance break usually not considered here
-    elif current_weekday in {0, 1, 2, 3}:
-        return True
-    # Friday: closes at 5 PM
-    elif current_weekday == 4:
-        return current_time < datetime_time(17, 0)
-    # Saturday: closed
-    else:
-        return False
+@dataclass(frozen=True)
+class BotConfig:
+    """Per-instrument settings for a BotInstance."""
+    ticker: str
+    budget: Decimal = DEFAULT_BUDGET
+    price_increment: Decimal = DEFAULT_PRICE_INCREMENT
+    ladder_depth: int = DEFAULT_LADDER_DEPTH
+    order_quantity: Decimal = DEFAULT_ORDER_QUANTITY
+    reentry_offset: Decimal = DEFAULT_REENTRY_OFFSET
+    state_dir: str = "."
+
+    @property
+    def state_prefix(self):
+        if self.ticker == LEGACY_TICKER:
+            name = "bot_state"
+        else:
+            name = "bot_state_" + re.sub(r"[^A-Za-z0-9]+", "_", self.ticker).strip("_")
+        return os.path.join(self.state_dir, name)
 
-async def fetch_latest_data(session):
-    """Fetch the latest price and timestamp using aiohttp."""
-    url = f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}?interval=1m&range=1d"
-    async with session.get(url) as response:
-        data = await response.json()
-        try:
-            result = data['chart']['result'][0]
-            # Check if 'timestamp' key exists and is not empty
-            if 'timestamp' not in result or not result['timestamp']:
-                logging.info("No timestamp data available. Possibly the market is closed.")
-                return None, None
-
-            timestamp = result['timestamp'][-1]
-            quote = result['indicators']['quote'][0]
-            if 'close' not in quote or not quote['close']:
-                logging.info("No close price data available.")
-                return None, None
-
-            current_price = quote['close'][-1]
-            if current_price is None:
-                logging.info("Close price is None. Market might be closed or data unavailable.")
-                return None, None
-
-            current_time = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
-            return Decimal(str(current_price)), current_time
-        except (KeyError, IndexError, TypeError) as e:
-            logging.error(f"Failed to parse data: {e}")
-            return None, None
-
-def calculate_price_levels(current_price_cents):
-    """Calculate the 10 nearest multiples of price increments below the current price."""
-    price_increment_cents = int(price_increment * 100)
-    nearest_multiple_cents = (current_price_cents // price_increment_cents) * price_increment_cents
-    potential_buy_prices_cents = [
-        nearest_multiple_cents - (i * price_increment_cents) for i in range(10)
-    ]
-    return potential_buy_prices_cents
-
-def cancel_outdated_buy_orders(potential_buy_prices_cents, current_time):
-    """Cancel buy orders that are no longer among the 10 nearest price levels."""
-    global buy_orders, occupied_prices
-    for order in list(buy_orders):
-        order_price_cents = int(round(order[0] * 100))
-        if order_price_cents not in potential_buy_prices_cents:
-            buy_orders.remove(order)
-            if order[0] in occupied_prices:
-                occupied_prices.remove(order[0])
-
-
-def remove_unoccupied_prices(potential_buy_prices_cents, current_time):
-    """Remove price levels from occupied_prices that are no longer among the 10 nearest."""
-    global occupied_prices
-    for price in list(occupied_prices):
-        price_cents = int(round(Decimal(price) * 100))
-        # Check if this price is used by any buy or sell orders
-        buy_exists = any(int(round(Decimal(o[0])*100)) == price_cents for o in buy_orders)
-        sell_exists = any(int(round(Decimal(o[0])*100)) == price_cents for o in sell_orders)
-        if price_cents not in potential_buy_prices_cents and not buy_exists and not sell_exists:
-            occupied_prices.remove(price)
-            logging.info(
-                f"Time: {current_time} - Removed price level ${price} from occupied_prices "
-                "as it's no longer among the 10 nearest and has no active orders."
-            )
+    @property
+    def state_file(self):
+        """Legacy full-state file, read once to seed the journal."""
+        return f"{self.state_prefix}.json"
 
-def get_lowest_sell_price():
-    """Return the lowest sell order price if any sells exist."""
-    if sell_orders:
-        return min(s[0] for s in sell_orders)
-    return None
-
-def place_buy_orders(potential_buy_prices_cents, current_price_cents, current_time):
-    """Place new buy limit orders for the 10 nearest price levels if not already occupied."""
-    global buy_orders, occupied_prices, budget, sell_orders
-    price_increment_cents = int(price_increment * 100)
-    lowest_sell = get_lowest_sell_price()
-
-    for buy_price_cents in potential_buy_prices_cents:
-        buy_price = Decimal(buy_price_cents) / 100
-        # Only add a new buy if we have room
-        if buy_price not in occupied_prices and len(occupied_prices) < 10 and budget >= buy_price:
-            # Check against existing sells to avoid being too close
-            if lowest_sell is not None:
-                # If new buy would be >= (lowest_sell - 10), skip
-                if buy_price >= (lowest_sell - Decimal('10')):
-                    continue
-
-            quantity = Decimal('0.1')
-            buy_orders.append((buy_price, quantity))
-            occupied_prices.add(buy_price)
-            logging.info(
-                f"Time: {current_time} - Setting buy limit order at ${buy_price} "
-                f"for {quantity} unit(s)"
-            )
+    def make_journal(self):
+        # State changes are appended to the journal and compacted into the snapshot periodically
+        return StateJournal(f"{self.state_prefix}.journal", f"{self.state_prefix}.snapshot.json")
 
-async def execute_buy_orders(current_price, current_time):
-    global buy_orders, sell_orders, positions_dict, budget, occupied_prices, position_id_counter
 
-    for order in list(buy_orders):
-        order_price = order[0]
-        order_quantity = order[1]
+def to_ticks(price: Decimal) -> int:
+    return int(round(price * PRICE_SCALE))
+
+
+def to_lots(quantity: Decimal) -> int:
+    return int(round(quantity * QUANTITY_SCALE))
+
+
+def to_cash(amount: Decimal) -> int:
+    return int(round(amount * CASH_SCALE))
+
+
+def from_ticks(ticks: int) -> Decimal:
+    return Decimal(ticks) / PRICE_SCALE
+
+
+def from_lots(lots: int) -> Decimal:
+    return Decimal(lots) / QUANTITY_SCALE
+
+
+def from_cash(cash: int) -> Decimal:
+    return Decimal(cash) / CASH_SCALE
+
+
+def _legacy_event(event):
+    """Convert a journal event recorded with Decimal string prices to integer units."""
+    event = dict(event)
+    event["price"] = to_ticks(Decimal(event["price"]))
+    if "quantity" in event:
+        event["quantity"] = to_lots(Decimal(str(event["quantity"])))
+    if "position_id" in event:
+        event["position_id"] = int(event["position_id"])
+    return event
+
+
+class _TickerLogAdapter(logging.LoggerAdapter):
+    """Prefix log lines with the instrument, since all instances share trading_bot.log."""
+
+    def process(self, msg, kwargs):
+        return f"[{self.extra['ticker']}] {msg}", kwargs
+
+
+class BotInstance:
+    """
+    Grid strategy state and logic for one instrument.
+
+    Prices are held as integer ticks (cents), quantities as integer lots and money as
+    integer cash units (tick x lot), so the hot loop never touches Decimal or float;
+    values are converted only when they enter (feeds, config, legacy state) or leave
+    (trade records, logs, status output) the strategy.
+
+    Buys are (price, quantity); sells are (price, quantity, position_id) to link to a
+    unique position. Every state change goes through record_event so it is journaled.
+    Trades are handed to `trade_writer` (anything with an async `submit(dict)`), which
+    is shared by all instances in a BotRuntime.
+    """
+
+    def __init__(self, config: BotConfig, trade_writer, journal=None):
+        self.config = config
+        self.ticker = config.ticker
+        self.price_increment = to_ticks(config.price_increment)
+        self.ladder_depth = config.ladder_depth
+        self.order_quantity = to_lots(config.order_quantity)
+        self.reentry_offset = to_ticks(config.reentry_offset)
+        self.trade_writer = trade_writer
+        self.journal = journal if journal is not None else config.make_journal()
+        self.logger = _TickerLogAdapter(logging.getLogger(), {"ticker": config.ticker})
+        self.reset_state()
+
+    # ----- State -----
+
+    def reset_state(self):
+        self.order_book = OrderBook()
+        self.positions_dict = {}     # {position_id: {'buy_price': ticks, 'quantity': lots}}
+        self.position_buy_prices = Counter()  # Open positions per buy price
+        self.occupied_prices = set() # Track price levels that are occupied (either buy or sell)
+        self.idle_prices = set()     # Occupied price levels with no resting order, the only ones that can be released
+        self.budget = to_cash(self.config.budget)
+        self.total_profit_loss = 0
+        self.prev_price_cents = None
+        self.position_id_counter = 0  # To assign unique IDs to each position
+
+    def state_snapshot(self):
+        """Return the full bot state for a journal snapshot."""
+        return {
+            "fixed_point": True,
+            "buy_orders": self.order_book.buy_orders(),
+            "sell_orders": self.order_book.sell_orders(),
+            # Convert the positions_dict keys (position_id) to string for JSON
+            "positions_dict": {str(k): v for k, v in self.positions_dict.items()},
+            "budget": self.budget,
+            "total_profit_loss": self.total_profit_loss,
+            "occupied_prices": sorted(self.occupied_prices),
+            "prev_price_cents": self.prev_price_cents,
+            "position_id_counter": self.position_id_counter
+        }
+
+    def restore_state(self, state):
+        """
+        Replace the in-memory state with a snapshot. Snapshots written before prices
+        were held as integers (and the legacy bot_state.json) store Decimal strings
+        and are converted on the way in.
+        """
+        if state.get("fixed_point"):
+            price, quantity, cash = int, int, int
+        else:
+            price = lambda value: to_ticks(Decimal(str(value)))
+            quantity = lambda value: to_lots(Decimal(str(value)))
+            cash = lambda value: to_cash(Decimal(str(value)))
+
+        order_book = OrderBook()
+        for buy_price, buy_quantity in state.get("buy_orders", []):
+            order_book.add_buy(price(buy_price), quantity(buy_quantity))
+        for sell_price, sell_quantity, pos_id in state.get("sell_orders", []):
+            order_book.add_sell(price(sell_price), quantity(sell_quantity), int(Decimal(str(pos_id))))
+        self.order_book = order_book
+        # convert position keys back to int
+        self.positions_dict = {
+            int(k): {'buy_price': price(v['buy_price']), 'quantity': quantity(v['quantity'])}
+            for k, v in state.get("positions_dict", {}).items()
+        }
+        self.position_buy_prices = Counter(pos['buy_price'] for pos in self.positions_dict.values())
+        self.budget = cash(state["budget"]) if "budget" in state else to_cash(self.config.budget)
+        self.total_profit_loss = cash(state.get("total_profit_loss", 0))
+        self.occupied_prices = {price(value) for value in state.get("occupied_prices", [])}
+        self.idle_prices = {
+            level for level in self.occupied_prices
+            if not order_book.has_buy(level) and not order_book.has_sell(level)
+        }
+        self.prev_price_cents = state.get("prev_price_cents", None)
+        self.position_id_counter = state.get("position_id_counter", 0)
+
+    def _refresh_idle(self, price):
+        """Keep idle_prices in sync after an event touched `price`."""
+        if price in self.occupied_prices and not self.order_book.has_buy(price) and not self.order_book.has_sell(price):
+            self.idle_prices.add(price)
+        else:
+            self.idle_prices.discard(price)
+
+    def apply_event(self, event):
+        """
+        Apply one state-change event to the in-memory state.
+
+        Used both when trading (through record_event) and when replaying the journal,
+        so recovered state always matches what the bot did. Returns the new position ID
+        for buy fills and the profit/loss (None without a matching position) for sell fills.
+        """
+        kind = event["type"]
+
+        if kind == "price":
+            self.prev_price_cents = event["cents"]
+            return None
+        price = event["price"]
+        result = None
+        order_book = self.order_book
+        occupied_prices = self.occupied_prices
+
+        if kind == "buy_placed":
+            order_book.add_buy(price, event["quantity"])
+            occupied_prices.add(price)
+        elif kind == "buys_cancelled":
+            order_book.cancel_buys_at(price)
+            occupied_prices.discard(price)
+        elif kind == "occupied_released":
+            occupied_prices.discard(price)
+        elif kind == "buy_filled":
+            quantity = event["quantity"]
+            self.budget -= price * quantity
+            order_book.remove_buy(price, quantity)
+            occupied_prices.discard(price)
+            # Create a unique position ID
+            self.position_id_counter += 1
+            self.positions_dict[self.position_id_counter] = {'buy_price': price, 'quantity': quantity}
+            self.position_buy_prices[price] += 1
+            result = self.position_id_counter
+        elif kind == "sell_placed":
+            order_book.add_sell(price, event["quantity"], event["position_id"])
+            occupied_prices.add(price)
+        elif kind == "sell_filled":
+            quantity = event["quantity"]
+            pos_id = event["position_id"]
+            self.budget += price * quantity
+            order_book.remove_sell(price, quantity, pos_id)
+            occupied_prices.discard(price)
+            position = self.positions_dict.pop(pos_id, None)
+            if position is not None:
+                result = (price - position['buy_price']) * quantity
+                self.total_profit_loss += result
+                self.position_buy_prices[position['buy_price']] -= 1
+                if not self.position_buy_prices[position['buy_price']]:
+                    del self.position_buy_prices[position['buy_price']]
+        else:
+            raise ValueError(f"Unknown journal event type: {kind}")
 
-        if current_price <= order_price and budget >= order_price * order_quantity:
-            # Execute the buy
-            budget -= order_price * order_quantity
-            buy_orders.remove(order)
-            if order_price in occupied_prices:
-                occupied_prices.remove(order_price)  # Remove the executed buy price
+        self._refresh_idle(price)
+        return result
 
-            # Create a unique position ID
-            position_id_counter += 1
-            pos_id = position_id_counter
-            positions_dict[pos_id] = {'buy_price': order_price, 'quantity': order_quantity}
+    def record_event(self, kind, **fields):
+        """Apply a state change and queue it for the journal."""
+        event = {"type": kind, **fields}
+        result = self.apply_event(event)
+        self.journal.record(event)
+        return result
 
-            logging.info(
-                f"Time: {current_time} - Executed buy order at ${order_price} "
-                f"for {order_quantity} unit(s). Remaining budget: ${budget:.2f}"
-            )
-            await log_trade(current_time, 'Buy', float(order_price), float(order_quantity), float(budget), 0.0)
-
-            # Set corresponding sell order if not already present
-            sell_price = order_price + price_increment
-            if not any(s[0] == sell_price for s in sell_orders):
-                sell_orders.append((sell_price, order_quantity, pos_id))
-                occupied_prices.add(sell_price)
-                logging.info(
-                    f"Time: {current_time} - Setting sell limit order at ${sell_price} "
-                    f"for {order_quantity} unit(s)"
-                )
+    def save_state(self):
+        """Write this tick's state changes to the journal, compacting it into a snapshot periodically."""
+        try:
+            self.journal.flush()
+            if self.journal.needs_snapshot():
+                self.journal.write_snapshot(self.state_snapshot())
+        except Exception as e:
+            self.logger.error(f"Failed to save state: {e}")
+
+    def load_state(self):
+        """Recover state from the snapshot plus journal tail, seeding it from the legacy state file on first run."""
+        journal = self.journal
+        state_file = self.config.state_file
+        try:
+            if journal.exists():
+                state, events = journal.load()
+                if state is not None:
+                    self.restore_state(state)
+                else:
+                    self.reset_state()
+                legacy = state is not None and not state.get("fixed_point")
+                for event in events:
+                    if isinstance(event.get("price"), str):
+                        event = _legacy_event(event)
+                        legacy = True
+                    self.apply_event(event)
+                if legacy:
+                    # Rewrite state recorded with Decimal strings in integer units
+                    journal.write_snapshot(self.state_snapshot())
+                self.logger.info(f"Bot state recovered from snapshot and {len(events)} journal events.")
+            elif os.path.exists(state_file):
+                with open(state_file, "r") as f:
+                    self.restore_state(json.load(f))
+                journal.write_snapshot(self.state_snapshot())
+                self.logger.info(f"Bot state loaded from {state_file} and written to the journal snapshot.")
             else:
-                logging.info(
-                    f"Time: {current_time} - Skipping duplicate sell order at ${sell_price}."
+                # Initialize default values if no state exists
+                self.reset_state()
+        except (ValueError, KeyError, TypeError, ArithmeticError) as e:
+            self.logger.error(f"Failed to load state: {e}. Resetting state to defaults.")
+            # Keep the unreadable files for inspection and start a fresh journal
+            for path in (journal.snapshot_path, journal.journal_path):
+                if os.path.exists(path):
+                    os.replace(path, f"{path}.corrupt")
+            self.reset_state()
+            journal.write_snapshot(self.state_snapshot())
+
+    async def log_trade(self, timestamp, action, price, quantity, budget, profit_loss):
+        """Queue trade details for the background database writer (price in ticks, quantity in lots, money in cash units)."""
+        try:
+            await self.trade_writer.submit({
+                "timestamp": datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S"),
+                "action": action,
+                "ticker": self.ticker,
+                "price": price / PRICE_SCALE,
+                "quantity": quantity / QUANTITY_SCALE,
+                "profit_loss": round(profit_loss / CASH_SCALE, 2),
+                "budget": round(budget / CASH_SCALE, 2),
+            })
+            self.logger.info(f"Logged trade: {action} {from_lots(quantity)} {self.ticker} at ${from_ticks(price)}")
+        except Exception as e:
+            self.logger.error(f"Failed to log trade: {e}")
+
+    # ----- Strategy -----
+
+    def calculate_price_levels(self, current_price_cents):
+        """Calculate the ladder_depth nearest multiples of price increments below the current price."""
+        price_increment = self.price_increment
+        nearest_multiple = (current_price_cents // price_increment) * price_increment
+        return [nearest_multiple - (i * price_increment) for i in range(self.ladder_depth)]
+
+    def cancel_outdated_buy_orders(self, potential_buy_prices_cents, current_time):
+        """Cancel buy orders that are no longer among the nearest price levels."""
+        for price in list(self.order_book.buy_prices()):
+            if price not in potential_buy_prices_cents:
+                self.record_event("buys_cancelled", price=price)
+
+    def remove_unoccupied_prices(self, potential_buy_prices_cents, current_time):
+        """Remove price levels from occupied_prices that are no longer among the nearest levels."""
+        # Only levels without any buy or sell order can be released
+        for price in list(self.idle_prices):
+            if price not in potential_buy_prices_cents:
+                self.record_event("occupied_released", price=price)
+                self.logger.info(
+                    f"Time: {current_time} - Removed price level ${from_ticks(price)} from occupied_prices "
+                    "as it's no longer among the nearest levels and has no active orders."
                 )
 
-            # Add a new buy order 100 points below the executed buy price
-            new_buy_price = order_price - Decimal('100')
-            if new_buy_price > 0 and new_buy_price not in occupied_prices and budget >= new_buy_price * order_quantity:
-                buy_orders.append((new_buy_price, order_quantity))
-                occupied_prices.add(new_buy_price)
-                logging.info(
-                    f"Time: {current_time} - Setting new buy limit order at ${new_buy_price} "
-                    f"for {order_quantity} unit(s)"
+    def get_lowest_sell_price(self):
+        """Return the lowest sell order price if any sells exist."""
+        return self.order_book.best_ask()
+
+    def place_buy_orders(self, potential_buy_prices_cents, current_price_cents, current_time):
+        """Place new buy limit orders for the nearest price levels if not already occupied."""
+        lowest_sell = self.get_lowest_sell_price()
+        quantity = self.order_quantity
+
+        for buy_price in potential_buy_prices_cents:
+            # Only add a new buy if we have room (and cash for one whole unit)
+            if buy_price not in self.occupied_prices and len(self.occupied_prices) < self.ladder_depth and self.budget >= buy_price * QUANTITY_SCALE:
+                # Check against existing sells to avoid being too close
+                if lowest_sell is not None:
+                    # If new buy would be >= (lowest_sell - 10), skip
+                    if buy_price >= lowest_sell - SELL_GAP_TICKS:
+                        continue
+
+                self.record_event("buy_placed", price=buy_price, quantity=quantity)
+                self.logger.info(
+                    f"Time: {current_time} - Setting buy limit order at ${from_ticks(buy_price)} "
+                    f"for {from_lots(quantity)} unit(s)"
                 )
 
+    async def execute_buy_orders(self, current_price, current_time):
+        # Only buys at or above the current price can fill
+        for order_price, order_quantity in self.order_book.buys_at_or_above(current_price):
+            if self.budget >= order_price * order_quantity:
+                # Execute the buy, freeing its price level and opening a position
+                pos_id = self.record_event("buy_filled", price=order_price, quantity=order_quantity)
 
-
-async def execute_sell_orders(current_price, current_time):
-    global sell_orders, positions_dict, budget, occupied_prices, total_profit_loss
-
-    for order in list(sell_orders):
-        order_price = order[0]
-        order_quantity = order[1]
-        pos_id = order[2]
-
-        if current_price >= order_price:
-            # Execute the sell
-            budget += order_price * order_quantity
-            sell_orders.remove(order)
-            if order_price in occupied_prices:
-                occupied_prices.remove(order_price)
-
-            position = positions_dict.get(pos_id, None)
-            if position:
-                profit_loss = (order_price - position['buy_price']) * order_quantity
-                total_profit_loss += profit_loss
-                del positions_dict[pos_id]
-            else:
+                self.logger.info(
+                    f"Time: {current_time} - Executed buy order at ${from_ticks(order_price)} "
+                    f"for {from_lots(order_quantity)} unit(s). Remaining budget: ${from_cash(self.budget):.2f}"
+                )
+                await self.log_trade(current_time, 'Buy', order_price, order_quantity, self.budget, 0)
+
+                # Set corresponding sell order if not already present
+                sell_price = order_price + self.price_increment
+                if not self.order_book.has_sell(sell_price):
+                    self.record_event("sell_placed", price=sell_price, quantity=order_quantity, position_id=pos_id)
+                    self.logger.info(
+                        f"Time: {current_time} - Setting sell limit order at ${from_ticks(sell_price)} "
+                        f"for {from_lots(order_quantity)} unit(s)"
+                    )
+                else:
+                    self.logger.info(
+                        f"Time: {current_time} - Skipping duplicate sell order at ${from_ticks(sell_price)}."
+                    )
+
+                # Add a new buy order reentry_offset points below the executed buy price
+                new_buy_price = order_price - self.reentry_offset
+                if new_buy_price > 0 and new_buy_price not in self.occupied_prices and self.budget >= new_buy_price * order_quantity:
+                    self.record_event("buy_placed", price=new_buy_price, quantity=order_quantity)
+                    self.logger.info(
+                        f"Time: {current_time} - Setting new buy limit order at ${from_ticks(new_buy_price)} "
+                        f"for {from_lots(order_quantity)} unit(s)"
+                    )
+
+    async def execute_sell_orders(self, current_price, current_time):
+        # Only sells at or below the current price can fill
+        for order_price, order_quantity, pos_id in self.order_book.sells_at_or_below(current_price):
+            # Execute the sell, closing its position
+            profit_loss = self.record_event("sell_filled", price=order_price, quantity=order_quantity, position_id=pos_id)
+            if profit_loss is None:
                 # Should not happen, but handle gracefully
-                profit_loss = Decimal('0.0')
-                logging.warning(
-                    f"Time: {current_time} - No matching position found for sell at ${order_price} "
+                profit_loss = 0
+                self.logger.warning(
+                    f"Time: {current_time} - No matching position found for sell at ${from_ticks(order_price)} "
                     f"with position ID {pos_id}. This should not happen."
                 )
 
-            logging.info(
-                f"Time: {current_time} - Executed sell order at ${order_price} "
-                f"for {order_quantity} unit(s). Updated budget: ${budget:.2f}, Profit/Loss: ${profit_loss:.2f}"
+            self.logger.info(
+                f"Time: {current_time} - Executed sell order at ${from_ticks(order_price)} "
+                f"for {from_lots(order_quantity)} unit(s). Updated budget: ${from_cash(self.budget):.2f}, "
+                f"Profit/Loss: ${from_cash(profit_loss):.2f}"
             )
-            await log_trade(current_time, 'Sell', float(order_price), float(order_quantity), float(budget), float(profit_loss))
-
+            await self.log_trade(current_time, 'Sell', order_price, order_quantity, self.budget, profit_loss)
+
+    def check_and_add_new_buy(self, current_price, current_time):
+        highest_buy_price = self.order_book.best_bid()
+        if highest_buy_price is None:
+            return  # No buy orders placed yet
+
+        # Condition 1: Price moved away more than $10
+        if current_price > highest_buy_price + RUNAWAY_TICKS:
+            # Calculate the new buy price
+            new_buy_price = (current_price // RUNAWAY_TICKS) * RUNAWAY_TICKS
+
+            # Check if a buy was already executed at this price level
+            if new_buy_price in self.position_buy_prices:
+                return
+
+            # Check if there's an overlapping or conflicting sell order
+            if self.order_book.has_sell_near(new_buy_price, self.price_increment):
+                self.logger.info(
+                    f"Time: {current_time} - Skipping new buy at ${from_ticks(new_buy_price)} "
+                    "due to conflict with existing sell orders."
+                )
+                return
 
-def check_and_add_new_buy(current_price, current_time):
-    global buy_orders, sell_orders, positions_dict, occupied_prices, budget
+            # Place the new buy order if all conditions are satisfied
+            if new_buy_price > 0 and new_buy_price not in self.occupied_prices and self.budget >= new_buy_price * self.order_quantity:
+                self.record_event("buy_placed", price=new_buy_price, quantity=self.order_quantity)
+                self.logger.info(
+                    f"Time: {current_time} - Price ran away, added new buy at ${from_ticks(new_buy_price)}"
+                )
 
-    highest_buy_price = max([o[0] for o in buy_orders], default=None)
-    if highest_buy_price is None:
-        return  # No buy orders placed yet
+    def stats(self) -> dict:
+        """Order, position and P/L counts for the metrics endpoint."""
+        return {
+            "open_buy_orders": self.order_book.buy_count,
+            "open_sell_orders": self.order_book.sell_count,
+            "open_positions": len(self.positions_dict),
+            "position_quantity": float(from_lots(sum(position['quantity'] for position in self.positions_dict.values()))),
+            "last_price": float(from_ticks(self.prev_price_cents)) if self.prev_price_cents is not None else None,
+            "budget": float(from_cash(self.budget)),
+            "realized_pnl": float(from_cash(self.total_profit_loss)),
+        }
+
+    def print_status(self, current_time, current_price):
+        """Print the current status of orders and positions."""
+        print(f"\n[{self.ticker}] Time: {current_time} - Current Price: ${from_ticks(current_price):.2f}")
+        print("Active Buy Orders:")
+        for price, quantity in self.order_book.buy_orders():
+            print(f"  Buy at ${from_ticks(price):.2f} for {from_lots(quantity)} unit(s)")
+        print("Active Sell Orders:")
+        for price, quantity, _ in self.order_book.sell_orders():
+            print(f"  Sell at ${from_ticks(price):.2f} for {from_lots(quantity)} unit(s)")
+        print(f"Occupied Price Levels: {[price / PRICE_SCALE for price in sorted(self.occupied_prices)]}")
+        print(f"Total Realized Profit/Loss: ${from_cash(self.total_profit_loss):.2f}")
+        print(f"Open Positions: {len(self.positions_dict)}")
+
+    async def process_tick(self, current_price, current_time):
+        """
+        Run one strategy step for the latest price, in ticks (see to_ticks): maintain the
+        buy ladder, then fill any orders the price has crossed. Shared by the live loop
+        and the backtester.
+        """
+        if self.prev_price_cents is not None:
+            price_moved_up = current_price > self.prev_price_cents
+        else:
+            price_moved_up = False
 
-    # Condition 1: Price moved away more than $10
-    if current_price > highest_buy_price + Decimal('10'):
-        # Calculate the new buy price
-        new_buy_price = (current_price // Decimal('10')) * Decimal('10')
+        if current_price != self.prev_price_cents:
+            self.record_event("price", cents=current_price)
 
-        # Check if a buy was already executed at this price level
-        if any(pos['buy_price'] == new_buy_price for pos in positions_dict.values()):
-            return
+        potential_buy_prices_cents = self.calculate_price_levels(current_price)
 
-        # Check if there's an overlapping or conflicting sell order
-        if any(
-            abs(sell_order[0] - new_buy_price) < price_increment
-            for sell_order in sell_orders
-        ):
-            logging.info(
-                f"Time: {current_time} - Skipping new buy at ${new_buy_price} "
-                "due to conflict with existing sell orders."
-            )
-            return
+        # Cancel outdated buy orders if price moved up
+        ##if price_moved_up:
+            ##self.cancel_outdated_buy_orders(potential_buy_prices_cents, current_time)
 
-        # Place the new buy order if all conditions are satisfied
-        if new_buy_price > 0 and new_buy_price not in occupied_prices and budget >= new_buy_price * Decimal('0.1'):
-            buy_orders.append((new_buy_price, Decimal('0.1')))
-            occupied_prices.add(new_buy_price)
-            logging.info(
-                f"Time: {current_time} - Price ran away, added new buy at ${new_buy_price}"
-            )
+        self.remove_unoccupied_prices(potential_buy_prices_cents, current_time)
+        self.place_buy_orders(potential_buy_prices_cents, current_price, current_time)
+        self.check_and_add_new_buy(current_price, current_time)
+        await self.execute_buy_orders(current_price, current_time)
+        await self.execute_sell_orders(current_price, current_time)
 
 
+def is_market_open():
+    """Check if the market is currently open based on futures trading hours."""
+    tz = pytz.timezone('US/Eastern')
+    now = datetime.now(tz)
+    current_weekday = now.weekday()
+    current_time = now.time()
 
+    # Sunday: open at 6 PM
+    if current_weekday == 6:
+        return current_time >= datetime_time(18, 0)
+    # Monday-Thursday: 24 hours, except brief maintenance break usually not considered here
+    elif current_weekday in {0, 1, 2, 3}:
+        return True
+    # Friday: closes at 5 PM
+    elif current_weekday == 4:
+        return current_time < datetime_time(17, 0)
+    # Saturday: closed
+    else:
+        return False
 
-def print_status(current_time, current_price):
-    """Print the current status of orders and positions."""
-    print(f"\nTime: {current_time} - Current Price: ${current_price:.2f}")
-    print("Active Buy Orders:")
-    for order in sorted(buy_orders, key=lambda x: x[0], reverse=True):
-        print(f"  Buy at ${order[0]:.2f} for {order[1]} unit(s)")
-    print("Active Sell Orders:")
-    for order in sorted(sell_orders, key=lambda x: x[0]):
-        print(f"  Sell at ${order[0]:.2f} for {order[1]} unit(s)")
-    print(f"Occupied Price Levels: {[float(price) for price in sorted(occupied_prices)]}")
-    print(f"Total Realized Profit/Loss: ${total_profit_loss:.2f}")
-    print(f"Open Positions: {len(positions_dict)}")
 
-async def main():
+class BotRuntime:
+    """
+    Runs many BotInstances in one process.
+
+    All instances share one trade writer and one price feed; each tick is routed to its
+    instrument's instance and processed as soon as the feed delivers it. The default
+    feed is a YahooPoller over one shared HTTP session. With a `recorder`, every tick is
+    also appended to the bar store.
+
+    Loop timings, feed, writer and order counts are served as JSON on
+    http://127.0.0.1:<metrics_port>/metrics (0 disables it). The order book is printed
+    only with a `status_interval`, at most once per interval per instrument.
+    """
+
+    def __init__(
+        self,
+        configs,
+        session_maker=async_session_maker,
+        recorder: Optional[BarRecorder] = None,
+        metrics_port: int = BOT_METRICS_PORT,
+        status_interval: float = BOT_STATUS_INTERVAL_SECONDS,
+    ):
+        self.trade_writer = TradeWriter(session_maker)
+        self.instances = {config.ticker: BotInstance(config, self.trade_writer) for config in configs}
+        self.recorder = recorder
+        self.metrics_port = metrics_port
+        self.status_interval = status_interval
+        self.metrics = {ticker: TickerMetrics() for ticker in self.instances}
+        self.feed: Optional[PriceFeed] = None
+        self.started_at = time_module.time()
+        self._last_status = {}  # ticker -> monotonic time of its last printout
+
+    async def run(self, feed: Optional[PriceFeed] = None):
+        """Load every instrument's state and trade on `feed` until it ends or is cancelled."""
+        for instance in self.instances.values():
+            instance.load_state()
+        self.trade_writer.start()
+        metrics_runner = await start_metrics_server(self.stats, BOT_METRICS_HOST, self.metrics_port) if self.metrics_port else None
+        try:
+            if feed is not None:
+                await self._consume(feed)
+            else:
+                timeout = aiohttp.ClientTimeout(total=FETCH_TIMEOUT_SECONDS)
+                async with aiohttp.ClientSession(timeout=timeout) as http_session:
+                    await self._consume(YahooPoller(http_session, list(self.instances), is_open=is_market_open))
+        finally:
+            # Flush state changes and trades still queued before exiting
+            for instance in self.instances.values():
+                instance.save_state()
+            await self.trade_writer.close()
+            if self.recorder is not None:
+                self.recorder.close()
+            if metrics_runner is not None:
+                await metrics_runner.cleanup()
+
+    async def _consume(self, feed: PriceFeed):
+        self.feed = feed
+        try:
+            async for tick in feed:
+                if self.recorder is not None:
+                    self._record(tick)
+                await self._process(tick)
+        finally:
+            await feed.close()
+
+    def _record(self, tick: Tick):
+        try:
+            self.recorder.record(tick)
+        except Exception as e:
+            logging.error(f"[{tick.ticker}] Failed to record bar: {e}")
+
+    async def _process(self, tick: Tick):
+        """Run one strategy step for the tick's instrument; errors are logged and kept to that instrument."""
+        instance = self.instances.get(tick.ticker)
+        if instance is None:
+            # Replays may carry instruments this runtime does not trade
+            return
+        metrics = self.metrics[tick.ticker]
+        try:
+            current_time = tick.current_time
+            current_price = to_ticks(tick.price)
+            started = time_module.perf_counter()
+            await instance.process_tick(current_price, current_time)
+            computed = time_module.perf_counter()
+
+            # Save state
+            instance.save_state()
+            metrics.tick_processed(tick.timestamp, computed - started, time_module.perf_counter() - computed)
+
+            if self.status_interval:
+                self._maybe_print_status(instance, current_time, current_price)
+        except Exception as e:
+            metrics.errors += 1
+            instance.logger.error(f"An error occurred: {e}")
+
+    def _maybe_print_status(self, instance: BotInstance, current_time, current_price):
+        now = time_module.monotonic()
+        last = self._last_status.get(instance.ticker)
+        if last is None or now - last >= self.status_interval:
+            self._last_status[instance.ticker] = now
+            instance.print_status(current_time, current_price)
+
+    def stats(self) -> dict:
+        """Everything served on the metrics endpoint."""
+        return {
+            "uptime_seconds": round(time_module.time() - self.started_at, 1),
+            "ticks_per_minute": sum(metrics.ticks_per_minute() for metrics in self.metrics.values()),
+            "feed": {"type": type(self.feed).__name__, **self.feed.stats()} if self.feed is not None else None,
+            "trade_writer": self.trade_writer.stats(),
+            "bars_recorded": self.recorder.bars_written if self.recorder is not None else None,
+            "instruments": {
+                ticker: {**instance.stats(), **self.metrics[ticker].stats()}
+                for ticker, instance in self.instances.items()
+            },
+        }
+
+
+def configured_tickers():
+    return [ticker.strip() for ticker in BOT_TICKERS.split(",") if ticker.strip()]
+
+
+async def main(tickers=None, feed=None, state_dir=".", metrics_port=BOT_METRICS_PORT, status_interval=BOT_STATUS_INTERVAL_SECONDS):
     """Main function to run the trading bot."""
-    global prev_price_cents
-
-    # Load state from storage
-    load_state()
-
-    async with aiohttp.ClientSession() as http_session:
-        while True:
-            try:
-                # Check if market is open
-                if not is_market_open():
-                    print("Market is closed. Waiting for market to open...")
-                    await asyncio.sleep(60)
-                    continue
-
-                current_price, current_time = await fetch_latest_data(http_session)
-                if current_price is None:
-                    await asyncio.sleep(15)
-                    continue
-
-                current_price_cents = int(round(current_price * 100))
-                if prev_price_cents is not None:
-                    price_moved_up = current_price_cents > prev_price_cents
-                else:
-                    price_moved_up = False
-
-                prev_price_cents = current_price_cents
-
-                potential_buy_prices_cents = calculate_price_levels(current_price_cents)
-
-                # Cancel outdated buy orders if price moved up
-                ##if price_moved_up:
-                    ##cancel_outdated_buy_orders(potential_buy_prices_cents, current_time)
-
-                remove_unoccupied_prices(potential_buy_prices_cents, current_time)
-                place_buy_orders(potential_buy_prices_cents, current_price_cents, current_time)
-                check_and_add_new_buy(current_price, current_time)
-                await execute_buy_orders(current_price, current_time)
-                await execute_sell_orders(current_price, current_time) 
-
-                print_status(current_time, current_price)
-
-                # Save state
-                save_state()
-
-                await asyncio.sleep(15)
-
-            except Exception as e:
-                logging.error(f"An error occurred: {e}")
-                await asyncio.sleep(15)
+    tickers = tickers or configured_tickers()
+    # Only live bars are recorded; replays already come from stored data
+    recorder = BarRecorder() if feed is None and BOT_RECORD_BARS else None
+    runtime = BotRuntime(
+        [BotConfig(ticker, state_dir=state_dir) for ticker in dict.fromkeys(tickers)],
+        recorder=recorder,
+        metrics_port=metrics_port,
+        status_interval=status_interval,
+    )
+    await runtime.run(feed)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Configure logging here so that importing the strategy (backtests, sweeps) leaves no log file behind
+    logging.basicConfig(
+        filename='trading_bot.log',
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)s:%(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="Run the grid trading bot.")
+    parser.add_argument("tickers", nargs="*", help="Instruments to trade (default: BOT_TICKERS or NQ=F)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--replay", metavar="CSV", help="Trade on ticks replayed from a CSV instead of Yahoo")
+    source.add_argument("--socket", metavar="HOST:PORT", help="Trade on JSON-line ticks read from a TCP socket")
+    source.add_argument("--replay-bars", metavar="DIR", help=f"Trade on bars recorded in a bar store (live bars go to {BAR_STORE_DIR})")
+    parser.add_argument("--speed", type=float, default=0.0, help="Replay speed multiplier (0 = as fast as possible)")
+    parser.add_argument("--state-dir", default=".", help="Directory for state files; keep replays apart from live state")
+    parser.add_argument("--metrics-port", type=int, default=BOT_METRICS_PORT, help="Port of the local /metrics endpoint (0 = off)")
+    parser.add_argument("--status", type=float, default=BOT_STATUS_INTERVAL_SECONDS, metavar="SECONDS", help="Print each instrument's order book at most every SECONDS (0 = never)")
+    args = parser.parse_args()
+
+    tickers = args.tickers or configured_tickers()
+    # Files and streams without a ticker column are read as the first instrument
+    feed = None
+    if args.replay:
+        feed = ReplayFeed(args.replay, tickers[0], args.speed)
+    elif args.socket:
+        host, port = args.socket.rsplit(":", 1)
+        feed = SocketFeed(host, int(port), tickers[0])
+    elif args.replay_bars:
+        feed = BarFileFeed(args.replay_bars, tickers)
+    asyncio.run(main(tickers, feed, args.state_dir, args.metrics_port, args.status))
@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Compact the journal into a snapshot after this many events
+JOURNAL_SNAPSHOT_EVENTS = int(os.getenv("BOT_JOURNAL_SNAPSHOT_EVENTS", 1000))
+# fsync each flush so a crash loses at most the tick in progress
+JOURNAL_FSYNC = os.getenv("BOT_JOURNAL_FSYNC", "true").lower() == "true"
+
+
+class StateJournal:
+    """
+    Append-only log of bot state-change events with periodic compacted snapshots.
+
+    Events are JSON lines numbered by `seq`. They are buffered with `record` and written
+    with one append per `flush`, so each tick writes only what changed. A snapshot stores
+    the full state and the last `seq` it includes; recovery loads the snapshot and replays
+    the journal events after it. The bot records prices, quantities and cash as integer
+    ticks, lots and cash units, which are stored as plain JSON numbers. Journals from
+    before that change hold Decimal strings, and BotInstance converts them on load.
+    """
+
+    def __init__(self, journal_path: str, snapshot_path: str, fsync: bool = JOURNAL_FSYNC):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.fsync = fsync
+        self.seq = 0
+        self.events_since_snapshot = 0
+        self.bytes_written = 0
+        self._pending: List[str] = []
+
+    def exists(self) -> bool:
+        return os.path.exists(self.snapshot_path) or os.path.exists(self.journal_path)
+
+    def record(self, event: dict):
+        """
+        Buffer an event until the next flush.
+        """
+        self.seq += 1
+        self._pending.append(json.dumps({"seq": self.seq, **event}, default=str))
+
+    def flush(self) -> int:
+        """
+        Append buffered events to the journal. Returns the number of bytes written.
+        """
+        if not self._pending:
+            return 0
+        data = ("\n".join(self._pending) + "\n").encode()
+        with open(self.journal_path, "ab") as f:
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self.events_since_snapshot += len(self._pending)
+        self.bytes_written += len(data)
+        self._pending.clear()
+        return len(data)
+
+    def needs_snapshot(self) -> bool:
+        return self.events_since_snapshot >= JOURNAL_SNAPSHOT_EVENTS
+
+    def write_snapshot(self, state: dict):
+        """
+        Atomically write `state` as of the latest event, then truncate the journal.
+        """
+        self.flush()
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"seq": self.seq, "state": state}, f, default=str)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # Events up to `seq` are in the snapshot; a crash before truncating only leaves
+        # events that load() skips
+        open(self.journal_path, "w").close()
+        self.events_since_snapshot = 0
+
+    def load(self) -> Tuple[Optional[dict], List[dict]]:
+        """
+        Return (snapshot state or None, events recorded after it), oldest first.
+        """
+        state, snapshot_seq = None, 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            state, snapshot_seq = snapshot["state"], snapshot["seq"]
+
+        events = []
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                data = f.read()
+            offset = 0
+            for line in data.splitlines(keepends=True):
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    if offset + len(line) < len(data):
+                        raise
+                    # Torn final write from a crash mid-flush; drop it so new events append cleanly
+                    logger.warning("Discarding incomplete last journal entry.")
+                    with open(self.journal_path, "r+b") as f:
+                        f.truncate(offset)
+                    break
+                offset += len(line)
+                if event["seq"] > snapshot_seq:
+                    events.append(event)
+
+        self.seq = events[-1]["seq"] if events else snapshot_seq
+        self.events_since_snapshot = len(events)
+        return state, events
@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Callable, Dict
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Port of the bot's local metrics endpoint; 0 disables it
+BOT_METRICS_PORT = int(os.getenv("BOT_METRICS_PORT", 9101))
+BOT_METRICS_HOST = os.getenv("BOT_METRICS_HOST", "127.0.0.1")
+TICK_RATE_WINDOW_SECONDS = 60
+
+
+class LatencyStat:
+    """
+    Count, last, average and max of one timed step.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "last_seconds": round(self.last, 6),
+            "avg_seconds": round(self.total / self.count, 6) if self.count else 0.0,
+            "max_seconds": round(self.max, 6),
+        }
+
+
+class TickerMetrics:
+    """
+    Loop timings for one instrument: strategy compute, state save, and the lag from
+    bar time to decision.
+
+    Yahoo stamps a 1-minute bar with its open, so live lag includes the time the bar
+    has been forming; for replays it is the age of the data.
+    """
+
+    def __init__(self):
+        self.ticks = 0
+        self.errors = 0
+        self.last_bar_timestamp = None
+        self.compute = LatencyStat()
+        self.state_save = LatencyStat()
+        self.bar_lag = LatencyStat()
+        self._recent = deque()  # monotonic times of ticks in the rate window
+
+    def tick_processed(self, bar_timestamp: int, compute_seconds: float, save_seconds: float):
+        now = time.monotonic()
+        self.ticks += 1
+        self.last_bar_timestamp = bar_timestamp
+        self.compute.observe(compute_seconds)
+        self.state_save.observe(save_seconds)
+        self.bar_lag.observe(max(0.0, time.time() - bar_timestamp))
+        self._recent.append(now)
+        self._trim(now)
+
+    def ticks_per_minute(self) -> int:
+        self._trim(time.monotonic())
+        return len(self._recent)
+
+    def _trim(self, now: float):
+        while self._recent and now - self._recent[0] > TICK_RATE_WINDOW_SECONDS:
+            self._recent.popleft()
+
+    def stats(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "ticks_per_minute": self.ticks_per_minute(),
+            "errors": self.errors,
+            "last_bar_timestamp": self.last_bar_timestamp,
+            "compute": self.compute.stats(),
+            "state_save": self.state_save.stats(),
+            "bar_lag": self.bar_lag.stats(),
+        }
+
+
+async def start_metrics_server(stats: Callable[[], Dict], host: str = BOT_METRICS_HOST, port: int = BOT_METRICS_PORT):
+    """
+    Serve `stats()` as JSON on GET /metrics. Returns the runner to clean up on exit, or
+    None when the port cannot be bound (the bot keeps trading without metrics).
+    """
+
+    async def metrics(request):
+        return web.json_response(stats(), dumps=lambda value: json.dumps(value, default=str))
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        logger.error(f"Metrics endpoint not started on {host}:{port}: {e}")
+        await runner.cleanup()
+        return None
+    logger.info(f"Serving bot metrics on http://{host}:{port}/metrics")
+    return runner
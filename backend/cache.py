@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTTLCache:
+    """
+    Process-wide async cache with per-entry TTL, LRU eviction and single-flight loading.
+
+    Concurrent `get` calls for the same key while a load is in progress share the
+    same in-flight fetch, so N callers cost one upstream request per TTL window.
+    Loader results of `None` are treated as failures and are not cached.
+    A `ttl_seconds` of None keeps entries until they are evicted.
+    """
+
+    def __init__(self, name: str, ttl_seconds: Optional[float], max_size: int = 1024):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """
+        Return a fresh cached value without loading it, or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries above `max_size`.
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = float("inf") if ttl is None else time.monotonic() + ttl
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Drop one key, or every entry when no key is given.
+        """
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for `key`, calling `loader` at most once per miss.
+        """
+        value = self.peek(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(in_flight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await loader()
+            if value is not None:
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def get_many(
+        self,
+        keys: list,
+        loader: Callable[[list], Awaitable[Dict[Hashable, Any]]],
+    ) -> Dict[Hashable, Any]:
+        """
+        Return values for all `keys`, loading every missing key with one `loader` call.
+
+        `loader` receives the list of keys that are neither cached nor already in flight
+        and must return a dict of the values it found. Keys missing from that dict
+        resolve to None.
+        """
+        results: Dict[Hashable, Any] = {}
+        waiting: Dict[Hashable, asyncio.Future] = {}
+        to_load = []
+
+        for key in dict.fromkeys(keys):
+            value = self.peek(key)
+            if value is not None:
+                self.hits += 1
+                results[key] = value
+            elif key in self._in_flight:
+                self.coalesced += 1
+                waiting[key] = self._in_flight[key]
+            else:
+                self.misses += 1
+                to_load.append(key)
+
+        if to_load:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in to_load}
+            self._in_flight.update(futures)
+            try:
+                loaded = await loader(to_load)
+                for key, future in futures.items():
+                    value = loaded.get(key)
+                    if value is not None:
+                        self.set(key, value)
+                    future.set_result(value)
+                    results[key] = value
+            except asyncio.CancelledError:
+                for future in futures.values():
+                    future.cancel()
+                raise
+            except Exception as e:
+                for future in futures.values():
+                    future.set_exception(e)
+                    future.exception()
+                raise
+            finally:
+                for key in to_load:
+                    self._in_flight.pop(key, None)
+
+        for key, future in waiting.items():
+            try:
+                results[key] = await asyncio.shield(future)
+            except (Exception, asyncio.CancelledError) as e:
+                logger.warning(f"[CACHE] {self.name}: shared load for {key} failed: {e!r}")
+                results[key] = None
+
+        return results
+
+    def stats(self) -> dict:
+        """
+        Return counters for the metrics endpoint.
+        """
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "in_flight": len(self._in_flight),
+        }
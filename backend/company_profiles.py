@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+import yfinance as yf
+from sqlalchemy.future import select
+
+from cache import AsyncTTLCache
+from database import async_session_maker
+from market_executor import run_market_io
+from models import CompanyProfile
+
+logger = logging.getLogger(__name__)
+
+# Profiles younger than this are fresh; older ones are served while a refresh runs
+COMPANY_PROFILE_FRESH_HOURS = float(os.getenv("COMPANY_PROFILE_FRESH_HOURS", 24))
+COMPANY_PROFILE_CACHE_SIZE = int(os.getenv("COMPANY_PROFILE_CACHE_SIZE", 512))
+# Tickers Yahoo does not know are not asked about again for this long
+COMPANY_PROFILE_UNKNOWN_TTL_SECONDS = float(os.getenv("COMPANY_PROFILE_UNKNOWN_TTL_SECONDS", 900))
+
+# In-memory LRU of (profile, fetched_at); freshness is judged by fetched_at, not by the cache TTL
+_profiles = AsyncTTLCache("company_profiles", ttl_seconds=None, max_size=COMPANY_PROFILE_CACHE_SIZE)
+_unknown = AsyncTTLCache("unknown_company_profiles", ttl_seconds=COMPANY_PROFILE_UNKNOWN_TTL_SECONDS, max_size=4096)
+_refreshing = {}  # ticker -> background refresh task in progress
+
+_counters = {
+    "memory_hits": 0,
+    "unknown_hits": 0,
+    "db_hits": 0,
+    "cold_misses": 0,
+    "stale_served": 0,
+    "refreshes": 0,
+    "refresh_failures": 0,
+    "db_load_seconds": 0.0,
+    "cold_fetch_seconds": 0.0,
+    "refresh_seconds": 0.0,
+}
+
+
+def _profile_from_info(ticker: str, info: dict) -> Optional[dict]:
+    """
+    Keep the slow-changing fields of a yfinance info dict. Returns None for unknown tickers.
+    """
+    if not info or not (info.get("longName") or info.get("shortName")):
+        return None
+    return {
+        "name": info.get("longName", "Unknown"),
+        "ticker": info.get("symbol", ticker),
+        "industry": info.get("industry", "N/A"),
+        "sector": info.get("sector"),
+        "description": info.get("longBusinessSummary", "N/A"),
+        "currentPrice": info.get("currentPrice", 0.0),
+        "marketCap": info.get("marketCap", 0),
+        "peRatio": info.get("trailingPE", "N/A"),
+        "fiftyTwoWeekHigh": info.get("fiftyTwoWeekHigh", 0.0),
+        "fiftyTwoWeekLow": info.get("fiftyTwoWeekLow", 0.0),
+        "dividendYield": info.get("dividendYield", 0.0),
+        "priceToBook": info.get("priceToBook", "N/A"),
+    }
+
+
+async def fetch_profile_upstream(ticker: str) -> Optional[Tuple[dict, datetime]]:
+    """
+    Fetch a profile from Yahoo Finance and persist it to the company_profiles table.
+    """
+    info = await run_market_io(lambda: yf.Ticker(ticker).info)
+    profile = _profile_from_info(ticker, info)
+    if profile is None:
+        return None
+
+    fetched_at = datetime.utcnow()
+    async with async_session_maker() as session:
+        await session.merge(CompanyProfile(symbol=ticker, data=profile, fetched_at=fetched_at))
+        await session.commit()
+    return profile, fetched_at
+
+
+async def _load_profile(ticker: str) -> Optional[Tuple[dict, datetime]]:
+    """
+    Cold path for the in-memory cache: read the database, falling back to Yahoo Finance.
+    """
+    started = time.monotonic()
+    async with async_session_maker() as session:
+        row = (
+            await session.execute(select(CompanyProfile).where(CompanyProfile.symbol == ticker))
+        ).scalar_one_or_none()
+    _counters["db_load_seconds"] += time.monotonic() - started
+
+    if row is not None:
+        _counters["db_hits"] += 1
+        return row.data, row.fetched_at
+
+    _counters["cold_misses"] += 1
+    started = time.monotonic()
+    try:
+        return await fetch_profile_upstream(ticker)
+    finally:
+        _counters["cold_fetch_seconds"] += time.monotonic() - started
+
+
+async def _refresh(ticker: str):
+    started = time.monotonic()
+    try:
+        entry = await fetch_profile_upstream(ticker)
+        if entry is not None:
+            _profiles.set(ticker, entry)
+        _counters["refreshes"] += 1
+    except Exception as e:
+        _counters["refresh_failures"] += 1
+        logger.warning(f"[PROFILE] Background refresh for {ticker} failed: {e}")
+    finally:
+        _counters["refresh_seconds"] += time.monotonic() - started
+        _refreshing.pop(ticker, None)
+
+
+def _schedule_refresh(ticker: str):
+    if ticker not in _refreshing:
+        _refreshing[ticker] = asyncio.create_task(_refresh(ticker))
+
+
+async def get_company_profile(ticker: str) -> Optional[dict]:
+    """
+    Return the cached company profile for `ticker`.
+
+    Fresh and stale entries are returned immediately; stale ones also trigger a single
+    background refresh. Only tickers never seen before wait on Yahoo Finance; tickers it
+    reported as unknown return None without asking again until the negative entry expires.
+    """
+    entry = _profiles.peek(ticker)
+    if entry is not None:
+        _counters["memory_hits"] += 1
+    elif _unknown.peek(ticker) is not None:
+        _counters["unknown_hits"] += 1
+        return None
+    else:
+        entry = await _profiles.get(ticker, lambda: _load_profile(ticker))
+        if entry is None:
+            _unknown.set(ticker, True)
+            return None
+
+    profile, fetched_at = entry
+    if datetime.utcnow() - fetched_at > timedelta(hours=COMPANY_PROFILE_FRESH_HOURS):
+        _counters["stale_served"] += 1
+        _schedule_refresh(ticker)
+    return profile
+
+
+def stats() -> dict:
+    """
+    Return hit/miss/refresh counters and average latencies for the metrics endpoint.
+    """
+    loads = _counters["db_hits"] + _counters["cold_misses"]
+    refreshes = _counters["refreshes"] + _counters["refresh_failures"]
+    return {
+        "memory": _profiles.stats(),
+        "memory_hits": _counters["memory_hits"],
+        "unknown": _unknown.stats(),
+        "unknown_hits": _counters["unknown_hits"],
+        "db_hits": _counters["db_hits"],
+        "cold_misses": _counters["cold_misses"],
+        "stale_served": _counters["stale_served"],
+        "refreshes": _counters["refreshes"],
+        "refresh_failures": _counters["refresh_failures"],
+        "refreshing": len(_refreshing),
+        "avg_db_load_seconds": round(_counters["db_load_seconds"] / loads, 4) if loads else 0.0,
+        "avg_cold_fetch_seconds": round(_counters["cold_fetch_seconds"] / _counters["cold_misses"], 4) if _counters["cold_misses"] else 0.0,
+        "avg_refresh_seconds": round(_counters["refresh_seconds"] / refreshes, 4) if refreshes else 0.0,
+    }
@@ -1,5 +1,6 @@
 import os
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from databases import Database
@@ -36,3 +37,9 @@ async def disconnect_db():
 async def get_db():
     async with async_session_maker() as session:
         yield session
+
+# INSERT construct supporting ON CONFLICT clauses for the configured database
+def upsert_insert(table):
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
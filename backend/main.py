@@ -5,8 +5,11 @@ from portfolio import router as portfolio_router
 from market import router as market_router
 from transactions import router as transactions_router
 from performance import router as performance_router
+from market import quote_cache
+from market_executor import market_executor
+import company_profiles
 from scheduler import start_scheduler
-from trades import router as trades_router
+from trades import router as trades_router, trade_count_cache
 from models import Base  # Import Base for metadata
 from fastapi.middleware.cors import CORSMiddleware
 import os
@@ -117,6 +120,16 @@ async def health_check():
     except Exception as e:
         return {"status": "error", "details": str(e)}
 
+# Cache and worker metrics endpoint
+@app.get("/metrics", tags=["health"])
+async def metrics():
+    return {
+        "quote_cache": quote_cache.stats(),
+        "market_executor": market_executor.stats(),
+        "company_profiles": company_profiles.stats(),
+        "trade_count_cache": trade_count_cache.stats(),
+    }
+
 # Include routers from each module
 app.include_router(users_router, prefix="/api/users", tags=["users"])
 app.include_router(portfolio_router, prefix="/api/portfolio", tags=["portfolio"])
@@ -1,15 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from sqlalchemy import select, update, distinct
+from typing import Dict, List, Optional
+from sqlalchemy import select, distinct
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, timedelta
 import yfinance as yf
 import pandas as pd
 import logging
-from yfinance import Ticker
-from database import async_session_maker, database, get_db
-from models import StockPrice, UserStock, Stock, FearGreedEntry, FearGreedHistoryResponse, FearGreedIndex
+import os
+from database import async_session_maker, get_db
+from models import StockPrice, UserStock, FearGreedEntry, FearGreedHistoryResponse, FearGreedIndex
 from schemas import MarketDataResponse, ApiResponse, StockPriceData
+from cache import AsyncTTLCache
+from company_profiles import get_company_profile
+from market_executor import run_market_io
+from price_store import get_price_history, range_start
 
 
 # Configure logging
@@ -26,11 +30,12 @@ async def get_company_info(query: str):
     """
     ticker = query.upper()
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        profile = await get_company_profile(ticker)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="No company information available for the ticker.")
 
-        # Fetch the last 7 days of daily historical data
-        historical_data = stock.history(period="5d")
+        # Fetch the last 5 days of daily historical data
+        historical_data = await run_market_io(_load_history, ticker, period="5d")
         if historical_data.empty:
             raise HTTPException(status_code=404, detail="No historical data available for the ticker.")
 
@@ -39,17 +44,18 @@ async def get_company_info(query: str):
         prices = historical_data['Close'].tolist()
 
         company_info = {
-            "name": info.get("longName", "Unknown"),
-            "ticker": info.get("symbol", ticker),
-            "industry": info.get("industry", "N/A"),
-            "description": info.get("longBusinessSummary", "N/A"),
-            "currentPrice": info.get("currentPrice", 0.0),
-            "marketCap": info.get("marketCap", 0),
-            "peRatio": info.get("trailingPE", "N/A"),
-            "fiftyTwoWeekHigh": info.get("fiftyTwoWeekHigh", 0.0),
-            "fiftyTwoWeekLow": info.get("fiftyTwoWeekLow", 0.0),
-            "dividendYield": info.get("dividendYield", 0.0),
-            "priceToBook": info.get("priceToBook", "N/A"),
+            "name": profile["name"],
+            "ticker": profile["ticker"],
+            "industry": profile["industry"],
+            "description": profile["description"],
+            # The profile may be up to a day old, so take the price from the fresh history
+            "currentPrice": prices[-1],
+            "marketCap": profile["marketCap"],
+            "peRatio": profile["peRatio"],
+            "fiftyTwoWeekHigh": profile["fiftyTwoWeekHigh"],
+            "fiftyTwoWeekLow": profile["fiftyTwoWeekLow"],
+            "dividendYield": profile["dividendYield"],
+            "priceToBook": profile["priceToBook"],
             "historicalPrices": {
                 "dates": dates,
                 "prices": prices,
@@ -68,8 +74,7 @@ async def get_market_data(ticker: str):
     Fetch market data for a specific ticker.
     """
     try:
-        stock = yf.Ticker(ticker)
-        data = stock.history(period="1d")
+        data = await run_market_io(_load_history, ticker, period="1d")
 
         if data.empty:
             raise HTTPException(status_code=404, detail=f"No data available for ticker '{ticker}'")
@@ -92,13 +97,25 @@ async def get_market_data(ticker: str):
         raise HTTPException(status_code=500, detail="Failed to fetch market data.")
 
 
-async def get_current_price(ticker: str) -> float:
+def _load_history(ticker: str, **kwargs):
     """
-    Fetch the current price of a stock using yfinance.
+    Blocking helper: fetch daily history for a single ticker.
+    """
+    return yf.Ticker(ticker).history(**kwargs)
+
+
+# Process-wide quote cache shared by every request path that needs a live price
+QUOTE_CACHE_TTL_SECONDS = float(os.getenv("QUOTE_CACHE_TTL_SECONDS", 60))
+QUOTE_CACHE_MAX_SIZE = int(os.getenv("QUOTE_CACHE_MAX_SIZE", 2048))
+quote_cache = AsyncTTLCache("quotes", ttl_seconds=QUOTE_CACHE_TTL_SECONDS, max_size=QUOTE_CACHE_MAX_SIZE)
+
+
+async def _fetch_current_price(ticker: str) -> float:
+    """
+    Fetch the latest close for a ticker directly from yfinance, bypassing the cache.
     """
     try:
-        stock = yf.Ticker(ticker)
-        history = stock.history(period="1d")
+        history = await run_market_io(_load_history, ticker, period="1d")
 
         if history.empty:
             raise ValueError(f"No price data available for ticker {ticker}")
@@ -112,6 +129,61 @@ async def get_current_price(ticker: str) -> float:
         return None
 
 
+async def get_current_price(ticker: str) -> float:
+    """
+    Fetch the current price of a stock using yfinance.
+    Prices are served from the shared quote cache for QUOTE_CACHE_TTL_SECONDS.
+    """
+    return await quote_cache.get(ticker, lambda: _fetch_current_price(ticker))
+
+
+async def _fetch_current_prices(tickers: List[str]) -> Dict[str, float]:
+    """
+    Fetch the latest close for several tickers with a single multi-ticker download.
+    """
+    try:
+        data = await run_market_io(
+            yf.download,
+            tickers,
+            period="5d",  # A few sessions back so every symbol has a last valid close
+            group_by="ticker",
+            progress=False,
+            threads=True,
+        )
+        if data.empty:
+            raise ValueError(f"No price data available for tickers {tickers}")
+
+        prices = {}
+        for ticker in tickers:
+            try:
+                closes = data[ticker]["Close"] if isinstance(data.columns, pd.MultiIndex) else data["Close"]
+                closes = closes.dropna()
+                if closes.empty:
+                    logging.warning(f"[PRICE FETCH ERROR] No price data available for ticker {ticker}")
+                    continue
+                prices[ticker] = round(float(closes.iloc[-1]), 2)
+            except KeyError:
+                logging.warning(f"[PRICE FETCH ERROR] Ticker {ticker} missing from batch download")
+
+        logging.info(f"[PRICE FETCH] Batch fetched {len(prices)}/{len(tickers)} prices")
+        return prices
+
+    except Exception as e:
+        logging.error(f"[PRICE FETCH ERROR] Failed to fetch prices for {tickers}: {e}")
+        return {}
+
+
+async def get_current_prices(tickers: List[str]) -> Dict[str, Optional[float]]:
+    """
+    Fetch current prices for many tickers at once.
+    Cached tickers are served from the quote cache; the rest are fetched in one round-trip.
+    Tickers without a price map to None.
+    """
+    if not tickers:
+        return {}
+    return await quote_cache.get_many(list(tickers), _fetch_current_prices)
+
+
 @router.get("/fear-greed/history", response_model=FearGreedHistoryResponse)
 async def get_fear_greed_index_history(session: AsyncSession = Depends(get_db)):
     """
@@ -186,50 +258,22 @@ async def update_stock_prices():
         except Exception as e:
             logging.error(f"[ERROR] Error in update_stock_prices: {e}")
 
-async def fetch_stock_sector(ticker: str) -> str:
-    """
-    Fetch the sector of a stock by its ticker symbol.
-    """
-    try:
-        # Check database for existing sector data
-        query = select(Stock.sector).where(Stock.symbol == ticker)
-        sector_record = await database.fetch_one(query)
-
-        if sector_record and sector_record["sector"]:
-            return sector_record["sector"]
-
-        # Fetch sector data from Yahoo Finance
-        stock = Ticker(ticker)
-        sector = stock.info.get("sector", None)
-
-        if sector:
-            # Update the database with the fetched sector
-            update_query = (
-                update(Stock)
-                .where(Stock.symbol == ticker)
-                .values(sector=sector)
-            )
-            await database.execute(update_query)
-            logging.info(f"[SECTOR FETCH] Updated sector for {ticker}: {sector}")
-            return sector
-        else:
-            logging.warning(f"[SECTOR FETCH ERROR] Sector data not found for {ticker}")
-            return "Unknown"
-
-    except Exception as e:
-        logging.error(f"[ERROR] Error fetching sector for {ticker}: {e}")
-        return "Unknown"
-    
-
-
 @router.get("/historical/{ticker}", response_model=ApiResponse)
-async def get_historical_prices(ticker: str, range: str = "1mo"):
+async def get_historical_prices(ticker: str, range: str = "1mo", session: AsyncSession = Depends(get_db)):
     """
     Fetch historical price data for a specific ticker and range.
+    Fixed ranges are served from the stock_prices table, fetching only missing days upstream.
     """
     try:
-        stock = yf.Ticker(ticker)
-        historical_data = stock.history(period=range)
+        start = range_start(range)
+        if start is not None:
+            history = await get_price_history(session, ticker.upper(), start)
+            if not history:
+                raise HTTPException(status_code=404, detail=f"No historical data available for ticker '{ticker}'")
+            return ApiResponse(success=True, data=[StockPriceData(**bar) for bar in history], error=None)
+
+        # Open-ended ranges such as "max" go straight to Yahoo Finance
+        historical_data = await run_market_io(_load_history, ticker, period=range)
 
         if historical_data.empty:
             raise HTTPException(status_code=404, detail=f"No historical data available for ticker '{ticker}'")
@@ -248,6 +292,8 @@ async def get_historical_prices(ticker: str, range: str = "1mo"):
 
         return ApiResponse(success=True, data=stock_prices, error=None)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"[ERROR] Failed to fetch historical prices for '{ticker}': {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch historical prices.")
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Size of the market-data thread pool and default per-call timeout
+MARKET_DATA_WORKERS = int(os.getenv("MARKET_DATA_WORKERS", 8))
+MARKET_DATA_TIMEOUT_SECONDS = float(os.getenv("MARKET_DATA_TIMEOUT_SECONDS", 20))
+
+
+class MarketDataExecutor:
+    """
+    Bounded thread pool for blocking market-data I/O (yfinance, scraping).
+
+    Keeps blocking calls off the event loop and records queue depth, wait time and
+    timeouts so that pool saturation is visible on the metrics endpoint.
+    """
+
+    def __init__(self, max_workers: int, timeout_seconds: float):
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-data")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` on the pool and await its result.
+        Raises asyncio.TimeoutError when the call takes longer than `timeout` seconds.
+        """
+        submitted_at = time.monotonic()
+        with self._lock:
+            self.queued += 1
+            self.submitted += 1
+
+        def _call():
+            started_at = time.monotonic()
+            wait = started_at - submitted_at
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.total_wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self.total_run_seconds += time.monotonic() - started_at
+
+        future = self._pool.submit(_call)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future),
+                timeout=self.timeout_seconds if timeout is None else timeout,
+            )
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            logger.warning(f"[MARKET DATA] {getattr(fn, '__name__', fn)} timed out after {time.monotonic() - submitted_at:.1f}s")
+            raise
+        finally:
+            # On a timeout or a cancelled caller, a call no worker has picked up yet is
+            # dropped here and never decrements the queue itself
+            if future.cancel():
+                with self._lock:
+                    self.queued -= 1
+
+    def stats(self) -> dict:
+        """
+        Return counters for the metrics endpoint.
+        """
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "max_workers": self.max_workers,
+                "timeout_seconds": self.timeout_seconds,
+                "queued": self.queued,
+                "active": self.active,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "avg_wait_seconds": round(self.total_wait_seconds / started, 4) if started else 0.0,
+                "max_wait_seconds": round(self.max_wait_seconds, 4),
+                "avg_run_seconds": round(self.total_run_seconds / self.completed, 4) if self.completed else 0.0,
+            }
+
+
+# Shared executor for all market-data calls in this process
+market_executor = MarketDataExecutor(MARKET_DATA_WORKERS, MARKET_DATA_TIMEOUT_SECONDS)
+
+
+async def run_market_io(fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """
+    Run a blocking market-data call on the shared executor.
+    """
+    return await market_executor.run(fn, *args, timeout=timeout, **kwargs)
@@ -8,6 +8,7 @@ from sqlalchemy import (
     Enum,
     Index,
     Date,
+    JSON,
     UniqueConstraint
 )
 from sqlalchemy.orm import relationship
@@ -15,6 +16,7 @@ from sqlalchemy.sql import func
 from database import Base  # Assuming Base = declarative_base()
 from pydantic import BaseModel
 from typing import List
+from datetime import datetime
 
 # Enum for transaction types
 transaction_type_enum = Enum("buy", "sell", name="transaction_type")
@@ -27,6 +29,8 @@ class Stock(Base):
     name = Column(String)
     price = Column(Float)
     sector = Column(String, nullable=True)
+    # Last upstream lookup by the sync_stocks enrichment, successful or not
+    enriched_at = Column(DateTime, nullable=True)
 
     # Relationships
     stock_prices = relationship('StockPrice', back_populates='stock', cascade='all, delete-orphan')
@@ -101,6 +105,7 @@ class StockPrice(Base):
     stock = relationship('Stock', back_populates='stock_prices')
 
     __table_args__ = (
+        UniqueConstraint('stock_id', 'date', name='uq_stock_price_stock_date'),
         Index('ix_stock_price_stock_date', 'stock_id', 'date'),
     )
 
@@ -142,7 +147,9 @@ class Trade(Base):
     __tablename__ = 'trades'
 
     id = Column(Integer, primary_key=True)
-    timestamp = Column(DateTime, nullable=False, server_default=func.now())
+    # Written by the application so every row has the same text form on SQLite; the keyset
+    # cursor in trades.py compares timestamps, and the server default drops the microseconds
+    timestamp = Column(DateTime, nullable=False, default=datetime.now, server_default=func.now())
     action = Column(String, nullable=False)
     ticker = Column(String, nullable=False)
     price = Column(Float, nullable=False)
@@ -154,3 +161,99 @@ class Trade(Base):
         Index('ix_trades_ticker', 'ticker'),
         Index('ix_trades_timestamp', 'timestamp'),
     )
+
+
+class CompanyProfile(Base):
+    __tablename__ = 'company_profiles'
+
+    symbol = Column(String, primary_key=True)
+    data = Column(JSON, nullable=False)  # Slow-changing fields from yfinance `info`
+    fetched_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+class BenchmarkPrice(Base):
+    __tablename__ = 'benchmark_prices'
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String, nullable=False)
+    date = Column(Date, nullable=False)
+    close = Column(Float, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('symbol', 'date', name='uq_benchmark_price_symbol_date'),
+    )
+
+
+class BenchmarkSectorWeight(Base):
+    __tablename__ = 'benchmark_sector_weights'
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String, nullable=False)
+    sector = Column(String, nullable=False)
+    weight = Column(Float, nullable=False)
+    as_of = Column(Date, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('symbol', 'sector', name='uq_benchmark_sector_weight_symbol_sector'),
+    )
+
+
+class TradeStats(Base):
+    __tablename__ = 'trade_stats'
+
+    # Single row (id=1) of running totals, updated in the same transaction as each trade insert
+    id = Column(Integer, primary_key=True)
+    total_trades = Column(Integer, nullable=False, default=0)
+    total_realized_profit = Column(Float, nullable=False, default=0.0)  # Sum of positive profit_loss
+    max_budget = Column(Float, nullable=True)
+    min_budget = Column(Float, nullable=True)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+class TradeStatsHourly(Base):
+    __tablename__ = 'trade_stats_hourly'
+
+    # Per-hour profit/loss buckets backing the rolling 24h window; old buckets are pruned
+    hour = Column(DateTime, primary_key=True)
+    trade_count = Column(Integer, nullable=False, default=0)
+    profit_loss = Column(Float, nullable=False, default=0.0)
+
+
+class TradeDailyPnl(Base):
+    __tablename__ = 'trade_daily_pnl'
+
+    # Daily rollup of trades.profit_loss for the trades chart, maintained alongside trade_stats
+    day = Column(Date, primary_key=True)
+    trade_count = Column(Integer, nullable=False, default=0)
+    profit_loss = Column(Float, nullable=False, default=0.0)
+
+
+class SweepResult(Base):
+    __tablename__ = 'sweep_results'
+
+    # One backtest of a grid strategy parameter set; a sweep resumes by skipping rows it already has
+    id = Column(Integer, primary_key=True)
+    sweep = Column(String, nullable=False)
+    bars_key = Column(String, nullable=False)  # Fingerprint of the bars the sweep ran over
+    price_increment = Column(Float, nullable=False)
+    ladder_depth = Column(Integer, nullable=False)
+    order_quantity = Column(Float, nullable=False)
+    reentry_offset = Column(Float, nullable=False)
+    bars = Column(Integer, nullable=False)
+    buy_fills = Column(Integer, nullable=False)
+    sell_fills = Column(Integer, nullable=False)
+    realized_pnl = Column(Float, nullable=False)
+    unrealized_pnl = Column(Float, nullable=False)
+    total_pnl = Column(Float, nullable=False)
+    max_drawdown = Column(Float, nullable=False)
+    max_drawdown_pct = Column(Float, nullable=False)
+    max_capital_used = Column(Float, nullable=False)
+    seconds = Column(Float, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint(
+            'sweep', 'bars_key', 'price_increment', 'ladder_depth', 'order_quantity', 'reentry_offset',
+            name='uq_sweep_result_params',
+        ),
+    )
@@ -0,0 +1,144 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterator, List, Tuple
+
+
+class _Side:
+    """
+    One side of the book: a sorted list of price levels plus a map from price
+    to the FIFO list of orders resting at that level.
+    """
+
+    def __init__(self):
+        self.prices: List = []  # ascending
+        self.levels: Dict = {}  # price -> [order, ...]
+        self.count = 0
+
+    def add(self, price, order):
+        level = self.levels.get(price)
+        if level is None:
+            self.levels[price] = [order]
+            insort(self.prices, price)
+        else:
+            level.append(order)
+        self.count += 1
+
+    def remove(self, price, order) -> bool:
+        level = self.levels.get(price)
+        if not level or order not in level:
+            return False
+        level.remove(order)
+        self.count -= 1
+        if not level:
+            self._drop_level(price)
+        return True
+
+    def cancel(self, price) -> list:
+        level = self.levels.get(price)
+        if level is None:
+            return []
+        self._drop_level(price)
+        self.count -= len(level)
+        return level
+
+    def _drop_level(self, price):
+        del self.levels[price]
+        del self.prices[bisect_left(self.prices, price)]
+
+
+class OrderBook:
+    """
+    Resting limit orders for the grid bot, indexed by price.
+
+    Buys are (price, quantity); sells are (price, quantity, position_id) so each sell
+    stays linked to the position it closes. Price levels are kept sorted with bisect,
+    so best prices, membership checks and range lookups for fills do not scan the book.
+    """
+
+    def __init__(self):
+        self._buys = _Side()
+        self._sells = _Side()
+
+    # ----- Mutations -----
+
+    def add_buy(self, price, quantity):
+        self._buys.add(price, quantity)
+
+    def add_sell(self, price, quantity, position_id):
+        self._sells.add(price, (quantity, position_id))
+
+    def remove_buy(self, price, quantity) -> bool:
+        return self._buys.remove(price, quantity)
+
+    def remove_sell(self, price, quantity, position_id) -> bool:
+        return self._sells.remove(price, (quantity, position_id))
+
+    def cancel_buys_at(self, price) -> List[Tuple]:
+        """
+        Remove every buy resting at `price` and return them as (price, quantity).
+        """
+        return [(price, quantity) for quantity in self._buys.cancel(price)]
+
+    # ----- Lookups -----
+
+    def has_buy(self, price) -> bool:
+        return price in self._buys.levels
+
+    def has_sell(self, price) -> bool:
+        return price in self._sells.levels
+
+    def best_bid(self):
+        """Highest buy price, or None."""
+        return self._buys.prices[-1] if self._buys.prices else None
+
+    def best_ask(self):
+        """Lowest sell price, or None."""
+        return self._sells.prices[0] if self._sells.prices else None
+
+    def has_sell_near(self, price, distance) -> bool:
+        """
+        True when any sell lies strictly within `distance` of `price`.
+        """
+        prices = self._sells.prices
+        index = bisect_right(prices, price - distance)
+        return index < len(prices) and prices[index] < price + distance
+
+    def buys_at_or_above(self, price) -> List[Tuple]:
+        """
+        Buys a market trade at `price` would fill, highest price first, as (price, quantity).
+        """
+        start = bisect_left(self._buys.prices, price)
+        return [
+            (level, quantity)
+            for level in reversed(self._buys.prices[start:])
+            for quantity in self._buys.levels[level]
+        ]
+
+    def sells_at_or_below(self, price) -> List[Tuple]:
+        """
+        Sells a market trade at `price` would fill, lowest price first, as (price, quantity, position_id).
+        """
+        end = bisect_right(self._sells.prices, price)
+        return [
+            (level, quantity, position_id)
+            for level in self._sells.prices[:end]
+            for quantity, position_id in self._sells.levels[level]
+        ]
+
+    def buy_orders(self) -> List[Tuple]:
+        """All buys as (price, quantity), highest price first."""
+        return self.buys_at_or_above(self._buys.prices[0]) if self._buys.prices else []
+
+    def sell_orders(self) -> List[Tuple]:
+        """All sells as (price, quantity, position_id), lowest price first."""
+        return self.sells_at_or_below(self._sells.prices[-1]) if self._sells.prices else []
+
+    def buy_prices(self) -> Iterator:
+        return iter(self._buys.prices)
+
+    @property
+    def buy_count(self) -> int:
+        return self._buys.count
+
+    @property
+    def sell_count(self) -> int:
+        return self._sells.count
@@ -1,10 +1,9 @@
-from fastapi import APIRouter, HTTPException, Body
-from typing import List
+from fastapi import APIRouter, HTTPException, Body, Query
+from typing import List, Optional
 from pydantic import BaseModel, Field
-import asyncio
-from market import get_current_price
-from yfinance import Ticker
-from datetime import datetime, timedelta
+from market import get_current_prices
+from benchmark import get_benchmark
+from datetime import date, timedelta
 
 router = APIRouter()
 
@@ -53,21 +52,15 @@ async def calculate_portfolio_performance(
     total_current_value = 0.0
     details = []
 
-    # Fetch current prices concurrently for all stocks in the portfolio
-    async def fetch_price(stock):
-        try:
-            current_price = await get_current_price(stock.ticker)
-            if current_price is None:
-                raise ValueError(f"Price not available for {stock.ticker}")
-            return stock.ticker, current_price
-        except Exception as e:
-            print(f"[ERROR] Failed to fetch current price for {stock.ticker}: {e}")
+    # Fetch current prices for all stocks in the portfolio in one batch
+    current_prices = await get_current_prices([stock.ticker for stock in portfolio])
+    prices = []
+    for stock in portfolio:
+        current_price = current_prices.get(stock.ticker)
+        if current_price is None:
+            print(f"[ERROR] Failed to fetch current price for {stock.ticker}: Price not available")
             raise HTTPException(status_code=500, detail=f"Failed to fetch price for {stock.ticker}")
-
-    try:
-        prices = await asyncio.gather(*[fetch_price(stock) for stock in portfolio])
-    except HTTPException as e:
-        raise e  # Re-raise to handle HTTP error responses
+        prices.append((stock.ticker, current_price))
 
     # Calculate total values and individual ROIs
     for stock, (ticker, current_price) in zip(portfolio, prices):
@@ -98,36 +91,56 @@ async def calculate_portfolio_performance(
     }
 
 
-async def fetch_sp500_performance() -> dict:
+async def fetch_sp500_performance(window_days: int = 30) -> dict:
     """
     Fetch S&P 500 performance data and sector weights.
+    Served from the daily-refreshed benchmark snapshot held in memory.
 
     Returns:
         dict: A dictionary containing S&P 500 total return and sector weights.
     """
     try:
-        sp500 = Ticker("^GSPC")
-        today = datetime.now()
-        thirty_days_ago = today - timedelta(days=30)
-        historical_data = sp500.history(start=thirty_days_ago.strftime("%Y-%m-%d"), end=today.strftime("%Y-%m-%d"))
-
-        if not historical_data.empty:
-            start_price = historical_data["Close"].iloc[0]
-            end_price = historical_data["Close"].iloc[-1]
-            total_return = ((end_price - start_price) / start_price) * 100
-        else:
+        snapshot = await get_benchmark()
+        total_return = snapshot.window_return(date.today() - timedelta(days=window_days))
+        if total_return is None:
             raise ValueError("No historical data available for S&P 500.")
 
-        sector_weights = sp500.info.get("sectorWeightings", None)
         return {
             "return": total_return,
-            "sector_weights": sector_weights if sector_weights else {}
+            "sector_weights": snapshot.sector_weights
         }
     except Exception as e:
         print(f"[ERROR] Failed to fetch S&P 500 performance: {e}")
         return {"return": 0.0, "sector_weights": {}}
 
 
+@router.get("/benchmark")
+async def get_benchmark_return(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    days: int = Query(30, gt=0),
+):
+    """
+    Return the S&P 500 return over any window.
+    Uses `start`/`end` when given, otherwise the last `days` calendar days.
+    """
+    start = start or date.today() - timedelta(days=days)
+    if end and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start.")
+
+    snapshot = await get_benchmark()
+    total_return = snapshot.window_return(start, end)
+    if total_return is None:
+        raise HTTPException(status_code=404, detail="No S&P 500 data available for this window.")
+
+    return {
+        "symbol": snapshot.symbol,
+        "start": start,
+        "end": end or snapshot.last_date,
+        "return": total_return,
+    }
+
+
 def generate_diversification_suggestions(
     portfolio_sectors: dict, sp500_sector_weights: dict
 ) -> list:
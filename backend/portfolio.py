@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+from datetime import date, timedelta
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 from database import get_db
-from models import User, UserStock, PortfolioPerformance
+from models import User, UserStock, Stock, PortfolioPerformance
 from schemas import (
     PortfolioEntry,
     PortfolioResponse,
@@ -14,9 +16,12 @@ from schemas import (
     SP500Comparison,
     PortfolioTrendResponse,
     PortfolioTrendEntry,
+    PortfolioBackfillRequest,
 )
-from market import get_current_price, fetch_stock_sector
+from market import get_current_prices
 from performance import fetch_sp500_performance, generate_diversification_suggestions
+from analysis import analyze_holdings
+from tasks.backfill import backfill_portfolio_performance
 
 router = APIRouter()
 
@@ -104,13 +109,16 @@ async def get_user_portfolio(user_id: int, session: AsyncSession = Depends(get_d
     portfolio = []
     total_portfolio_value = 0.0
 
+    # Price every holding in a single batched round-trip
+    current_prices = await get_current_prices([record.ticker for record in portfolio_records])
+
     for record in portfolio_records:
         ticker = record.ticker
         quantity = record.quantity
         purchase_price = record.purchase_price
         total_cost = record.total_cost
 
-        current_price = await get_current_price(ticker)
+        current_price = current_prices.get(ticker)
         current_value = current_price * quantity if current_price else 0.0
 
         portfolio.append(
@@ -140,81 +148,63 @@ async def get_user_portfolio(user_id: int, session: AsyncSession = Depends(get_d
 async def analyze_portfolio(user_id: int, session: AsyncSession = Depends(get_db)):
     """
     Analyze the user's portfolio to provide insights.
-    - Retrieves the user's portfolio data.
-    - Calculates portfolio weights and sector distribution.
+    - Loads the user's holdings and their sectors in one query.
+    - Prices all holdings in one batch and computes weights, sector distribution
+      and return together.
     - Compares the portfolio's performance against the S&P 500.
     - Generates diversification suggestions.
     """
-    # Retrieve the user from the database
-    user = await session.get(User, user_id)
-    if not user:
-        # Raise an error if the user is not found
-        raise HTTPException(status_code=404, detail="User not found")
-
-    # Fetch the user's portfolio records
-    portfolio_records = (
+    # Fetch the user's holdings together with each stock's sector
+    holdings = (
         await session.execute(
-            select(UserStock).where(UserStock.user_id == user_id)
+            select(UserStock.ticker, UserStock.quantity, UserStock.purchase_price, Stock.sector)
+            .outerjoin(Stock, Stock.symbol == UserStock.ticker)
+            .where(UserStock.user_id == user_id)
         )
-    ).scalars().all()
+    ).all()
 
-    if not portfolio_records:
-        # Raise an error if the portfolio is empty
+    if not holdings:
+        # Distinguish an unknown user from an empty portfolio
+        user = await session.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
         raise HTTPException(status_code=404, detail="Portfolio is empty")
 
-    # Initialize variables for portfolio analysis
-    total_value = 0.0
-    weights = []  # List of portfolio weights by ticker
-    sectors = {}  # Dictionary to calculate sector distribution
-
-    # Loop through each portfolio record to calculate current values and weights
-    for record in portfolio_records:
-        ticker = record.ticker  # Stock ticker
-        quantity = record.quantity  # Quantity of stocks held
-
-        # Fetch the current price of the stock
-        current_price = await get_current_price(ticker)
-        # Calculate the current value of the stock in the portfolio
-        current_value = current_price * quantity if current_price else 0.0
-        total_value += current_value  # Update the total portfolio value
+    tickers = [row.ticker for row in holdings]
 
-        # Append the weight of the stock in the portfolio
-        weights.append(
-            PortfolioWeight(
-                ticker=ticker,
-                weight=(current_value / total_value) * 100 if total_value else 0
-            )
-        )
+    # Price every holding and fetch S&P 500 performance concurrently
+    current_prices, sp500_performance = await asyncio.gather(
+        get_current_prices(tickers),
+        fetch_sp500_performance(),
+    )
 
-        # Fetch the stock's sector and update the sector distribution
-        sector = await fetch_stock_sector(ticker)
-        if sector:
-            # Add the current value of the stock to its sector
-            sectors[sector] = sectors.get(sector, 0) + current_value
+    analysis = analyze_holdings(
+        tickers=tickers,
+        quantities=[row.quantity for row in holdings],
+        purchase_prices=[row.purchase_price for row in holdings],
+        sectors=[row.sector for row in holdings],
+        current_prices=current_prices,
+    )
 
-    # Calculate the sector distribution as percentages
+    weights = [
+        PortfolioWeight(ticker=ticker, weight=weight)
+        for ticker, weight in analysis["weights"].items()
+    ]
     sector_distribution = [
-        SectorDistribution(
-            sector=sector,
-            percentage=(value / total_value) * 100 if total_value else 0
-        )
-        for sector, value in sectors.items()
+        SectorDistribution(sector=sector, percentage=percentage)
+        for sector, percentage in analysis["sector_percentages"].items()
     ]
 
-    # Fetch S&P 500 performance data
-    sp500_performance = await fetch_sp500_performance()
-
-    # Calculate the portfolio's return compared to the S&P 500
-    portfolio_return = await calculate_portfolio_return(portfolio_records, sp500_performance)
-
     # Prepare the performance comparison object
     comparison = SP500Comparison(
-        portfolio_return=portfolio_return,
+        portfolio_return=analysis["portfolio_return"],
         sp500_return=sp500_performance["return"],
     )
 
     # Generate diversification suggestions based on the portfolio and S&P 500 sector weights
-    suggestions = generate_diversification_suggestions(sectors, sp500_performance["sector_weights"])
+    suggestions = generate_diversification_suggestions(
+        analysis["sector_values"], sp500_performance["sector_weights"]
+    )
 
     # Return the analysis response
     return PortfolioAnalysisResponse(
@@ -225,41 +215,6 @@ async def analyze_portfolio(user_id: int, session: AsyncSession = Depends(get_db
     )
 
 
-# Helper function to calculate portfolio return
-async def calculate_portfolio_return(portfolio_records: list, sp500_performance: dict) -> float:
-    """
-    Calculate the portfolio's overall return.
-    - Compares the current value of the portfolio with the total invested value.
-    """
-    total_invested = 0.0  # Total amount invested in the portfolio
-    total_current_value = 0.0  # Total current value of the portfolio
-
-    # Loop through each stock in the portfolio
-    for record in portfolio_records:
-        quantity = record.quantity  # Quantity of stocks held
-        purchase_price = record.purchase_price  # Purchase price per stock
-
-        # Fetch the current price of the stock
-        current_price = await get_current_price(record.ticker)
-        if current_price is None:
-            continue  # Skip if the current price is not available
-
-        # Calculate the invested and current values
-        invested = quantity * purchase_price
-        current_value = quantity * current_price
-
-        total_invested += invested  # Accumulate the total invested amount
-        total_current_value += current_value  # Accumulate the total current value
-
-    if total_invested == 0:
-        # Avoid division by zero
-        return 0.0
-
-    # Calculate the return as a percentage
-    return ((total_current_value - total_invested) / total_invested) * 100
-
-
-
 @router.get("/trend/{user_id}", response_model=PortfolioTrendResponse)
 async def get_portfolio_trend(user_id: int, session: AsyncSession = Depends(get_db)):
     """
@@ -295,3 +250,26 @@ async def get_portfolio_trend(user_id: int, session: AsyncSession = Depends(get_
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch portfolio trend: {str(e)}")
+
+
+@router.post("/backfill", response_model=dict)
+async def backfill_portfolio_trend(request: PortfolioBackfillRequest, background_tasks: BackgroundTasks):
+    """
+    Rebuild daily portfolio values for a date range from the transaction ledger in the background.
+    """
+    end_date = request.end_date or date.today() - timedelta(days=1)
+    if request.start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    background_tasks.add_task(
+        backfill_portfolio_performance,
+        request.start_date,
+        end_date,
+        request.user_ids,
+        request.overwrite,
+    )
+    return {
+        "message": "Portfolio backfill started",
+        "start_date": request.start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+    }
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import os
+import threading
+from datetime import date
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy.future import select
+
+from database import async_session_maker
+from models import Stock, StockPrice
+
+logger = logging.getLogger(__name__)
+
+# Directory holding one `<TICKER>.ohlcv` file per ticker; the archive is disabled when unset
+PRICE_ARCHIVE_DIR = os.getenv("PRICE_ARCHIVE_DIR")
+
+# Fixed-width record layout; dates are days since 1970-01-01
+OHLCV_DTYPE = np.dtype([
+    ("date", "<i4"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<i8"),
+])
+
+_EMPTY = np.zeros(0, dtype=OHLCV_DTYPE)
+
+# append_bars runs on worker threads; one writer at a time keeps appends and rewrites of a file apart
+_write_lock = threading.Lock()
+
+
+def archive_enabled() -> bool:
+    return bool(PRICE_ARCHIVE_DIR)
+
+
+def _archive_path(ticker: str) -> str:
+    return os.path.join(PRICE_ARCHIVE_DIR, f"{ticker.upper()}.ohlcv")
+
+
+def to_day_number(day: date) -> int:
+    return int(np.datetime64(day, "D").astype(np.int64))
+
+
+def to_datetime64(day_numbers: np.ndarray) -> np.ndarray:
+    """
+    Convert archived day numbers to a new datetime64[D] array (the archive itself is not copied).
+    """
+    return day_numbers.astype("datetime64[D]")
+
+
+def load_archive(ticker: str) -> np.ndarray:
+    """
+    Memory-map the whole archive for `ticker`. Returns an empty array if there is none.
+    """
+    path = _archive_path(ticker)
+    if not os.path.exists(path) or os.path.getsize(path) < OHLCV_DTYPE.itemsize:
+        return _EMPTY
+    return np.memmap(path, dtype=OHLCV_DTYPE, mode="r")
+
+
+def read_history(ticker: str, start: Optional[date] = None, end: Optional[date] = None) -> np.ndarray:
+    """
+    Return the archived bars for `ticker` between `start` and `end` (inclusive)
+    as a zero-copy slice of the memory-mapped file.
+    """
+    bars = load_archive(ticker)
+    if not bars.size:
+        return bars
+    dates = bars["date"]
+    lo = np.searchsorted(dates, to_day_number(start), side="left") if start else 0
+    hi = np.searchsorted(dates, to_day_number(end), side="right") if end else len(bars)
+    return bars[lo:hi]
+
+
+def covers(bars: np.ndarray, start: date, end: date, gap_tolerance_days: int) -> bool:
+    """
+    True when `bars` span `start`..`end` without any gap longer than `gap_tolerance_days`.
+    """
+    if not bars.size:
+        return False
+    dates = bars["date"]
+    return (
+        int(dates[0]) - to_day_number(start) <= gap_tolerance_days
+        and int(dates[-1]) >= to_day_number(end)
+        and not (np.diff(dates) > gap_tolerance_days).any()
+    )
+
+
+def _to_records(bars: Iterable[dict]) -> np.ndarray:
+    rows = [
+        (to_day_number(bar["date"]), bar["open_price"], bar["high"], bar["low"], bar["close_price"], bar["volume"] or 0)
+        for bar in bars
+    ]
+    if not rows:
+        return _EMPTY
+    records = np.array(rows, dtype=OHLCV_DTYPE)
+    # Sorted by date with one bar per day
+    return records[np.unique(records["date"], return_index=True)[1]]
+
+
+def append_bars(ticker: str, bars: Iterable[dict]) -> int:
+    """
+    Add bars (dicts shaped like StockPrice rows) to the ticker's archive.
+
+    Bars newer than the last archived date are appended in place; older ones
+    trigger a merge and an atomic rewrite of the file. Returns the number of bars added.
+
+    This does blocking file I/O; call it from async code with asyncio.to_thread.
+    """
+    if not archive_enabled():
+        return 0
+    records = _to_records(bars)
+    if not records.size:
+        return 0
+    with _write_lock:
+        return _write_records(ticker, records)
+
+
+def _write_records(ticker: str, records: np.ndarray) -> int:
+    os.makedirs(PRICE_ARCHIVE_DIR, exist_ok=True)
+    path = _archive_path(ticker)
+    existing = load_archive(ticker)
+
+    if not existing.size or records["date"][0] > existing["date"][-1]:
+        with open(path, "ab") as f:
+            f.write(records.tobytes())
+        return len(records)
+
+    merged = np.concatenate([records, np.asarray(existing)])
+    # np.unique keeps the first occurrence, so incoming bars win over archived ones
+    _, index = np.unique(merged["date"], return_index=True)
+    merged = merged[index]
+    added = len(merged) - len(existing)
+
+    tmp_path = f"{path}.tmp"
+    merged.tofile(tmp_path)
+    os.replace(tmp_path, path)
+    return added
+
+
+async def rebuild_archive():
+    """
+    Export every ticker's stock_prices rows into the archive, replacing existing files.
+    """
+    if not archive_enabled():
+        logger.warning("PRICE_ARCHIVE_DIR is not set; nothing to rebuild.")
+        return
+
+    os.makedirs(PRICE_ARCHIVE_DIR, exist_ok=True)
+    async with async_session_maker() as session:
+        stocks = (await session.execute(select(Stock.id, Stock.symbol))).all()
+        for stock_id, symbol in stocks:
+            result = await session.execute(
+                select(
+                    StockPrice.date,
+                    StockPrice.open_price,
+                    StockPrice.high,
+                    StockPrice.low,
+                    StockPrice.close_price,
+                    StockPrice.volume,
+                )
+                .where(StockPrice.stock_id == stock_id)
+                .order_by(StockPrice.date)
+            )
+            records = _to_records(row._asdict() for row in result.all())
+            tmp_path = f"{_archive_path(symbol)}.tmp"
+            records.tofile(tmp_path)
+            os.replace(tmp_path, _archive_path(symbol))
+            logger.info(f"[ARCHIVE] Wrote {len(records)} bars for {symbol}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    asyncio.run(rebuild_archive())
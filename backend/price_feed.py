@@ -0,0 +1,330 @@
+import abc
+import asyncio
+import csv
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart"
+# Requests only carry the bars since the last one seen, so polling often is cheap
+FEED_POLL_SECONDS = float(os.getenv("BOT_FEED_POLL_SECONDS", 5))
+# Failed or rejected requests (such as HTTP 429) double an instrument's poll interval up to this cap
+FEED_MAX_BACKOFF_SECONDS = float(os.getenv("BOT_FEED_MAX_BACKOFF_SECONDS", 300))
+# Each wait is randomized by this fraction so per-instrument tasks do not fire together
+FEED_POLL_JITTER = 0.2
+# How far back the first request for an instrument looks for its latest bar
+FEED_INITIAL_LOOKBACK_SECONDS = 15 * 60
+MARKET_CLOSED_SLEEP_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class Tick:
+    ticker: str
+    timestamp: int  # epoch seconds
+    price: Decimal  # latest close of the bar
+    # The rest of the bar, when the source provides it
+    open: Optional[Decimal] = None
+    high: Optional[Decimal] = None
+    low: Optional[Decimal] = None
+    volume: int = 0
+
+    @property
+    def current_time(self) -> str:
+        """The bar time as the strategy logs and stores it."""
+        return datetime.fromtimestamp(self.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _parse_timestamp(value) -> int:
+    """Epoch seconds from an epoch number or an ISO 8601 string (naive means local time)."""
+    try:
+        return int(float(value))
+    except ValueError:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp())
+
+
+def _decimal(value) -> Optional[Decimal]:
+    return None if value is None else Decimal(str(value))
+
+
+def parse_tick(row: dict, default_ticker: Optional[str] = None) -> Tick:
+    """
+    Build a Tick from a mapping with a timestamp, a price (or close) and optionally a
+    ticker and the bar's open, high, low and volume.
+    """
+    columns = {str(name).lower(): (None if value == "" else value) for name, value in row.items()}
+    timestamp = next(columns[name] for name in ("timestamp", "datetime", "date", "time") if columns.get(name) is not None)
+    price = columns.get("price", columns.get("close"))
+    ticker = columns.get("ticker") or default_ticker
+    if ticker is None:
+        raise ValueError(f"Tick has no ticker: {row}")
+    return Tick(
+        ticker=ticker,
+        timestamp=_parse_timestamp(timestamp),
+        price=Decimal(str(price)),
+        open=_decimal(columns.get("open")),
+        high=_decimal(columns.get("high")),
+        low=_decimal(columns.get("low")),
+        volume=int(float(columns.get("volume") or 0)),
+    )
+
+
+class PriceFeed(abc.ABC):
+    """
+    A source of Ticks, consumed with `async for tick in feed`.
+
+    Ticks are yielded as soon as the source produces them. Live feeds run until closed;
+    replay feeds stop at the end of their data.
+    """
+
+    def __aiter__(self):
+        return self._ticks()
+
+    @abc.abstractmethod
+    def _ticks(self) -> AsyncIterator[Tick]:
+        """Return an async iterator of Ticks; subclasses implement it as an async generator."""
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        """Counters for the bot's metrics endpoint."""
+        return {}
+
+
+class YahooPoller(PriceFeed):
+    """
+    Polls Yahoo's 1-minute chart for each instrument, requesting only the bars since
+    the last one it has seen (period1/period2) instead of the whole day.
+
+    Every instrument is polled by its own task sharing `session`, and ticks are pushed
+    onto one queue the moment a response arrives. A tick is emitted for each new bar
+    and whenever the forming bar's close changes. Tasks start at random offsets within
+    the poll interval, and an instrument whose requests fail backs off exponentially.
+    """
+
+    def __init__(
+        self,
+        session,
+        tickers: Iterable[str],
+        poll_seconds: float = FEED_POLL_SECONDS,
+        is_open: Optional[Callable[[], bool]] = None,
+        max_backoff_seconds: float = FEED_MAX_BACKOFF_SECONDS,
+    ):
+        self.session = session
+        self.tickers = list(tickers)
+        self.poll_seconds = poll_seconds
+        self.is_open = is_open
+        self.max_backoff_seconds = max_backoff_seconds
+        self.requests = 0
+        self.failed_requests = 0
+        self.backing_off = 0  # instruments whose last request failed
+        self.bytes_received = 0
+        self.fetch_seconds = 0.0
+        self.max_fetch_seconds = 0.0
+        self._last_bar: Dict[str, tuple] = {}  # ticker -> (timestamp, close) of the latest bar emitted
+        self._tasks = []
+
+    async def _ticks(self):
+        queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._poll(ticker, queue)) for ticker in self.tickers]
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            await self.close()
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def poll_delay(self, failures: int) -> float:
+        """Seconds to wait before the next request after `failures` consecutive failures."""
+        delay = self.poll_seconds
+        if failures:
+            delay = min(self.max_backoff_seconds, self.poll_seconds * 2 ** min(failures, 16))
+        return delay * random.uniform(1 - FEED_POLL_JITTER, 1 + FEED_POLL_JITTER)
+
+    async def _poll(self, ticker: str, queue: asyncio.Queue):
+        failures = 0
+        await asyncio.sleep(random.uniform(0, self.poll_seconds))
+        while True:
+            if self.is_open is not None and not self.is_open():
+                await asyncio.sleep(MARKET_CLOSED_SLEEP_SECONDS)
+                continue
+            try:
+                ticks = await self.fetch_new_ticks(ticker)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed_requests += 1
+                if not failures:
+                    self.backing_off += 1
+                failures += 1
+                delay = self.poll_delay(failures)
+                logger.error(f"[{ticker}] Failed to fetch price data: {e}; retrying in {delay:.0f}s")
+            else:
+                if failures:
+                    self.backing_off -= 1
+                    failures = 0
+                for tick in ticks:
+                    queue.put_nowait(tick)
+                delay = self.poll_delay(failures)
+            await asyncio.sleep(delay)
+
+    async def fetch_new_ticks(self, ticker: str) -> list:
+        """Request the bars since the last one seen and return the ticks they produce."""
+        now = int(time.time())
+        last = self._last_bar.get(ticker)
+        period1 = last[0] if last else now - FEED_INITIAL_LOOKBACK_SECONDS
+        url = f"{YAHOO_CHART_URL}/{ticker}?interval=1m&period1={period1}&period2={now + 60}"
+        started = time.monotonic()
+        async with self.session.get(url) as response:
+            status = response.status
+            body = await response.read()
+        elapsed = time.monotonic() - started
+        self.requests += 1
+        self.fetch_seconds += elapsed
+        self.max_fetch_seconds = max(self.max_fetch_seconds, elapsed)
+        self.bytes_received += len(body)
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}")
+
+        try:
+            result = json.loads(body)['chart']['result'][0]
+            timestamps = result.get('timestamp') or []
+            quote = result['indicators']['quote'][0]
+            closes = quote.get('close') or []
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            logger.error(f"[{ticker}] Failed to parse data: {e}")
+            return []
+
+        columns = [quote.get(name) or [None] * len(closes) for name in ('open', 'high', 'low', 'volume')]
+        bars = [
+            (timestamp, close, *rest)
+            for timestamp, close, *rest in zip(timestamps, closes, *columns)
+            if close is not None
+        ]
+        if not bars:
+            logger.info(f"[{ticker}] No new price data available. Possibly the market is closed.")
+            return []
+        if last is None:
+            # Start from the latest bar rather than replaying the lookback window
+            bars = bars[-1:]
+        else:
+            bars = [bar for bar in bars if bar[0] > last[0] or (bar[0] == last[0] and bar[1] != last[1])]
+        if bars:
+            self._last_bar[ticker] = bars[-1][:2]
+        return [
+            Tick(ticker, int(timestamp), Decimal(str(close)), _decimal(open_), _decimal(high), _decimal(low), int(volume or 0))
+            for timestamp, close, open_, high, low, volume in bars
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "failed_requests": self.failed_requests,
+            "backing_off": self.backing_off,
+            "bytes_received": self.bytes_received,
+            "avg_fetch_seconds": round(self.fetch_seconds / self.requests, 4) if self.requests else 0.0,
+            "max_fetch_seconds": round(self.max_fetch_seconds, 4),
+        }
+
+
+class ReplayFeed(PriceFeed):
+    """
+    Replays ticks from a CSV file with timestamp and price (or close) columns, plus an
+    optional ticker column for multi-instrument files.
+
+    With speed=0 ticks are emitted as fast as they are consumed; otherwise the gaps
+    between timestamps are replayed `speed` times faster than real time.
+    """
+
+    def __init__(self, path: str, ticker: Optional[str] = None, speed: float = 0.0):
+        self.path = path
+        self.ticker = ticker
+        self.speed = speed
+
+    async def _ticks(self):
+        previous = None
+        with open(self.path, newline="") as f:
+            for row in csv.DictReader(f):
+                tick = parse_tick(row, self.ticker)
+                if self.speed and previous is not None and tick.timestamp > previous:
+                    await asyncio.sleep((tick.timestamp - previous) / self.speed)
+                previous = tick.timestamp
+                yield tick
+                # Let other tasks (such as the trade writer) run between ticks
+                await asyncio.sleep(0)
+
+
+class SocketFeed(PriceFeed):
+    """
+    Reads ticks as JSON lines ({"ticker", "timestamp", "price"}) from a TCP connection,
+    for example `python price_feed.py serve bars.csv` or any process piping to a socket.
+    The feed ends when the connection closes.
+    """
+
+    def __init__(self, host: str, port: int, ticker: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.ticker = ticker
+        self._writer = None
+
+    async def _ticks(self):
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            async for line in reader:
+                if line.strip():
+                    yield parse_tick(json.loads(line), self.ticker)
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+async def serve_replay(path: str, host: str = "127.0.0.1", port: int = 9100, ticker: Optional[str] = None, speed: float = 1.0):
+    """Serve a CSV replay as JSON lines to each client that connects, for use with SocketFeed."""
+
+    async def handle(reader, writer):
+        try:
+            async for tick in ReplayFeed(path, ticker, speed):
+                line = {"ticker": tick.ticker, "timestamp": tick.timestamp, "price": str(tick.price)}
+                writer.write((json.dumps(line) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"Serving {path} on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a CSV of ticks over TCP for SocketFeed.")
+    parser.add_argument("command", choices=["serve"])
+    parser.add_argument("path", help="CSV with timestamp, price/close and optional ticker columns")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--ticker", help="Ticker for files without a ticker column")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (0 = as fast as possible)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve_replay(args.path, args.host, args.port, args.ticker, args.speed))
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+import pandas as pd
+import yfinance as yf
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+import price_archive
+from cache import AsyncTTLCache
+from database import upsert_insert
+from market_executor import run_market_io
+from models import Stock, StockPrice
+
+logger = logging.getLogger(__name__)
+
+# Calendar days covered by each yfinance-style range string
+RANGE_DAYS = {
+    "1d": 1,
+    "5d": 5,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+    "10y": 3653,
+}
+
+# Stored dates further apart than this are treated as a gap (a weekend plus a holiday fits inside)
+GAP_TOLERANCE_DAYS = 4
+
+# Gaps that came back empty upstream (holidays, pre-IPO ranges) are not retried for a while
+_empty_gaps = AsyncTTLCache("empty_history_gaps", ttl_seconds=6 * 3600, max_size=4096)
+
+# One backfill per ticker at a time so concurrent chart loads do not insert the same rows
+_ticker_locks = defaultdict(asyncio.Lock)
+
+
+def range_start(range: str, today: Optional[date] = None) -> Optional[date]:
+    """
+    Translate a range string into its first calendar date, or None if it is not supported.
+
+    The start never falls after last_completed_session(), where histories end, so short
+    ranges on weekends and Mondays still cover the last session.
+    """
+    today = today or date.today()
+    if range == "ytd":
+        start = date(today.year, 1, 1)
+    elif range in RANGE_DAYS:
+        start = today - timedelta(days=RANGE_DAYS[range])
+    else:
+        return None
+    return min(start, last_completed_session(today))
+
+
+def last_completed_session(today: Optional[date] = None) -> date:
+    """
+    Return the most recent weekday before today, the last bar the daily job stores.
+    """
+    day = (today or date.today()) - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def find_missing_ranges(stored_dates: List[date], start: date, end: date) -> List[Tuple[date, date]]:
+    """
+    Return the (first, last) date ranges between `start` and `end` not covered by `stored_dates`.
+    `stored_dates` must be sorted.
+    """
+    if start > end:
+        return []
+    if not stored_dates:
+        return [(start, end)]
+
+    gaps = []
+    one_day = timedelta(days=1)
+    if (stored_dates[0] - start).days > GAP_TOLERANCE_DAYS:
+        gaps.append((start, stored_dates[0] - one_day))
+    for previous, following in zip(stored_dates, stored_dates[1:]):
+        if (following - previous).days > GAP_TOLERANCE_DAYS:
+            gaps.append((previous + one_day, following - one_day))
+    if stored_dates[-1] < end:
+        gaps.append((stored_dates[-1] + one_day, end))
+    return gaps
+
+
+def _row_to_dict(row) -> dict:
+    return {
+        "date": row.date,
+        "open": row.open_price,
+        "high": row.high,
+        "low": row.low,
+        "close": row.close_price,
+        "volume": row.volume,
+    }
+
+
+def _archive_to_dicts(bars) -> List[dict]:
+    dates = price_archive.to_datetime64(bars["date"]).tolist()
+    return [
+        {"date": day, "open": o, "high": h, "low": l, "close": c, "volume": v}
+        for day, o, h, l, c, v in zip(
+            dates,
+            bars["open"].tolist(),
+            bars["high"].tolist(),
+            bars["low"].tolist(),
+            bars["close"].tolist(),
+            bars["volume"].tolist(),
+        )
+    ]
+
+
+def _volume(ticker: str, day: date, value) -> int:
+    # Yahoo occasionally leaves a daily bar's volume empty; keep the bar rather than failing the request
+    if pd.isna(value):
+        logger.warning(f"Missing volume for {ticker} on {day}, storing 0")
+        return 0
+    return int(value)
+
+
+async def _fetch_gap(ticker: str, first: date, last: date) -> List[dict]:
+    """
+    Download daily bars for one missing range from Yahoo Finance.
+    """
+    data = await run_market_io(
+        lambda: yf.Ticker(ticker).history(start=first.isoformat(), end=(last + timedelta(days=1)).isoformat())
+    )
+    bars = []
+    for idx, row in data.iterrows():
+        bars.append({
+            "date": idx.date(),
+            "open_price": round(float(row["Open"]), 2),
+            "close_price": round(float(row["Close"]), 2),
+            "high": round(float(row["High"]), 2),
+            "low": round(float(row["Low"]), 2),
+            "volume": _volume(ticker, idx.date(), row["Volume"]),
+        })
+    return bars
+
+
+async def get_price_history(session: AsyncSession, ticker: str, start: date, end: Optional[date] = None) -> List[dict]:
+    """
+    Return daily bars for `ticker` between `start` and `end` from the stock_prices table.
+
+    Missing date ranges are fetched from Yahoo Finance, inserted in bulk and merged into
+    the result, so repeated loads of the same range cost one indexed range scan.
+    """
+    end = end or last_completed_session()
+
+    if price_archive.archive_enabled():
+        bars = price_archive.read_history(ticker, start, end)
+        if price_archive.covers(bars, start, end, GAP_TOLERANCE_DAYS):
+            return _archive_to_dicts(bars)
+
+    async with _ticker_locks[ticker]:
+        stock_id = (await session.execute(select(Stock.id).where(Stock.symbol == ticker))).scalar_one_or_none()
+
+        stored = []
+        if stock_id is not None:
+            result = await session.execute(
+                select(
+                    StockPrice.date,
+                    StockPrice.open_price,
+                    StockPrice.high,
+                    StockPrice.low,
+                    StockPrice.close_price,
+                    StockPrice.volume,
+                )
+                .where(StockPrice.stock_id == stock_id, StockPrice.date >= start, StockPrice.date <= end)
+                .order_by(StockPrice.date)
+            )
+            stored = result.all()
+
+        stored_dates = [row.date for row in stored]
+        gaps = [
+            gap for gap in find_missing_ranges(stored_dates, start, end)
+            if _empty_gaps.peek((ticker,) + gap) is None
+        ]
+        if not gaps:
+            return [_row_to_dict(row) for row in stored]
+
+        known = set(stored_dates)
+        fetched = []
+        for first, last in gaps:
+            bars = [bar for bar in await _fetch_gap(ticker, first, last) if bar["date"] not in known]
+            if not bars:
+                _empty_gaps.set((ticker, first, last), True)
+            fetched.extend(bars)
+        logger.info(f"[HISTORY] {ticker}: {len(stored)} stored bars, fetched {len(fetched)} across {len(gaps)} gap(s)")
+
+        if fetched:
+            if stock_id is None:
+                stock_id = (await session.execute(insert(Stock).values(symbol=ticker).returning(Stock.id))).scalar_one()
+            await session.execute(
+                upsert_insert(StockPrice).on_conflict_do_nothing(index_elements=["stock_id", "date"]),
+                [dict(bar, stock_id=stock_id) for bar in fetched],
+            )
+            await session.commit()
+            await asyncio.to_thread(price_archive.append_bars, ticker, fetched)
+
+    history = [_row_to_dict(row) for row in stored] + [
+        {
+            "date": bar["date"],
+            "open": bar["open_price"],
+            "high": bar["high"],
+            "low": bar["low"],
+            "close": bar["close_price"],
+            "volume": bar["volume"],
+        }
+        for bar in fetched
+    ]
+    history.sort(key=lambda bar: bar["date"])
+    return history
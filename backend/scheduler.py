@@ -7,10 +7,12 @@ import inspect
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.cron import CronTrigger
 
 from tasks.sync_stocks import sync_stocks_with_user_stocks
 from tasks.update_prices import update_stock_data
 from tasks.daily import track_portfolio_performance, track_fear_greed_index
+from benchmark import refresh_benchmark
 
 # Global variables
 scheduler_running = True  # Track scheduler state
@@ -24,6 +26,9 @@ SYNC_INTERVAL_HOURS = int(os.getenv("SYNC_INTERVAL_HOURS", 12))
 UPDATE_PRICES_INTERVAL_HOURS = int(os.getenv("UPDATE_PRICES_INTERVAL_HOURS", 12))
 PERFORMANCE_TRACK_INTERVAL_HOURS = int(os.getenv("PERFORMANCE_TRACK_INTERVAL_HOURS", 12))
 FEAR_GREED_INTERVAL_HOURS = int(os.getenv("FEAR_GREED_INTERVAL_HOURS", 12))
+# Benchmark refresh runs once per trading day after the US close (US/Eastern)
+BENCHMARK_REFRESH_HOUR = int(os.getenv("BENCHMARK_REFRESH_HOUR", 16))
+BENCHMARK_REFRESH_MINUTE = int(os.getenv("BENCHMARK_REFRESH_MINUTE", 30))
 
 def safe_task_wrapper(task, task_name):
     """
@@ -81,6 +86,21 @@ def start_scheduler():
     )
     logging.info(f"Scheduled: Track Fear & Greed Index (every {FEAR_GREED_INTERVAL_HOURS} hours)")
 
+    scheduler.add_job(
+        lambda: safe_task_wrapper(refresh_benchmark, "Refresh S&P 500 benchmark"),
+        CronTrigger(
+            day_of_week="mon-fri",
+            hour=BENCHMARK_REFRESH_HOUR,
+            minute=BENCHMARK_REFRESH_MINUTE,
+            timezone="US/Eastern",
+        ),
+        name="Refresh S&P 500 benchmark",
+        id="refresh_benchmark",
+    )
+    logging.info(
+        f"Scheduled: Refresh S&P 500 benchmark (weekdays at {BENCHMARK_REFRESH_HOUR:02d}:{BENCHMARK_REFRESH_MINUTE:02d} US/Eastern)"
+    )
+
     scheduler.start()
     logging.info("[INFO] Scheduler started.")
 
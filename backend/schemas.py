@@ -131,6 +131,13 @@ class PortfolioTrendResponse(BaseModel):
     trend: List[PortfolioTrendEntry]
 
 
+class PortfolioBackfillRequest(BaseModel):
+    start_date: date
+    end_date: Optional[date] = None  # Defaults to yesterday
+    user_ids: Optional[List[int]] = None  # Defaults to every user with transactions
+    overwrite: bool = False  # Replace existing rows in the range instead of skipping them
+
+
 # ========== Stock Price Data and API Response Schemas ==========
 
 class StockPriceData(BaseModel):
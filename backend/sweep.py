@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+import backtest
+import bar_store
+import bot
+from database import async_session_maker, upsert_insert
+from models import SweepResult
+
+logger = logging.getLogger(__name__)
+
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", os.cpu_count() or 1))
+RANKINGS = ("pnl", "drawdown", "ratio")
+
+
+@dataclass(frozen=True)
+class SweepParams:
+    price_increment: Decimal
+    ladder_depth: int
+    order_quantity: Decimal
+    reentry_offset: Decimal
+
+    def key(self) -> tuple:
+        """The parameters as stored in sweep_results, for matching finished runs."""
+        return (float(self.price_increment), int(self.ladder_depth), float(self.order_quantity), float(self.reentry_offset))
+
+
+def parameter_grid(
+    price_increments: Sequence[Decimal],
+    ladder_depths: Sequence[int],
+    order_quantities: Sequence[Decimal],
+    reentry_offsets: Sequence[Decimal],
+) -> List[SweepParams]:
+    """Every combination of the given settings."""
+    return [
+        SweepParams(*values)
+        for values in itertools.product(price_increments, ladder_depths, order_quantities, reentry_offsets)
+    ]
+
+
+def bars_fingerprint(timestamps: np.ndarray, closes: np.ndarray) -> str:
+    """Identify a bar set so a resumed sweep only reuses results computed on the same data."""
+    digest = hashlib.sha1(timestamps.astype("datetime64[s]").tobytes())
+    digest.update(np.ascontiguousarray(closes, dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+# ----- Worker side -----
+
+_bars = None
+
+
+def _init_worker(timestamps: np.ndarray, closes: np.ndarray):
+    # Bars are shipped once per worker process rather than with every task
+    global _bars
+    _bars = (timestamps, closes)
+
+
+def evaluate(params: SweepParams, budget: Decimal) -> dict:
+    """Backtest one parameter set over the worker's bars and return its sweep_results values."""
+    config = bot.BotConfig(
+        "SWEEP",
+        budget=budget,
+        price_increment=params.price_increment,
+        ladder_depth=params.ladder_depth,
+        order_quantity=params.order_quantity,
+        reentry_offset=params.reentry_offset,
+    )
+    result = backtest.run_backtest(*_bars, config=config)
+    price_increment, ladder_depth, order_quantity, reentry_offset = params.key()
+    return {
+        "price_increment": price_increment,
+        "ladder_depth": ladder_depth,
+        "order_quantity": order_quantity,
+        "reentry_offset": reentry_offset,
+        "bars": result.bars,
+        "buy_fills": result.buy_fills,
+        "sell_fills": result.sell_fills,
+        "realized_pnl": result.realized_pnl,
+        "unrealized_pnl": result.unrealized_pnl,
+        "total_pnl": result.final_equity - float(budget),
+        "max_drawdown": result.max_drawdown,
+        "max_drawdown_pct": result.max_drawdown_pct,
+        "max_capital_used": result.max_capital_used,
+        "seconds": result.seconds,
+    }
+
+
+# ----- Results table -----
+
+async def _finished_keys(sweep: str, bars_key: str) -> set:
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(
+                SweepResult.price_increment,
+                SweepResult.ladder_depth,
+                SweepResult.order_quantity,
+                SweepResult.reentry_offset,
+            ).where(SweepResult.sweep == sweep, SweepResult.bars_key == bars_key)
+        )
+        return {tuple(row) for row in result.all()}
+
+
+async def _save_result(sweep: str, bars_key: str, values: dict):
+    async with async_session_maker() as session:
+        await session.execute(
+            upsert_insert(SweepResult)
+            .values(sweep=sweep, bars_key=bars_key, **values)
+            .on_conflict_do_nothing(index_elements=[
+                "sweep", "bars_key", "price_increment", "ladder_depth", "order_quantity", "reentry_offset",
+            ])
+        )
+        await session.commit()
+
+
+async def run_sweep(
+    timestamps: np.ndarray,
+    closes: np.ndarray,
+    grid: List[SweepParams],
+    sweep: str = "default",
+    budget: Decimal = bot.DEFAULT_BUDGET,
+    workers: int = SWEEP_WORKERS,
+) -> dict:
+    """
+    Backtest every parameter set in `grid` across a process pool.
+
+    Each result is written to sweep_results as soon as its worker finishes, so an
+    interrupted sweep picks up where it stopped: parameter sets already stored for the
+    same sweep name and bars are skipped.
+    """
+    started = time.monotonic()
+    bars_key = bars_fingerprint(timestamps, closes)
+    finished = await _finished_keys(sweep, bars_key)
+    pending = [params for params in grid if params.key() not in finished]
+    summary = {"sweep": sweep, "bars_key": bars_key, "total": len(grid), "skipped": len(grid) - len(pending), "completed": 0, "failed": 0}
+    if not pending:
+        logger.info(f"Sweep '{sweep}' already has all {len(grid)} results.")
+        return summary
+
+    workers = max(1, min(workers, len(pending)))
+    logger.info(f"Sweep '{sweep}': {len(pending)} of {len(grid)} parameter sets to run on {workers} workers.")
+    loop = asyncio.get_running_loop()
+    # spawn keeps workers independent of the event loop thread in this process
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(timestamps, closes),
+    )
+    try:
+        futures = [loop.run_in_executor(pool, evaluate, params, budget) for params in pending]
+        for future in asyncio.as_completed(futures):
+            try:
+                values = await future
+            except Exception as e:
+                summary["failed"] += 1
+                logger.error(f"Sweep '{sweep}' run failed: {e}")
+                continue
+            await _save_result(sweep, bars_key, values)
+            summary["completed"] += 1
+            logger.info(
+                f"[{summary['completed'] + summary['failed']}/{len(pending)}] increment={values['price_increment']} "
+                f"depth={values['ladder_depth']} quantity={values['order_quantity']} offset={values['reentry_offset']}: "
+                f"P/L {values['total_pnl']:,.2f}, max drawdown {values['max_drawdown']:,.2f}"
+            )
+    finally:
+        # On interruption drop the queued runs; finished ones are already stored
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    summary["seconds"] = round(time.monotonic() - started, 2)
+    return summary
+
+
+async def ranked_results(sweep: str, bars_key: Optional[str] = None, rank: str = "pnl", limit: int = 20) -> List[dict]:
+    """
+    Best results of a sweep: by total P/L (ties broken by smaller drawdown), by smallest
+    drawdown (ties broken by larger P/L), or by P/L per unit of drawdown.
+    """
+    if rank not in RANKINGS:
+        raise ValueError(f"rank must be one of {RANKINGS}")
+    ratio = SweepResult.total_pnl / func.nullif(SweepResult.max_drawdown, 0)
+    order = {
+        "pnl": (SweepResult.total_pnl.desc(), SweepResult.max_drawdown),
+        "drawdown": (SweepResult.max_drawdown, SweepResult.total_pnl.desc()),
+        "ratio": (ratio.desc(), SweepResult.total_pnl.desc()),
+    }[rank]
+    query = select(SweepResult).where(SweepResult.sweep == sweep).order_by(*order).limit(limit)
+    if bars_key:
+        query = query.where(SweepResult.bars_key == bars_key)
+    async with async_session_maker() as session:
+        rows = (await session.execute(query)).scalars().all()
+    return [
+        {column.name: getattr(row, column.name) for column in SweepResult.__table__.columns}
+        for row in rows
+    ]
+
+
+def format_ranking(rows: List[dict]) -> str:
+    header = f"{'#':>3} {'increment':>9} {'depth':>5} {'quantity':>8} {'offset':>7} {'P/L':>12} {'max DD':>11} {'DD %':>6} {'P/L/DD':>7} {'fills':>7}"
+    lines = [header]
+    for position, row in enumerate(rows, start=1):
+        ratio = row["total_pnl"] / row["max_drawdown"] if row["max_drawdown"] else float("inf")
+        lines.append(
+            f"{position:>3} {row['price_increment']:>9g} {row['ladder_depth']:>5} {row['order_quantity']:>8g} "
+            f"{row['reentry_offset']:>7g} {row['total_pnl']:>12,.2f} {row['max_drawdown']:>11,.2f} "
+            f"{row['max_drawdown_pct']:>6.2f} {ratio:>7.2f} {row['buy_fills'] + row['sell_fills']:>7,}"
+        )
+    return "\n".join(lines)
+
+
+def _decimals(text: str) -> List[Decimal]:
+    return [Decimal(value) for value in text.split(",")]
+
+
+def _ints(text: str) -> List[int]:
+    return [int(value) for value in text.split(",")]
+
+
+async def _main(args):
+    if args.csv:
+        timestamps, closes = backtest.load_bars_csv(args.csv)
+    elif args.bars:
+        timestamps, closes = bar_store.load_closes(args.bars_dir, args.bars)
+    else:
+        timestamps, closes = backtest.synthetic_bars(args.synthetic, seed=args.seed)
+    grid = parameter_grid(args.increments, args.depths, args.quantities, args.offsets)
+    summary = await run_sweep(timestamps, closes, grid, args.name, args.budget, args.workers)
+    print(summary)
+    print(format_ranking(await ranked_results(args.name, summary["bars_key"], args.rank, args.top)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep grid strategy settings over 1-minute bars.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="CSV of 1-minute bars with timestamp and close columns")
+    source.add_argument("--synthetic", type=int, metavar="BARS", help="Generate this many random-walk bars")
+    source.add_argument("--bars", metavar="TICKER", help="Recorded bars for this ticker from the bar store")
+    parser.add_argument("--bars-dir", default=bar_store.BAR_STORE_DIR, help="Bar store directory for --bars")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic bars")
+    parser.add_argument("--name", default="default", help="Sweep name; rerunning a name resumes it")
+    parser.add_argument("--increments", type=_decimals, default=_decimals("5,10,20"), help="Price increments, comma separated")
+    parser.add_argument("--depths", type=_ints, default=_ints("5,10,20"), help="Ladder depths")
+    parser.add_argument("--quantities", type=_decimals, default=_decimals("0.1"), help="Order quantities")
+    parser.add_argument("--offsets", type=_decimals, default=_decimals("50,100,200"), help="Re-entry offsets in points")
+    parser.add_argument("--budget", type=Decimal, default=bot.DEFAULT_BUDGET, help="Starting budget")
+    parser.add_argument("--workers", type=int, default=SWEEP_WORKERS, help="Worker processes")
+    parser.add_argument("--rank", choices=RANKINGS, default="pnl", help="Ranking of the printed results")
+    parser.add_argument("--top", type=int, default=20, help="Number of results to print")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    asyncio.run(_main(args))
@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, bindparam, delete, func, insert
+from sqlalchemy.future import select
+
+from database import async_session_maker
+from models import PortfolioPerformance, Stock, StockPrice, Transaction
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+# Users handed to one worker process at a time
+BACKFILL_CHUNK_SIZE = int(os.getenv("BACKFILL_CHUNK_SIZE", 250))
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", os.cpu_count() or 1))
+# Closes are carried forward from up to this many days before the range start
+PRICE_LOOKBACK_DAYS = 10
+
+
+def _cost_basis_deltas(transactions: pd.DataFrame) -> np.ndarray:
+    """
+    Change in average-cost basis caused by each transaction, mirroring how buys and sells
+    update UserStock.total_cost. Sells release basis at the average cost held before the sale.
+    Expects transactions in execution order.
+    """
+    deltas = np.zeros(len(transactions))
+    held_quantity: Dict[tuple, int] = {}
+    held_basis: Dict[tuple, float] = {}
+    rows = zip(transactions["user_id"], transactions["ticker"], transactions["signed_qty"], transactions["total_cost"])
+    for i, (user_id, ticker, signed_qty, total_cost) in enumerate(rows):
+        key = (user_id, ticker)
+        quantity = held_quantity.get(key, 0)
+        basis = held_basis.get(key, 0.0)
+        if signed_qty > 0:
+            delta = total_cost
+        elif quantity > 0:
+            delta = -basis * min(-signed_qty, quantity) / quantity
+        else:
+            delta = 0.0
+        held_quantity[key] = quantity + signed_qty
+        held_basis[key] = basis + delta
+        deltas[i] = delta
+    return deltas
+
+
+def compute_chunk(transactions: pd.DataFrame, prices: pd.DataFrame, previous_values: Dict[int, float]) -> pd.DataFrame:
+    """
+    Replay the transactions of a group of users against daily closes.
+
+    transactions: user_id, ticker, date, signed_qty, total_cost in execution order.
+    prices: forward-filled closes indexed by trading day, one column per ticker.
+    previous_values: last stored portfolio_value before the range, used for the first daily_return.
+
+    Holdings are built as a (days x positions) matrix, multiplied by the matching price
+    matrix and summed per user with a single matrix product.
+
+    Returns:
+        DataFrame with user_id, date, portfolio_value, daily_return and total_invested
+        for every day a user held a priced position.
+    """
+    columns = ["user_id", "date", "portfolio_value", "daily_return", "total_invested"]
+    dates = prices.index
+    tx = transactions.assign(basis_delta=_cost_basis_deltas(transactions))
+    # Trades on non-trading days count from the next session, earlier trades from the first day
+    tx["day"] = np.searchsorted(dates.values, tx["date"].values, side="left")
+    tx = tx[tx["day"] < len(dates)]
+    if tx.empty:
+        return pd.DataFrame(columns=columns)
+
+    def daily_totals(value_column):
+        return (
+            tx.pivot_table(index="day", columns=["user_id", "ticker"], values=value_column, aggfunc="sum")
+            .reindex(range(len(dates)))
+            .fillna(0)
+            .cumsum()
+        )
+
+    quantities = daily_totals("signed_qty")
+    basis = daily_totals("basis_delta").reindex(columns=quantities.columns, fill_value=0)
+
+    positions = quantities.columns
+    user_codes, users = pd.factorize(positions.get_level_values("user_id"))
+    owner = np.zeros((len(positions), len(users)))
+    owner[np.arange(len(positions)), user_codes] = 1.0
+
+    price_matrix = np.nan_to_num(prices.reindex(columns=positions.get_level_values("ticker")).to_numpy())
+    values = (quantities.to_numpy() * price_matrix) @ owner
+    invested = basis.to_numpy() @ owner
+
+    previous = np.vstack([
+        np.array([previous_values.get(user, np.nan) for user in users], dtype=float),
+        values[:-1],
+    ])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(previous > 0, (values - previous) / previous * 100, np.nan)
+
+    day_index, user_index = np.nonzero(values > 0)
+    return pd.DataFrame({
+        "user_id": np.asarray(users)[user_index],
+        "date": dates[day_index].date,
+        "portfolio_value": np.round(values[day_index, user_index], 2),
+        "daily_return": np.round(returns[day_index, user_index], 2),
+        "total_invested": np.round(invested[day_index, user_index], 2),
+    })
+
+
+async def _load_prices(session, start_date: date, end_date: date) -> pd.DataFrame:
+    """
+    Closes for every stored ticker as a (trading day x ticker) frame, forward-filled.
+    """
+    result = await session.execute(
+        select(Stock.symbol, StockPrice.date, StockPrice.close_price)
+        .join(StockPrice, StockPrice.stock_id == Stock.id)
+        .where(StockPrice.date.between(start_date - timedelta(days=PRICE_LOOKBACK_DAYS), end_date))
+    )
+    frame = pd.DataFrame(result.all(), columns=["ticker", "date", "close"])
+    if frame.empty:
+        return frame
+    frame["date"] = pd.to_datetime(frame["date"])
+    prices = frame.pivot_table(index="date", columns="ticker", values="close", aggfunc="last").sort_index().ffill()
+    return prices[prices.index >= pd.Timestamp(start_date)]
+
+
+async def _load_transactions(session, user_ids: List[int], end_date: date) -> pd.DataFrame:
+    result = await session.execute(
+        select(
+            Transaction.user_id,
+            Transaction.ticker,
+            Transaction.timestamp,
+            Transaction.transaction_type,
+            Transaction.quantity,
+            Transaction.total_cost,
+        )
+        .where(Transaction.user_id.in_(user_ids), Transaction.timestamp < end_date + timedelta(days=1))
+        .order_by(Transaction.timestamp, Transaction.id)
+    )
+    tx = pd.DataFrame(result.all(), columns=["user_id", "ticker", "timestamp", "transaction_type", "quantity", "total_cost"])
+    tx["date"] = pd.to_datetime(tx["timestamp"]).dt.normalize()
+    tx["signed_qty"] = np.where(tx["transaction_type"] == "sell", -tx["quantity"], tx["quantity"])
+    return tx[["user_id", "ticker", "date", "signed_qty", "total_cost"]]
+
+
+async def _load_previous_values(session, user_ids: List[int], start_date: date) -> Dict[int, float]:
+    latest = (
+        select(PortfolioPerformance.user_id, func.max(PortfolioPerformance.date).label("date"))
+        .where(PortfolioPerformance.user_id.in_(user_ids), PortfolioPerformance.date < start_date)
+        .group_by(PortfolioPerformance.user_id)
+        .subquery()
+    )
+    result = await session.execute(
+        select(PortfolioPerformance.user_id, PortfolioPerformance.portfolio_value)
+        .join(latest, and_(PortfolioPerformance.user_id == latest.c.user_id, PortfolioPerformance.date == latest.c.date))
+    )
+    return {user_id: value for user_id, value in result.all()}
+
+
+async def _write_chunk(frame: pd.DataFrame, user_ids: List[int], start_date: date, end_date: date, overwrite: bool) -> tuple:
+    """
+    Store computed rows for one chunk. Returns (rows written, rows skipped).
+
+    With `overwrite`, only the stored rows for the (user, date) pairs being written are
+    replaced; users and days the backfill could not compute keep their history.
+    """
+    async with async_session_maker() as session:
+        in_range = and_(
+            PortfolioPerformance.user_id.in_(user_ids),
+            PortfolioPerformance.date.between(start_date, end_date),
+        )
+        skipped = 0
+        if overwrite:
+            table = PortfolioPerformance.__table__
+            pairs = [{"user": user_id, "day": day} for user_id, day in zip(frame["user_id"].tolist(), frame["date"])]
+            if pairs:
+                await session.execute(
+                    delete(table).where(table.c.user_id == bindparam("user"), table.c.date == bindparam("day")),
+                    pairs,
+                )
+        else:
+            result = await session.execute(select(PortfolioPerformance.user_id, PortfolioPerformance.date).where(in_range))
+            existing = set(result.all())
+            if existing:
+                keep = [(user_id, day) not in existing for user_id, day in zip(frame["user_id"], frame["date"])]
+                skipped = len(frame) - sum(keep)
+                frame = frame[keep]
+
+        rows = frame.astype(object).where(frame.notna(), None).to_dict("records")
+        if rows:
+            await session.execute(insert(PortfolioPerformance), rows)
+        await session.commit()
+    return len(rows), skipped
+
+
+async def backfill_portfolio_performance(
+    start_date: date,
+    end_date: Optional[date] = None,
+    user_ids: Optional[List[int]] = None,
+    overwrite: bool = False,
+) -> dict:
+    """
+    Rebuild daily PortfolioPerformance rows for a date range by replaying each user's
+    transactions against stored closes.
+
+    Users are processed in chunks across a process pool. Existing (user, date) rows are
+    kept unless `overwrite` is set, in which case the rows recomputed are replaced.
+    """
+    end_date = end_date or date.today() - timedelta(days=1)
+    started = time.monotonic()
+    summary = {"users": 0, "chunks": 0, "rows_written": 0, "rows_skipped": 0}
+
+    async with async_session_maker() as session:
+        if user_ids is None:
+            result = await session.execute(select(Transaction.user_id).distinct().order_by(Transaction.user_id))
+            user_ids = list(result.scalars().all())
+        prices = await _load_prices(session, start_date, end_date)
+
+    if not user_ids or prices.empty:
+        logger.info(f"Nothing to backfill between {start_date} and {end_date}.")
+        return summary
+
+    chunks = [user_ids[i:i + BACKFILL_CHUNK_SIZE] for i in range(0, len(user_ids), BACKFILL_CHUNK_SIZE)]
+    workers = max(1, min(BACKFILL_WORKERS, len(chunks)))
+    loop = asyncio.get_running_loop()
+    # Bound the chunks loaded into memory ahead of the workers
+    semaphore = asyncio.Semaphore(workers * 2)
+    write_lock = asyncio.Lock()
+
+    # spawn keeps workers independent of the scheduler and event loop threads in this process
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+
+        async def run_chunk(chunk):
+            async with semaphore:
+                async with async_session_maker() as session:
+                    transactions = await _load_transactions(session, chunk, end_date)
+                    previous_values = await _load_previous_values(session, chunk, start_date)
+                if transactions.empty:
+                    return
+                tickers = prices.columns.intersection(transactions["ticker"].unique())
+                frame = await loop.run_in_executor(pool, compute_chunk, transactions, prices[tickers], previous_values)
+
+            async with write_lock:
+                written, skipped = await _write_chunk(frame, chunk, start_date, end_date, overwrite)
+            summary["users"] += frame["user_id"].nunique()
+            summary["chunks"] += 1
+            summary["rows_written"] += written
+            summary["rows_skipped"] += skipped
+            logger.info(f"Backfilled chunk {summary['chunks']}/{len(chunks)}: {written} rows written, {skipped} skipped.")
+
+        await asyncio.gather(*[run_chunk(chunk) for chunk in chunks])
+
+    summary["seconds"] = round(time.monotonic() - started, 2)
+    logger.info(
+        f"Portfolio backfill {start_date}..{end_date} complete: {summary['rows_written']} rows for "
+        f"{summary['users']} users in {summary['seconds']}s ({summary['rows_skipped']} existing rows kept)."
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill daily portfolio performance from the transaction ledger.")
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="First date to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last date to rebuild, defaults to yesterday")
+    parser.add_argument("--users", type=int, nargs="+", help="Only rebuild these user ids")
+    parser.add_argument("--overwrite", action="store_true", help="Replace existing rows for the days recomputed")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    asyncio.run(backfill_portfolio_performance(args.start, args.end, args.users, args.overwrite))
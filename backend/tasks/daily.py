@@ -6,7 +6,7 @@ from datetime import date, timedelta
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_
+from sqlalchemy import and_, func, insert
 
 from database import async_session_maker
 from models import UserStock, StockPrice, PortfolioPerformance, Stock, FearGreedIndex
@@ -23,6 +23,10 @@ async def track_portfolio_performance():
     """
     Calculates and tracks daily portfolio performance for all users.
     Ensures one data point per day for each user in the PortfolioPerformance table.
+
+    All users are valued with one aggregate join of user_stocks, stocks and stock_prices,
+    which also picks up each user's previous value to compute daily_return, and the
+    results are written with one bulk insert.
     """
     try:
         async with async_session_maker() as session:
@@ -30,92 +34,71 @@ async def track_portfolio_performance():
             today = date.today() - timedelta(days=1)
             logger.info(f"Calculating portfolio performance for date: {today}")
 
-            # Check if today's performance is already recorded
-            existing_performance_result = await session.execute(
-                select(PortfolioPerformance.user_id)
-                .where(PortfolioPerformance.date == today)
-            )
-            existing_user_ids = set(existing_performance_result.scalars().all())
-
-            # Get all users with stocks
-            result = await session.execute(select(UserStock.user_id).distinct())
-            user_ids = set(result.scalars().all())
-
-            # Filter users who don't already have performance recorded for today
-            users_to_process = user_ids - existing_user_ids
-            if not users_to_process:
-                logger.info(f"Portfolio performance for {today} is already recorded for all users.")
-                return
+            # Users that already have performance recorded for today
+            already_recorded = select(PortfolioPerformance.user_id).where(PortfolioPerformance.date == today)
 
-            # Initialize data structures
-            all_stock_ids = set()
-            user_stocks = {}
-
-            # Fetch user stocks and collect stock_ids
-            for user_id in users_to_process:
-                stocks_result = await session.execute(
-                    select(UserStock.ticker, UserStock.quantity, Stock.id.label("stock_id"))
-                    .join(Stock, UserStock.ticker == Stock.symbol)
-                    .where(UserStock.user_id == user_id)
+            # Most recent earlier portfolio value for the grouped user
+            previous_value = (
+                select(PortfolioPerformance.portfolio_value)
+                .where(
+                    PortfolioPerformance.user_id == UserStock.user_id,
+                    PortfolioPerformance.date < today,
                 )
-                stocks = stocks_result.all()
-                logger.info(f"Stocks for user {user_id}: {stocks}")
-                user_stocks[user_id] = stocks
-                for _, _, stock_id in stocks:
-                    all_stock_ids.add(stock_id)
-
-            logger.info(f"All stock IDs to fetch prices for: {all_stock_ids}")
+                .order_by(PortfolioPerformance.date.desc())
+                .limit(1)
+                .correlate(UserStock)
+                .scalar_subquery()
+            )
 
-            # Fetch all stock prices in bulk
-            stock_prices_result = await session.execute(
-                select(StockPrice.stock_id, StockPrice.close_price)
-                .where(
-                    and_(
-                        StockPrice.stock_id.in_(all_stock_ids),
-                        StockPrice.date == today
-                    )
+            portfolio_value = func.sum(UserStock.quantity * StockPrice.close_price)
+            result = await session.execute(
+                select(
+                    UserStock.user_id,
+                    portfolio_value.label("portfolio_value"),
+                    func.sum(UserStock.total_cost).label("total_invested"),
+                    (func.count(UserStock.id) - func.count(StockPrice.id)).label("missing_prices"),
+                    previous_value.label("previous_value"),
+                )
+                .join(Stock, UserStock.ticker == Stock.symbol)
+                .outerjoin(
+                    StockPrice,
+                    and_(StockPrice.stock_id == Stock.id, StockPrice.date == today),
                 )
+                .where(UserStock.user_id.not_in(already_recorded))
+                .group_by(UserStock.user_id)
             )
-            stock_prices_rows = stock_prices_result.all()
-            logger.info(f"Raw query results: {stock_prices_rows}")
-            stock_prices = {row.stock_id: row.close_price for row in stock_prices_rows}
-            logger.info(f"Parsed stock prices: {stock_prices}")
+            valuations = result.all()
 
-            # Calculate performances
-            performances = []
-            for user_id in users_to_process:
-                portfolio_value = Decimal(0)
-                stocks = user_stocks.get(user_id, [])
+            if not valuations:
+                logger.info(f"Portfolio performance for {today} is already recorded for all users.")
+                return
 
-                for ticker, quantity, stock_id in stocks:
-                    latest_price = stock_prices.get(stock_id)
-                    if latest_price is not None:
-                        portfolio_value += Decimal(quantity) * Decimal(latest_price)
-                    else:
-                        logger.warning(f"Missing price data for {ticker} on {today}")
+            performances = []
+            for row in valuations:
+                if row.missing_prices:
+                    logger.warning(f"Missing price data for {row.missing_prices} holding(s) of user {row.user_id} on {today}")
 
                 # Skip users with no valid portfolio value
-                if portfolio_value == 0:
-                    logger.info(f"No valid portfolio data for user {user_id} on {today}. Skipping.")
+                if not row.portfolio_value:
+                    logger.info(f"No valid portfolio data for user {row.user_id} on {today}. Skipping.")
                     continue
 
-                # Append today's performance
-                performances.append(
-                    PortfolioPerformance(
-                        user_id=user_id,
-                        date=today,
-                        portfolio_value=round_to_two_decimals(portfolio_value),
-                        daily_return=None,  # Set this to None initially
-                    )
-                )
-                logger.info(
-                    f"Tracked performance for user {user_id}: "
-                    f"Portfolio value = {portfolio_value}"
-                )
+                value = round_to_two_decimals(row.portfolio_value)
+                daily_return = None
+                if row.previous_value:
+                    daily_return = round_to_two_decimals((value - row.previous_value) / row.previous_value * 100)
+
+                performances.append({
+                    "user_id": row.user_id,
+                    "date": today,
+                    "portfolio_value": value,
+                    "daily_return": daily_return,
+                    "total_invested": round_to_two_decimals(row.total_invested),
+                })
 
             # Bulk insert performances if there are any valid ones
             if performances:
-                session.add_all(performances)
+                await session.execute(insert(PortfolioPerformance), performances)
                 await session.commit()
                 logger.info(f"Portfolio performance tracking complete for {len(performances)} users.")
             else:
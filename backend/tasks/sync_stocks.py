@@ -1,14 +1,25 @@
 import asyncio
 import logging
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import or_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from database import async_session_maker
-from models import Stock, UserStock
+from models import CompanyProfile, Stock, UserStock
+from company_profiles import fetch_profile_upstream
+
+# Maximum number of concurrent Yahoo Finance lookups while enriching stocks
+SYNC_ENRICH_CONCURRENCY = int(os.getenv("SYNC_ENRICH_CONCURRENCY", 8))
+# Symbols Yahoo had no name or sector for (ETFs, futures) are looked up again after this long
+SYNC_ENRICH_RETRY_HOURS = float(os.getenv("SYNC_ENRICH_RETRY_HOURS", 7 * 24))
+# Placeholder name in profiles without a longName; never worth storing on a stock
+UNKNOWN_NAME = "Unknown"
 
 async def sync_stocks_with_user_stocks():
     """
     Syncs the Stock table with all tickers from UserStock.
-    Adds any missing tickers to the Stock table.
+    Adds any missing tickers to the Stock table, then fills in missing names and sectors.
     """
     # Configure logging for this module
     logger = logging.getLogger(__name__)
@@ -31,19 +42,89 @@ async def sync_stocks_with_user_stocks():
 
                 if not new_tickers:
                     logger.info("No new tickers to add.")
-                    return
-
-                # Insert new tickers into the Stock table
-                for ticker in new_tickers:
-                    new_stock = Stock(symbol=ticker, price=None, name=None, sector=None)
-                    session.add(new_stock)
-                    logger.info(f"Added new stock: {ticker}")
-                
-                # Commit the changes
-                await session.commit()
+                else:
+                    # Insert new tickers into the Stock table
+                    for ticker in new_tickers:
+                        new_stock = Stock(symbol=ticker, price=None, name=None, sector=None)
+                        session.add(new_stock)
+                        logger.info(f"Added new stock: {ticker}")
+
+                    # Commit the changes
+                    await session.commit()
+
+                await enrich_stocks(session, logger)
                 logger.info("Sync complete.")
             except Exception as e:
                 await session.rollback()
                 logger.error(f"Failed to sync stocks: {e}", exc_info=True)
     except Exception as e:
         logger.error(f"Failed to create database session: {e}", exc_info=True)
+
+
+async def enrich_stocks(session: AsyncSession, logger: logging.Logger):
+    """
+    Fills in name and sector for every stock missing either one.
+    Uses stored company profiles where available, looks the rest up concurrently
+    and writes all results back with a single bulk UPDATE.
+
+    Each upstream lookup is stamped in stocks.enriched_at, and a symbol is not looked
+    up again for SYNC_ENRICH_RETRY_HOURS, so symbols Yahoo has no sector for are not
+    fetched on every sync.
+    """
+    result = await session.execute(
+        select(Stock.id, Stock.symbol, Stock.name, Stock.sector, Stock.enriched_at)
+        .where(or_(Stock.name.is_(None), Stock.sector.is_(None)))
+    )
+    incomplete = result.all()
+    if not incomplete:
+        logger.info("All stocks already have a name and sector.")
+        return
+
+    symbols = [row.symbol for row in incomplete]
+    result = await session.execute(
+        select(CompanyProfile.symbol, CompanyProfile.data).where(CompanyProfile.symbol.in_(symbols))
+    )
+    profiles = {symbol: data for symbol, data in result.all()}
+
+    semaphore = asyncio.Semaphore(SYNC_ENRICH_CONCURRENCY)
+
+    async def lookup(symbol):
+        async with semaphore:
+            try:
+                entry = await fetch_profile_upstream(symbol)
+                return symbol, entry[0] if entry else None
+            except Exception as e:
+                logger.warning(f"Failed to fetch profile for {symbol}: {e}")
+                return symbol, None
+
+    # Stored profiles without a sector are looked up again in case Yahoo has one now,
+    # unless that was already tried recently
+    now = datetime.utcnow()
+    retry_before = now - timedelta(hours=SYNC_ENRICH_RETRY_HOURS)
+    to_fetch = [
+        row.symbol for row in incomplete
+        if not (profiles.get(row.symbol) or {}).get("sector")
+        and (row.enriched_at is None or row.enriched_at < retry_before)
+    ]
+    for symbol, profile in await asyncio.gather(*[lookup(symbol) for symbol in to_fetch]):
+        if profile:
+            profiles[symbol] = profile
+
+    attempted = set(to_fetch)
+    updates = []
+    for row in incomplete:
+        profile = profiles.get(row.symbol) or {}
+        profile_name = profile.get("name")
+        name = row.name or (profile_name if profile_name != UNKNOWN_NAME else None)
+        sector = row.sector or profile.get("sector")
+        enriched_at = now if row.symbol in attempted else row.enriched_at
+        if (name, sector, enriched_at) != (row.name, row.sector, row.enriched_at):
+            updates.append({"id": row.id, "name": name, "sector": sector, "enriched_at": enriched_at})
+
+    if updates:
+        await session.execute(update(Stock), updates)
+        await session.commit()
+    logger.info(
+        f"Updated {len(updates)}/{len(incomplete)} incomplete stocks "
+        f"({len(to_fetch)} looked up upstream)."
+    )
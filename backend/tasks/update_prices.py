@@ -1,16 +1,59 @@
 import asyncio
-from sqlalchemy.ext.asyncio import AsyncSession
+import os
+import time
+import pandas as pd
 from sqlalchemy.future import select
-from sqlalchemy import and_
 from yfinance import download
-from database import async_session_maker
+from database import async_session_maker, upsert_insert
+from market_executor import run_market_io
 from models import Stock, StockPrice
+from price_archive import append_bars
 from datetime import date, timedelta
 
+# Tickers per multi-ticker download, number of downloads in flight, and per-download timeout
+UPDATE_PRICES_CHUNK_SIZE = int(os.getenv("UPDATE_PRICES_CHUNK_SIZE", 100))
+UPDATE_PRICES_CONCURRENCY = int(os.getenv("UPDATE_PRICES_CONCURRENCY", 4))
+UPDATE_PRICES_CHUNK_TIMEOUT_SECONDS = float(os.getenv("UPDATE_PRICES_CHUNK_TIMEOUT_SECONDS", 120))
+
+
+def _volume(ticker: str, day: date, value) -> int:
+    # Yahoo occasionally leaves a bar's volume empty; keep the bar rather than failing the chunk
+    if pd.isna(value):
+        print(f"[WARNING] Missing volume for {ticker} on {day}, storing 0")
+        return 0
+    return int(value)
+
+
+def _bars_from_download(data: pd.DataFrame, tickers: list) -> dict:
+    """
+    Split a multi-ticker yfinance download into {ticker: [bar, ...]}.
+    """
+    bars = {}
+    for ticker in tickers:
+        try:
+            frame = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+        except KeyError:
+            continue
+        frame = frame.dropna(subset=["Close"])
+        bars[ticker] = [
+            {
+                "date": index.date(),
+                "open_price": round(float(row["Open"]), 2),
+                "close_price": round(float(row["Close"]), 2),
+                "high": round(float(row["High"]), 2),
+                "low": round(float(row["Low"]), 2),
+                "volume": _volume(ticker, index.date(), row["Volume"]),
+            }
+            for index, row in frame.iterrows()
+        ]
+    return bars
+
+
 async def update_stock_data():
     """
     Fetches and updates daily stock prices for all tickers in the stocks table.
-    Prevents duplicate entries in the stock_prices table.
+    Tickers are downloaded in concurrent multi-ticker chunks and each chunk is written
+    with a single INSERT ... ON CONFLICT DO UPDATE on (stock_id, date).
     """
     try:
         async with async_session_maker() as session:
@@ -18,60 +61,79 @@ async def update_stock_data():
             result = await session.execute(select(Stock.symbol, Stock.id))
             tracked_stocks = {row[0]: row[1] for row in result.fetchall()}
 
-            if not tracked_stocks:
-                print("[INFO] No stocks to update.")
-                return
+        if not tracked_stocks:
+            print("[INFO] No stocks to update.")
+            return
+
+        tickers = list(tracked_stocks.keys())
+        chunks = [tickers[i:i + UPDATE_PRICES_CHUNK_SIZE] for i in range(0, len(tickers), UPDATE_PRICES_CHUNK_SIZE)]
+        print(f"[INFO] Fetching data for {len(tickers)} tickers in {len(chunks)} chunk(s)")
 
-            print(f"[INFO] Fetching data for tickers: {list(tracked_stocks.keys())}")
+        # Define the date range for fetching prices
+        today = date.today()
+        yesterday = today - timedelta(days=1)
 
-            # Define the date range for fetching prices
-            today = date.today()
-            yesterday = today - timedelta(days=1)
+        download_slots = asyncio.Semaphore(UPDATE_PRICES_CONCURRENCY)
+        # SQLite allows one writer at a time, so chunk writes are serialized
+        write_lock = asyncio.Lock()
 
-            for ticker, stock_id in tracked_stocks.items():
-                try:
-                    # Fetch stock data using yfinance in a separate thread
-                    data = await asyncio.to_thread(
-                        download, ticker, start=yesterday.isoformat(), end=today.isoformat()
+        stmt = upsert_insert(StockPrice)
+        upsert = stmt.on_conflict_do_update(
+            index_elements=["stock_id", "date"],
+            set_={
+                "open_price": stmt.excluded.open_price,
+                "close_price": stmt.excluded.close_price,
+                "high": stmt.excluded.high,
+                "low": stmt.excluded.low,
+                "volume": stmt.excluded.volume,
+            },
+        )
+
+        async def process_chunk(chunk):
+            try:
+                async with download_slots:
+                    data = await run_market_io(
+                        download,
+                        chunk,
+                        start=yesterday.isoformat(),
+                        end=today.isoformat(),
+                        group_by="ticker",
+                        progress=False,
+                        timeout=UPDATE_PRICES_CHUNK_TIMEOUT_SECONDS,
                     )
+                bars = _bars_from_download(data, chunk) if not data.empty else {}
+                rows = [
+                    dict(bar, stock_id=tracked_stocks[ticker])
+                    for ticker, ticker_bars in bars.items()
+                    for bar in ticker_bars
+                ]
+                if rows:
+                    async with write_lock:
+                        async with async_session_maker() as session:
+                            await session.execute(upsert, rows)
+                            await session.commit()
+                    # Mirror the new bars into the columnar archive when it is enabled
+                    for ticker, ticker_bars in bars.items():
+                        await asyncio.to_thread(append_bars, ticker, ticker_bars)
+
+                missing = [ticker for ticker in chunk if not bars.get(ticker)]
+                if missing:
+                    print(f"[WARNING] No data fetched for {missing}")
+                return len(rows), len(chunk) - len(missing)
+            except Exception as e:
+                print(f"[ERROR] Failed to update prices for chunk starting at {chunk[0]}: {e}")
+                return 0, 0
+
+        started = time.monotonic()
+        results = await asyncio.gather(*[process_chunk(chunk) for chunk in chunks])
+        elapsed = max(time.monotonic() - started, 1e-9)
 
-                    if not data.empty:
-                        for index, row in data.iterrows():
-                            record_date = index.date()  # Extract the date from the index
-
-                            # Check if the record already exists in StockPrice
-                            record_exists = await session.execute(
-                                select(StockPrice).where(
-                                    and_(
-                                        StockPrice.stock_id == stock_id,
-                                        StockPrice.date == record_date
-                                    )
-                                )
-                            )
-
-                            if record_exists.first():
-                                print(f"[INFO] Record for {ticker} on {record_date} already exists. Skipping.")
-                                continue
-
-                            # Add a new record to StockPrice
-                            stock_price = StockPrice(
-                                stock_id=stock_id,
-                                date=record_date,
-                                open_price=round(float(row["Open"].iloc[0]), 2),
-                                close_price=round(float(row["Close"].iloc[0]), 2),
-                                high=round(float(row["High"].iloc[0]), 2),
-                                low=round(float(row["Low"].iloc[0]), 2),
-                                volume=int(row["Volume"].iloc[0]),
-                            )
-                            session.add(stock_price)
-
-                        # Commit the session after processing the ticker
-                        await session.commit()
-                        print(f"[INFO] Updated prices for {ticker}")
-                    else:
-                        print(f"[WARNING] No data fetched for {ticker}")
-                except Exception as e:
-                    print(f"[ERROR] Failed to update prices for {ticker}: {e}")
+        total_rows = sum(rows for rows, _ in results)
+        total_tickers = sum(updated for _, updated in results)
+        print(
+            f"[INFO] Updated {total_rows} rows for {total_tickers}/{len(tickers)} tickers in {elapsed:.1f}s "
+            f"({total_rows / elapsed:.1f} rows/s, {total_tickers / elapsed:.1f} tickers/s)"
+        )
 
     except Exception as e:
         print(f"[ERROR] Error in update_stock_data: {e}")
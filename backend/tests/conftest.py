@@ -0,0 +1,35 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+# Backend modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base  # noqa: E402
+import models  # noqa: E402,F401  (registers every table on Base.metadata)
+
+
+@pytest.fixture
+def run_db(tmp_path):
+    """
+    Run `scenario(session_maker)` on a fresh SQLite database with every table created
+    and return its result. The engine lives and dies inside one event loop.
+    """
+
+    def run(scenario):
+        async def main():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            try:
+                return await scenario(sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
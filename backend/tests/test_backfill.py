@@ -0,0 +1,44 @@
+from datetime import date
+
+import pandas as pd
+from sqlalchemy.future import select
+
+from models import PortfolioPerformance
+from tasks import backfill
+
+DAYS = [date(2026, 10, 13), date(2026, 10, 14), date(2026, 10, 15)]
+
+
+def test_overwrite_only_replaces_recomputed_rows(run_db, monkeypatch):
+    async def scenario(session_maker):
+        monkeypatch.setattr(backfill, "async_session_maker", session_maker)
+        async with session_maker() as session:
+            session.add_all(
+                PortfolioPerformance(user_id=user_id, date=day, portfolio_value=1.0, daily_return=None)
+                for user_id in (1, 2)
+                for day in DAYS
+            )
+            await session.commit()
+
+        # User 1 is recomputed for the last two days only; user 2 has no priced holdings
+        frame = pd.DataFrame({
+            "user_id": [1, 1],
+            "date": DAYS[1:],
+            "portfolio_value": [5.0, 6.0],
+            "daily_return": [None, 20.0],
+            "total_invested": [4.0, 4.0],
+        })
+        written = await backfill._write_chunk(frame, [1, 2], DAYS[0], DAYS[-1], overwrite=True)
+
+        async with session_maker() as session:
+            rows = (await session.execute(
+                select(PortfolioPerformance.user_id, PortfolioPerformance.date, PortfolioPerformance.portfolio_value)
+            )).all()
+        return written, sorted(rows)
+
+    written, rows = run_db(scenario)
+    assert written == (2, 0)
+    assert rows == [
+        (1, DAYS[0], 1.0), (1, DAYS[1], 5.0), (1, DAYS[2], 6.0),
+        (2, DAYS[0], 1.0), (2, DAYS[1], 1.0), (2, DAYS[2], 1.0),
+    ]
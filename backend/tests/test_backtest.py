@@ -0,0 +1,35 @@
+import os
+
+import numpy as np
+
+import backtest
+
+
+def _minute_bars(closes):
+    timestamps = np.datetime64("2024-01-02T00:00:00", "s") + np.arange(len(closes)) * np.timedelta64(60, "s")
+    return timestamps, np.asarray(closes, dtype=float)
+
+
+def test_capital_used_is_the_cost_of_open_positions():
+    # One 0.1 lot is bought at 20,000 on the first bar and sold at 20,010 on the sixth;
+    # the realized profit must not count against the capital in use afterwards
+    result = backtest.run_backtest(*_minute_bars(20000 + 2.0 * np.arange(20)))
+
+    assert (result.buy_fills, result.sell_fills) == (1, 1)
+    assert result.realized_pnl == 1.0
+    assert result.max_capital_used == 2000.0
+    assert result.avg_capital_used == 2000.0 * 5 / 20
+
+
+def test_synthetic_bars_are_on_the_tick_grid():
+    timestamps, closes = backtest.synthetic_bars(500, seed=3)
+    assert len(timestamps) == len(closes) == 500
+    assert np.all(np.diff(timestamps) == np.timedelta64(60, "s"))
+    assert np.all(np.mod(closes, backtest.SYNTHETIC_TICK_SIZE) == 0)
+
+
+def test_baseline_benchmark_times_another_checkout():
+    # The current tree stands in for an older checkout
+    backend_dir = os.path.dirname(os.path.abspath(backtest.__file__))
+    assert backtest.baseline_tick_benchmark(backend_dir, count=200) > 0
+    assert backtest.tick_benchmark(200) > 0
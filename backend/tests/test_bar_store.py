@@ -0,0 +1,69 @@
+import asyncio
+import os
+from datetime import date
+from decimal import Decimal
+
+from bar_store import BAR_DTYPE, BarFileFeed, BarRecorder, bar_days, bar_path, load_bars, load_closes
+from price_feed import Tick
+
+# 2023-11-14 23:59 UTC, one minute before a day boundary
+LAST_MINUTE = 1700006340
+
+
+def _record(root, *ticks):
+    recorder = BarRecorder(str(root))
+    for tick in ticks:
+        recorder.record(tick)
+    recorder.close()
+    return recorder
+
+
+def test_forming_bar_updates_overwrite_the_last_record(tmp_path):
+    recorder = _record(
+        tmp_path,
+        Tick("NQ=F", LAST_MINUTE, Decimal("100.25"), Decimal("100"), Decimal("101"), Decimal("99.5"), 10),
+        Tick("NQ=F", LAST_MINUTE, Decimal("102.5"), Decimal("100.1"), Decimal("102.5"), Decimal("100"), 15),
+        Tick("NQ=F", LAST_MINUTE - 60, Decimal("1")),  # out of order, skipped
+    )
+    bars = load_bars(str(tmp_path), "NQ=F")
+    assert recorder.bars_written == 1
+    assert bars.tolist() == [(LAST_MINUTE, 10000, 10250, 9950, 10250, 15)]
+
+
+def test_bars_roll_over_to_a_file_per_utc_day(tmp_path):
+    _record(tmp_path, Tick("NQ=F", LAST_MINUTE, Decimal("100")), Tick("NQ=F", LAST_MINUTE + 60, Decimal("101")))
+    assert bar_days(str(tmp_path), "NQ=F") == [date(2023, 11, 14), date(2023, 11, 15)]
+
+    timestamps, closes = load_closes(str(tmp_path), "NQ=F")
+    assert timestamps.dtype == "datetime64[s]"
+    assert closes.tolist() == [100.0, 101.0]
+    assert load_bars(str(tmp_path), "NQ=F", start=date(2023, 11, 15))["close"].tolist() == [10100]
+
+
+def test_partial_record_from_a_crash_is_dropped_on_reopen(tmp_path):
+    _record(tmp_path, Tick("NQ=F", LAST_MINUTE - 60, Decimal("100")))
+    path = bar_path(str(tmp_path), "NQ=F", date(2023, 11, 14))
+    with open(path, "ab") as f:
+        f.write(b"torn")
+
+    _record(tmp_path, Tick("NQ=F", LAST_MINUTE, Decimal("101")))
+    assert os.path.getsize(path) == 2 * BAR_DTYPE.itemsize
+    assert load_bars(str(tmp_path), "NQ=F")["close"].tolist() == [10000, 10100]
+
+
+def test_feed_merges_instruments_in_time_order(tmp_path):
+    _record(
+        tmp_path,
+        Tick("NQ=F", LAST_MINUTE - 120, Decimal("100")),
+        Tick("NQ=F", LAST_MINUTE, Decimal("102")),
+        Tick("ES=F", LAST_MINUTE - 60, Decimal("50")),
+    )
+
+    async def replay():
+        return [(tick.ticker, tick.timestamp, tick.price) async for tick in BarFileFeed(str(tmp_path), ["NQ=F", "ES=F"])]
+
+    assert asyncio.run(replay()) == [
+        ("NQ=F", LAST_MINUTE - 120, Decimal("100")),
+        ("ES=F", LAST_MINUTE - 60, Decimal("50")),
+        ("NQ=F", LAST_MINUTE, Decimal("102")),
+    ]
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from bot_journal import StateJournal
+
+
+def _journal(tmp_path):
+    return StateJournal(str(tmp_path / "bot.journal"), str(tmp_path / "bot.snapshot.json"), fsync=False)
+
+
+def _record(journal, *prices):
+    for price in prices:
+        journal.record({"type": "price", "cents": price})
+    journal.flush()
+
+
+def test_recovery_replays_events_after_the_snapshot(tmp_path):
+    journal = _journal(tmp_path)
+    _record(journal, 100, 101)
+    journal.write_snapshot({"prev_price_cents": 101})
+    _record(journal, 102, 103)
+
+    state, events = _journal(tmp_path).load()
+    assert state == {"prev_price_cents": 101}
+    assert [(event["seq"], event["cents"]) for event in events] == [(3, 102), (4, 103)]
+
+
+def test_snapshot_truncates_the_journal_and_keeps_numbering(tmp_path):
+    journal = _journal(tmp_path)
+    _record(journal, 100, 101, 102)
+    journal.write_snapshot({"prev_price_cents": 102})
+    assert (tmp_path / "bot.journal").read_bytes() == b""
+    assert journal.events_since_snapshot == 0
+
+    reopened = _journal(tmp_path)
+    state, events = reopened.load()
+    assert (state, events, reopened.seq) == ({"prev_price_cents": 102}, [], 3)
+    _record(reopened, 103)
+    assert json.loads((tmp_path / "bot.journal").read_text())["seq"] == 4
+
+
+def test_crash_before_truncation_skips_events_already_in_the_snapshot(tmp_path):
+    journal = _journal(tmp_path)
+    _record(journal, 100, 101)
+    events_before_snapshot = (tmp_path / "bot.journal").read_bytes()
+    journal.write_snapshot({"prev_price_cents": 101})
+    # As if the process died after replacing the snapshot but before truncating the journal
+    (tmp_path / "bot.journal").write_bytes(events_before_snapshot)
+    _record(journal, 102)
+
+    state, events = _journal(tmp_path).load()
+    assert state == {"prev_price_cents": 101}
+    assert [event["cents"] for event in events] == [102]
+
+
+def test_torn_final_line_is_dropped_and_appends_continue_cleanly(tmp_path):
+    journal = _journal(tmp_path)
+    _record(journal, 100, 101)
+    with open(tmp_path / "bot.journal", "ab") as f:
+        f.write(b'{"seq": 3, "type": "pri')
+
+    reopened = _journal(tmp_path)
+    state, events = reopened.load()
+    assert state is None
+    assert [event["cents"] for event in events] == [100, 101]
+    assert reopened.seq == 2
+
+    _record(reopened, 102)
+    lines = (tmp_path / "bot.journal").read_text().splitlines()
+    assert [json.loads(line)["seq"] for line in lines] == [1, 2, 3]
+
+
+def test_corruption_before_the_last_line_is_not_silently_dropped(tmp_path):
+    journal = _journal(tmp_path)
+    _record(journal, 100)
+    with open(tmp_path / "bot.journal", "ab") as f:
+        f.write(b'{"seq": 2, "ty\n')
+    _record(journal, 101)
+
+    with pytest.raises(json.JSONDecodeError):
+        _journal(tmp_path).load()
+
+
+def test_events_since_snapshot_drive_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr("bot_journal.JOURNAL_SNAPSHOT_EVENTS", 3)
+    journal = _journal(tmp_path)
+    _record(journal, 100, 101)
+    assert not journal.needs_snapshot()
+    _record(journal, 102)
+    assert journal.needs_snapshot()
+
+    reopened = _journal(tmp_path)
+    reopened.load()
+    assert reopened.needs_snapshot()
@@ -0,0 +1,97 @@
+import asyncio
+
+from cache import AsyncTTLCache
+
+
+def test_concurrent_gets_share_one_load():
+    cache = AsyncTTLCache("test", ttl_seconds=60)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def scenario():
+        return await asyncio.gather(*[cache.get("key", load) for _ in range(10)])
+
+    assert asyncio.run(scenario()) == ["value"] * 10
+    assert len(calls) == 1
+    assert (cache.misses, cache.coalesced) == (1, 9)
+    assert cache.peek("key") == "value"
+
+
+def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    cache = AsyncTTLCache("test", ttl_seconds=60)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def scenario():
+        return await asyncio.gather(*[cache.get("key", load) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(calls) == 1
+    assert cache.peek("key") is None and not cache._in_flight
+
+
+def test_none_results_are_not_cached():
+    cache = AsyncTTLCache("test", ttl_seconds=60)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return None
+
+    async def scenario():
+        return [await cache.get("key", load) for _ in range(2)]
+
+    assert asyncio.run(scenario()) == [None, None]
+    assert len(calls) == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AsyncTTLCache("test", ttl_seconds=None, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.peek("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.peek("b") is None
+    assert (cache.peek("a"), cache.peek("c")) == (1, 3)
+    assert cache.evictions == 1
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("cache.time.monotonic", lambda: now[0])
+    cache = AsyncTTLCache("test", ttl_seconds=30)
+    cache.set("key", "value")
+    cache.set("short", "value", ttl_seconds=5)
+
+    now[0] += 10
+    assert cache.peek("key") == "value"
+    assert cache.peek("short") is None
+    now[0] += 25
+    assert cache.peek("key") is None
+
+
+def test_get_many_loads_only_missing_keys_in_one_call():
+    cache = AsyncTTLCache("test", ttl_seconds=60)
+    cache.set("a", 1)
+    batches = []
+
+    async def load(keys):
+        batches.append(keys)
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    async def scenario():
+        return await cache.get_many(["a", "b", "c", "b", "missing"], load)
+
+    assert asyncio.run(scenario()) == {"a": 1, "b": "B", "c": "C", "missing": None}
+    assert batches == [["b", "c", "missing"]]
+    assert cache.peek("missing") is None
@@ -0,0 +1,27 @@
+import asyncio
+from datetime import datetime
+
+import company_profiles
+
+
+def test_unknown_tickers_are_not_looked_up_again(monkeypatch):
+    calls = []
+
+    async def load(ticker):
+        calls.append(ticker)
+        return ({"name": "Known"}, datetime.utcnow()) if ticker == "KNOWN" else None
+
+    monkeypatch.setattr(company_profiles, "_load_profile", load)
+    company_profiles._profiles.invalidate()
+    company_profiles._unknown.invalidate()
+
+    async def scenario():
+        return [await company_profiles.get_company_profile(ticker) for ticker in ("BOGUS", "BOGUS", "KNOWN", "KNOWN")]
+
+    assert asyncio.run(scenario()) == [None, None, {"name": "Known"}, {"name": "Known"}]
+    assert calls == ["BOGUS", "KNOWN"]
+
+    # Once the negative entry expires the ticker is tried again
+    company_profiles._unknown.invalidate("BOGUS")
+    assert asyncio.run(company_profiles.get_company_profile("BOGUS")) is None
+    assert calls == ["BOGUS", "KNOWN", "BOGUS"]
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+
+import pytest
+
+from market_executor import MarketDataExecutor
+
+
+def test_cancelled_and_timed_out_calls_leave_the_queue():
+    executor = MarketDataExecutor(max_workers=1, timeout_seconds=5)
+    release = threading.Event()
+
+    async def scenario():
+        # Occupy the only worker so the next calls stay queued
+        blocker = asyncio.create_task(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+
+        cancelled = asyncio.create_task(executor.run(lambda: "never"))
+        await asyncio.sleep(0.05)
+        assert executor.queued == 1
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(lambda: "never", timeout=0.05)
+
+        release.set()
+        await blocker
+        assert await executor.run(lambda: "ok") == "ok"
+
+    asyncio.run(scenario())
+    stats = executor.stats()
+    assert stats["queued"] == 0
+    assert stats["active"] == 0
+    assert stats["timeouts"] == 1
+    assert stats["completed"] == 2
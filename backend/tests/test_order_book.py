@@ -0,0 +1,81 @@
+from order_book import OrderBook
+
+
+def test_best_prices_follow_adds_and_removes():
+    book = OrderBook()
+    assert book.best_bid() is None and book.best_ask() is None
+
+    for price in (1990, 2010, 2000):
+        book.add_buy(price, 100)
+    for price, position_id in ((2050, 2), (2030, 1)):
+        book.add_sell(price, 100, position_id)
+
+    assert book.best_bid() == 2010
+    assert book.best_ask() == 2030
+    assert (book.buy_count, book.sell_count) == (3, 2)
+
+    assert book.remove_buy(2010, 100)
+    assert book.remove_sell(2030, 100, 1)
+    assert book.best_bid() == 2000
+    assert book.best_ask() == 2050
+    assert (book.buy_count, book.sell_count) == (2, 1)
+
+
+def test_removing_unknown_orders_leaves_the_book_unchanged():
+    book = OrderBook()
+    book.add_buy(2000, 100)
+    book.add_sell(2050, 100, 7)
+
+    assert not book.remove_buy(2000, 999)
+    assert not book.remove_buy(1500, 100)
+    assert not book.remove_sell(2050, 100, 8)
+    assert book.buy_orders() == [(2000, 100)]
+    assert book.sell_orders() == [(2050, 100, 7)]
+
+
+def test_orders_at_one_level_keep_fifo_order():
+    book = OrderBook()
+    book.add_buy(2000, 100)
+    book.add_buy(2000, 200)
+    book.add_buy(1990, 300)
+    book.add_sell(2050, 100, 1)
+    book.add_sell(2050, 100, 2)
+
+    assert book.buy_orders() == [(2000, 100), (2000, 200), (1990, 300)]
+    assert book.sell_orders() == [(2050, 100, 1), (2050, 100, 2)]
+
+    # Removing the last order at a level drops the level itself
+    book.remove_buy(2000, 100)
+    book.remove_buy(2000, 200)
+    assert not book.has_buy(2000)
+    assert list(book.buy_prices()) == [1990]
+
+
+def test_fill_lookups_are_ordered_best_first():
+    book = OrderBook()
+    for price in (1980, 2000, 2020, 2040):
+        book.add_buy(price, 100)
+    for position_id, price in enumerate((2010, 2030, 2050)):
+        book.add_sell(price, 100, position_id)
+
+    assert book.buys_at_or_above(2000) == [(2040, 100), (2020, 100), (2000, 100)]
+    assert book.sells_at_or_below(2030) == [(2010, 100, 0), (2030, 100, 1)]
+    assert book.buys_at_or_above(2050) == []
+    assert book.sells_at_or_below(2000) == []
+
+
+def test_cancel_and_proximity_checks():
+    book = OrderBook()
+    book.add_buy(2000, 100)
+    book.add_buy(2000, 200)
+    book.add_sell(2100, 100, 1)
+
+    assert book.cancel_buys_at(2000) == [(2000, 100), (2000, 200)]
+    assert book.buy_count == 0 and book.best_bid() is None
+    assert book.cancel_buys_at(2000) == []
+
+    # Strictly within the distance on either side
+    assert book.has_sell_near(2095, 10)
+    assert book.has_sell_near(2105, 10)
+    assert not book.has_sell_near(2090, 10)
+    assert not book.has_sell_near(2110, 10)
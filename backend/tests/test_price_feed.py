@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+import pytest
+
+from price_feed import FEED_POLL_JITTER, PriceFeed, ReplayFeed, YahooPoller
+
+
+def test_feeds_must_implement_ticks():
+    class Incomplete(PriceFeed):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_replay_feed_reads_bars_and_optional_columns(tmp_path):
+    path = tmp_path / "bars.csv"
+    path.write_text("timestamp,close,open,volume\n1700000000,100.25,100,5\n1700000060,101,,\n")
+
+    async def replay():
+        return [tick async for tick in ReplayFeed(str(path), "NQ=F")]
+
+    first, second = asyncio.run(replay())
+    assert (first.ticker, first.timestamp, str(first.price), str(first.open), first.volume) == ("NQ=F", 1700000000, "100.25", "100", 5)
+    assert (second.open, second.volume) == (None, 0)
+
+
+class _Response:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self):
+        return self.body
+
+
+class _Session:
+    """Answers each GET with the next (status, body) pair."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def get(self, url):
+        return _Response(*self.responses.pop(0))
+
+
+def _chart(timestamps, closes):
+    quote = {"close": closes, "open": closes, "high": closes, "low": closes, "volume": [1] * len(closes)}
+    return json.dumps({"chart": {"result": [{"timestamp": timestamps, "indicators": {"quote": [quote]}}]}}).encode()
+
+
+def test_poller_rejects_error_responses():
+    poller = YahooPoller(_Session([(429, b"Too Many Requests"), (200, _chart([1700000000], [100.5]))]), ["NQ=F"])
+
+    with pytest.raises(RuntimeError, match="429"):
+        asyncio.run(poller.fetch_new_ticks("NQ=F"))
+    ticks = asyncio.run(poller.fetch_new_ticks("NQ=F"))
+    assert [(tick.timestamp, str(tick.price)) for tick in ticks] == [(1700000000, "100.5")]
+    assert poller.requests == 2
+
+
+def test_poll_delay_backs_off_exponentially_with_jitter():
+    poller = YahooPoller(_Session([]), ["NQ=F"], poll_seconds=5, max_backoff_seconds=60)
+    low, high = 1 - FEED_POLL_JITTER, 1 + FEED_POLL_JITTER
+    for failures, base in ((0, 5), (1, 10), (3, 40), (4, 60), (100, 60)):
+        delays = {poller.poll_delay(failures) for _ in range(50)}
+        assert all(base * low <= delay <= base * high for delay in delays)
+        assert len(delays) > 1
+
+
+def test_poll_waits_longer_after_failures_and_resets_on_success(monkeypatch):
+    responses = [(429, b""), (503, b""), (200, _chart([1700000000], [100.5])), (200, _chart([1700000060], [101.0]))]
+    poller = YahooPoller(_Session(responses), ["NQ=F"], poll_seconds=5, max_backoff_seconds=60)
+    waits = []
+
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+        if len(waits) > len(responses):
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    queue = asyncio.Queue()
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(poller._poll("NQ=F", queue))
+
+    # A random start offset, then 2x and 4x the interval while failing, then back to 1x
+    assert waits[0] <= 5
+    low, high = 1 - FEED_POLL_JITTER, 1 + FEED_POLL_JITTER
+    for wait, base in zip(waits[1:], (10, 20, 5, 5)):
+        assert base * low <= wait <= base * high
+    assert poller.failed_requests == 2 and poller.backing_off == 0
+    assert queue.qsize() == 2
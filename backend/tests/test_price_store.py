@@ -0,0 +1,72 @@
+import asyncio
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import price_store
+from price_store import find_missing_ranges, last_completed_session, range_start
+
+
+@pytest.mark.parametrize("today", [date(2026, 10, 18), date(2026, 10, 19), date(2026, 10, 21)])
+def test_short_ranges_never_start_after_the_last_session(today):
+    # Sunday, Monday and Wednesday
+    end = last_completed_session(today)
+    for range in ("1d", "5d", "1mo", "ytd"):
+        assert range_start(range, today) <= end
+
+
+def test_range_start_on_a_monday_covers_fridays_session():
+    monday = date(2026, 10, 19)
+    assert last_completed_session(monday) == date(2026, 10, 16)
+    assert range_start("1d", monday) == date(2026, 10, 16)
+    assert range_start("5d", monday) == date(2026, 10, 14)
+
+
+def test_ytd_on_new_years_day_falls_back_to_the_last_session():
+    assert range_start("ytd", date(2027, 1, 1)) == date(2026, 12, 31)
+    assert range_start("ytd", date(2026, 6, 1)) == date(2026, 1, 1)
+
+
+def test_unknown_ranges_are_not_supported():
+    assert range_start("max", date(2026, 10, 19)) is None
+
+
+def test_missing_ranges_with_nothing_stored():
+    assert find_missing_ranges([], date(2026, 10, 1), date(2026, 10, 9)) == [(date(2026, 10, 1), date(2026, 10, 9))]
+    assert find_missing_ranges([], date(2026, 10, 9), date(2026, 10, 1)) == []
+
+
+def test_weekends_and_short_holidays_are_not_gaps():
+    # Fri 10-02 to Mon 10-05, and Thu 10-08 to Mon 10-12 around a Friday holiday
+    stored = [date(2026, 10, 1), date(2026, 10, 2), date(2026, 10, 5), date(2026, 10, 8), date(2026, 10, 12)]
+    assert find_missing_ranges(stored, date(2026, 10, 1), date(2026, 10, 12)) == []
+
+
+def test_gaps_at_the_start_middle_and_end():
+    stored = [date(2026, 10, 8), date(2026, 10, 9), date(2026, 10, 20)]
+    assert find_missing_ranges(stored, date(2026, 10, 1), date(2026, 10, 23)) == [
+        (date(2026, 10, 1), date(2026, 10, 7)),
+        (date(2026, 10, 10), date(2026, 10, 19)),
+        (date(2026, 10, 21), date(2026, 10, 23)),
+    ]
+
+
+def test_a_start_within_the_tolerance_is_covered():
+    stored = [date(2026, 10, 5), date(2026, 10, 6)]
+    assert find_missing_ranges(stored, date(2026, 10, 3), date(2026, 10, 6)) == []
+
+
+def test_fetched_bars_with_missing_volume_are_kept(monkeypatch):
+    frame = pd.DataFrame(
+        {"Open": [10.0, 11.0], "High": [12.0, 12.5], "Low": [9.5, 10.5], "Close": [11.0, 12.0], "Volume": [1500, float("nan")]},
+        index=pd.to_datetime(["2026-10-15", "2026-10-16"]),
+    )
+
+    async def fake_market_io(fn, *args, **kwargs):
+        return frame
+
+    monkeypatch.setattr(price_store, "run_market_io", fake_market_io)
+    bars = asyncio.run(price_store._fetch_gap("TEST", date(2026, 10, 15), date(2026, 10, 16)))
+
+    assert [(bar["date"], bar["volume"]) for bar in bars] == [(date(2026, 10, 15), 1500), (date(2026, 10, 16), 0)]
@@ -0,0 +1,45 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy.future import select
+
+from models import Stock
+from tasks import sync_stocks
+
+PROFILES = {
+    "AAPL": {"name": "Apple Inc.", "sector": "Technology"},
+    "SPY": {"name": "Unknown", "sector": None},  # ETF: no longName, no sector
+}
+
+
+def test_enrichment_skips_recent_attempts_and_keeps_names(run_db, monkeypatch):
+    lookups = []
+
+    async def fetch(symbol):
+        lookups.append(symbol)
+        profile = PROFILES.get(symbol)
+        return (profile, datetime.utcnow()) if profile else None
+
+    monkeypatch.setattr(sync_stocks, "fetch_profile_upstream", fetch)
+    logger = logging.getLogger(__name__)
+
+    async def scenario(session_maker):
+        async with session_maker() as session:
+            session.add_all([
+                Stock(symbol="AAPL"),
+                Stock(symbol="SPY", name="SPDR S&P 500 ETF"),
+                Stock(symbol="BOGUS"),
+            ])
+            await session.commit()
+            await sync_stocks.enrich_stocks(session, logger)
+            await sync_stocks.enrich_stocks(session, logger)
+            rows = (await session.execute(select(Stock.symbol, Stock.name, Stock.sector, Stock.enriched_at))).all()
+        return {row.symbol: row for row in rows}
+
+    stocks = run_db(scenario)
+    # The second sync looked nothing up again
+    assert sorted(lookups) == ["AAPL", "BOGUS", "SPY"]
+    assert (stocks["AAPL"].name, stocks["AAPL"].sector) == ("Apple Inc.", "Technology")
+    assert (stocks["SPY"].name, stocks["SPY"].sector) == ("SPDR S&P 500 ETF", None)
+    assert stocks["BOGUS"].name is None
+    assert all(row.enriched_at is not None for row in stocks.values())
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+from models import Trade
+from trade_stats import read_trade_summary, rebuild_trade_stats, record_trades
+
+
+def _trade(timestamp, profit_loss, budget):
+    return Trade(timestamp=timestamp, action="sell", ticker="NQ=F", price=100.0, quantity=0.1, profit_loss=profit_loss, budget=budget)
+
+
+def test_first_record_counts_trades_from_before_the_aggregates(run_db):
+    now = datetime.now()
+
+    async def scenario(session_maker):
+        async with session_maker() as session:
+            # Trades written before trade_stats existed
+            session.add_all([_trade(now - timedelta(days=3), 7.0, 120.0), _trade(now - timedelta(hours=2), 5.0, 100.0)])
+            await session.commit()
+        async with session_maker() as session:
+            new = [_trade(now - timedelta(minutes=5), 2.0, 90.0)]
+            session.add_all(new)
+            await record_trades(session, new)
+            await session.commit()
+        async with session_maker() as session:
+            return await read_trade_summary(session, now)
+
+    summary = run_db(scenario)
+    assert summary["total_trades"] == 3
+    assert summary["total_realized_profit"] == 14.0
+    assert (summary["min_budget"], summary["max_budget"]) == (90.0, 120.0)
+    assert summary["last_24h_profit"] == 7.0
+
+
+def test_incremental_updates_match_a_rebuild(run_db):
+    now = datetime.now()
+
+    async def scenario(session_maker):
+        for batch in ([(30, 4.0, 100.0), (90, -1.0, 95.0)], [(10, None, 110.0)], [(1, 3.0, 80.0)]):
+            async with session_maker() as session:
+                trades = [_trade(now - timedelta(minutes=minutes), pl, budget) for minutes, pl, budget in batch]
+                session.add_all(trades)
+                await record_trades(session, trades)
+                await session.commit()
+        async with session_maker() as session:
+            incremental = await read_trade_summary(session, now)
+            await rebuild_trade_stats(session)
+            return incremental, await read_trade_summary(session, now)
+
+    incremental, rebuilt = run_db(scenario)
+    assert incremental == rebuilt
+    assert incremental["total_trades"] == 4
@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from models import Trade
+from trade_writer import TradeWriter
+
+
+def _trade(price):
+    return {
+        "timestamp": datetime(2026, 10, 16, 10, 0),
+        "action": "buy",
+        "ticker": "NQ=F",
+        "price": price,
+        "quantity": 0.1,
+        "profit_loss": None,
+        "budget": 1000.0,
+    }
+
+
+def test_close_writes_every_queued_trade_in_batches(run_db):
+    async def scenario(session_maker):
+        writer = TradeWriter(session_maker, batch_size=4, flush_seconds=5)
+        writer.start()
+        for price in range(10):
+            await writer.submit(_trade(float(price)))
+        await writer.close()
+        async with session_maker() as session:
+            prices = (await session.execute(select(Trade.price).order_by(Trade.id))).scalars().all()
+        return writer.stats(), prices
+
+    stats, prices = run_db(scenario)
+    assert prices == [float(price) for price in range(10)]
+    assert (stats["written"], stats["batches"], stats["queued"], stats["dropped"]) == (10, 3, 0, 0)
+    assert stats["max_fill_latency_seconds"] >= stats["avg_fill_latency_seconds"] > 0
+
+
+def test_partial_batch_is_flushed_after_the_deadline(run_db):
+    async def scenario(session_maker):
+        writer = TradeWriter(session_maker, batch_size=100, flush_seconds=0.05)
+        writer.start()
+        await writer.submit(_trade(1.0))
+        await asyncio.sleep(0.3)
+        async with session_maker() as session:
+            count = (await session.execute(select(func.count()).select_from(Trade))).scalar()
+        await writer.close()
+        return count
+
+    assert run_db(scenario) == 1
@@ -0,0 +1,123 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.future import select
+
+import trades
+from models import Trade
+
+BASE = datetime(2026, 10, 16, 9, 30, 0, 250000)
+
+
+def _trade(timestamp):
+    return Trade(timestamp=timestamp, action="buy", ticker="NQ=F", price=100.0, quantity=0.1, profit_loss=None, budget=1000.0)
+
+
+async def _page(db, cursor=None, limit=4):
+    return await trades.get_trades(
+        page=1, limit=limit, cursor=cursor, include_total=False, chart_data=False, start=None, end=None, bucket="day", db=db
+    )
+
+
+def test_cursor_pages_through_shared_timestamps_without_gaps_or_repeats(run_db):
+    # Runs of up to five trades share a timestamp, so pages split inside a run
+    timestamps = [BASE + timedelta(seconds=i // 5) for i in range(23)]
+
+    async def scenario(session_maker):
+        async with session_maker() as db:
+            db.add_all(_trade(timestamp) for timestamp in timestamps)
+            await db.commit()
+
+            expected = [
+                trade.id for trade in sorted(
+                    (await db.execute(select(Trade))).scalars().all(),
+                    key=lambda trade: (trade.timestamp, trade.id),
+                    reverse=True,
+                )
+            ]
+            seen, cursor, pages = [], None, 0
+            while True:
+                page = await _page(db, cursor)
+                pages += 1
+                seen.extend(trade["id"] for trade in page["trades"])
+                cursor = page["next_cursor"]
+                if not page["has_more"]:
+                    assert cursor is None
+                    break
+            return expected, seen, pages
+
+    expected, seen, pages = run_db(scenario)
+    assert seen == expected
+    assert len(set(seen)) == len(seen) == 23
+    assert pages == 6
+
+
+def test_invalid_cursor_is_rejected(run_db):
+    async def scenario(session_maker):
+        async with session_maker() as db:
+            with pytest.raises(HTTPException) as error:
+                await _page(db, cursor="not-a-cursor")
+            return error.value.status_code
+
+    assert run_db(scenario) == 400
+
+
+def test_total_count_is_cached_between_pages(run_db):
+    async def scenario(session_maker):
+        trades.trade_count_cache.invalidate()
+        async with session_maker() as db:
+            db.add_all(_trade(BASE) for _ in range(3))
+            await db.commit()
+            first = await trades.get_trade_count(db)
+
+            db.add(_trade(BASE))
+            await db.commit()
+            cached = await trades.get_trade_count(db)
+
+            trades.trade_count_cache.invalidate()
+            refreshed = await trades.get_trade_count(db)
+        return first, cached, refreshed
+
+    assert run_db(scenario) == (3, 3, 4)
+
+
+def test_single_flight_count_under_concurrent_pages(run_db):
+    async def scenario(session_maker):
+        trades.trade_count_cache.invalidate()
+        misses = trades.trade_count_cache.misses
+        async with session_maker() as db:
+            db.add(_trade(BASE))
+            await db.commit()
+            counts = await asyncio.gather(*[trades.get_trade_count(db) for _ in range(5)])
+        return counts, trades.trade_count_cache.misses - misses
+
+    counts, misses = run_db(scenario)
+    assert counts == [1] * 5
+    assert misses == 1
+
+
+def test_cursor_pages_through_trades_without_an_explicit_timestamp(run_db):
+    async def scenario(session_maker):
+        async with session_maker() as db:
+            # Inserted within the same second, as a burst of fills would be
+            db.add_all(
+                Trade(action="buy", ticker="NQ=F", price=100.0, quantity=0.1, profit_loss=None, budget=1000.0)
+                for _ in range(7)
+            )
+            await db.commit()
+
+            seen, cursor = [], None
+            # A cursor that compares wrongly repeats rows forever; stop well past the 4 pages needed
+            for _ in range(10):
+                page = await _page(db, cursor, limit=2)
+                seen.extend(trade["id"] for trade in page["trades"])
+                cursor = page["next_cursor"]
+                if not page["has_more"]:
+                    break
+            return seen
+
+    seen = run_db(scenario)
+    assert sorted(seen) == list(range(1, 8))
+    assert len(set(seen)) == len(seen)
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from tasks.update_prices import _bars_from_download
+
+
+def test_missing_volume_is_stored_as_zero(capsys):
+    index = pd.to_datetime(["2026-10-15", "2026-10-16"])
+    columns = pd.MultiIndex.from_product([["AAA", "BBB"], ["Open", "High", "Low", "Close", "Volume"]])
+    data = pd.DataFrame(
+        [
+            [1.0, 2.0, 0.5, 1.5, 100, 10.0, 11.0, 9.0, 10.5, np.nan],
+            [1.5, 2.5, 1.0, 2.0, 200, 10.5, 12.0, 10.0, 11.5, 300],
+        ],
+        index=index,
+        columns=columns,
+    )
+
+    bars = _bars_from_download(data, ["AAA", "BBB", "CCC"])
+
+    assert [bar["volume"] for bar in bars["AAA"]] == [100, 200]
+    assert [bar["volume"] for bar in bars["BBB"]] == [0, 300]
+    assert "CCC" not in bars
+    assert "Missing volume for BBB on 2026-10-15" in capsys.readouterr().out
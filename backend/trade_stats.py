@@ -0,0 +1,258 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import case, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from database import async_session_maker, upsert_insert
+from models import Trade, TradeDailyPnl, TradeStats, TradeStatsHourly
+
+logger = logging.getLogger(__name__)
+
+STATS_ROW_ID = 1
+# Hourly buckets older than this are pruned; the summary only reads the last 24
+HOURLY_RETENTION_HOURS = 48
+CHART_BUCKETS = ("day", "week", "month")
+
+
+def _hour(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _group_by_time(rows, key=_hour) -> dict:
+    """
+    Group (timestamp, profit_loss) pairs into {key(timestamp): [trade_count, profit_loss]}.
+    """
+    buckets = defaultdict(lambda: [0, 0.0])
+    for timestamp, profit_loss in rows:
+        bucket = buckets[key(timestamp)]
+        bucket[0] += 1
+        bucket[1] += float(profit_loss or 0.0)
+    return buckets
+
+
+async def record_trades(session: AsyncSession, trades: Iterable[Trade]):
+    """
+    Fold newly added trades into the running aggregates and the daily P/L rollup.
+
+    Call this on the session that adds the trades, before it commits, so trades
+    and aggregates are committed in the same transaction. If the aggregates have never
+    been built (tables created on a database that already had trades), they are
+    rebuilt from the whole trades table, new trades included, instead.
+    """
+    trades = list(trades)
+    if not trades:
+        return
+    if await session.get(TradeStats, STATS_ROW_ID) is None:
+        await session.flush()
+        await _recompute(session)
+        return
+    now = datetime.now()
+
+    budgets = [float(trade.budget) for trade in trades]
+    realized = sum(float(trade.profit_loss) for trade in trades if trade.profit_loss is not None and trade.profit_loss > 0)
+    stmt = upsert_insert(TradeStats).values(
+        id=STATS_ROW_ID,
+        total_trades=len(trades),
+        total_realized_profit=realized,
+        max_budget=max(budgets),
+        min_budget=min(budgets),
+        updated_at=now,
+    )
+    excluded = stmt.excluded
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                "total_trades": TradeStats.total_trades + excluded.total_trades,
+                "total_realized_profit": TradeStats.total_realized_profit + excluded.total_realized_profit,
+                "max_budget": case(
+                    (TradeStats.max_budget.is_(None) | (excluded.max_budget > TradeStats.max_budget), excluded.max_budget),
+                    else_=TradeStats.max_budget,
+                ),
+                "min_budget": case(
+                    (TradeStats.min_budget.is_(None) | (excluded.min_budget < TradeStats.min_budget), excluded.min_budget),
+                    else_=TradeStats.min_budget,
+                ),
+                "updated_at": excluded.updated_at,
+            },
+        )
+    )
+
+    buckets = _group_by_time((trade.timestamp or now, trade.profit_loss) for trade in trades)
+    stmt = upsert_insert(TradeStatsHourly)
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["hour"],
+            set_={
+                "trade_count": TradeStatsHourly.trade_count + stmt.excluded.trade_count,
+                "profit_loss": TradeStatsHourly.profit_loss + stmt.excluded.profit_loss,
+            },
+        ),
+        [{"hour": hour, "trade_count": count, "profit_loss": profit_loss} for hour, (count, profit_loss) in buckets.items()],
+    )
+    await session.execute(
+        delete(TradeStatsHourly).where(TradeStatsHourly.hour < _hour(now - timedelta(hours=HOURLY_RETENTION_HOURS)))
+    )
+
+    # The chart only counts trades that carry a profit/loss
+    days = _group_by_time(
+        ((trade.timestamp or now, trade.profit_loss) for trade in trades if trade.profit_loss is not None),
+        key=lambda timestamp: timestamp.date(),
+    )
+    if days:
+        stmt = upsert_insert(TradeDailyPnl)
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["day"],
+                set_={
+                    "trade_count": TradeDailyPnl.trade_count + stmt.excluded.trade_count,
+                    "profit_loss": TradeDailyPnl.profit_loss + stmt.excluded.profit_loss,
+                },
+            ),
+            [{"day": day, "trade_count": count, "profit_loss": profit_loss} for day, (count, profit_loss) in days.items()],
+        )
+
+
+async def rebuild_trade_stats(session: AsyncSession):
+    """
+    Recompute all aggregates and the daily P/L rollup from the trades table and commit them.
+    """
+    await _recompute(session)
+    await session.commit()
+
+
+async def _recompute(session: AsyncSession):
+    await session.execute(delete(TradeStats))
+    await session.execute(delete(TradeStatsHourly))
+    await session.execute(delete(TradeDailyPnl))
+
+    totals = (
+        await session.execute(
+            select(
+                func.count(Trade.id),
+                func.coalesce(func.sum(case((Trade.profit_loss > 0, Trade.profit_loss))), 0.0),
+                func.max(Trade.budget),
+                func.min(Trade.budget),
+            )
+        )
+    ).one()
+    session.add(
+        TradeStats(
+            id=STATS_ROW_ID,
+            total_trades=totals[0],
+            total_realized_profit=totals[1],
+            max_budget=totals[2],
+            min_budget=totals[3],
+            updated_at=datetime.now(),
+        )
+    )
+
+    since = _hour(datetime.now() - timedelta(hours=HOURLY_RETENTION_HOURS))
+    recent = await session.execute(select(Trade.timestamp, Trade.profit_loss).where(Trade.timestamp >= since))
+    buckets = _group_by_time(recent.all())
+    session.add_all(
+        TradeStatsHourly(hour=hour, trade_count=count, profit_loss=profit_loss)
+        for hour, (count, profit_loss) in buckets.items()
+    )
+
+    day = func.date(Trade.timestamp)
+    daily = await session.execute(
+        select(day, func.count(Trade.id), func.sum(Trade.profit_loss))
+        .where(Trade.profit_loss.is_not(None))
+        .group_by(day)
+    )
+    daily_rows = [
+        TradeDailyPnl(day=date.fromisoformat(str(row_day)), trade_count=count, profit_loss=profit_loss)
+        for row_day, count, profit_loss in daily.all()
+    ]
+    session.add_all(daily_rows)
+    logger.info(
+        f"Rebuilt trade stats from {totals[0]} trades "
+        f"({len(buckets)} hourly buckets, {len(daily_rows)} days of P/L)."
+    )
+
+
+async def read_trade_summary(session: AsyncSession, now: Optional[datetime] = None) -> dict:
+    """
+    Return the summary totals without scanning the trades table.
+
+    The last-24h profit sums the full hourly buckets inside the window plus the trades
+    of the partial hour at its start, read through the timestamp index.
+    """
+    stats = await session.get(TradeStats, STATS_ROW_ID)
+    if stats is None:
+        # First read after deploying the aggregates
+        await rebuild_trade_stats(session)
+        stats = await session.get(TradeStats, STATS_ROW_ID)
+
+    now = now or datetime.now()
+    window_start = now - timedelta(days=1)
+    first_full_hour = _hour(window_start) + timedelta(hours=1)
+
+    bucketed = (
+        await session.execute(
+            select(func.sum(TradeStatsHourly.profit_loss)).where(TradeStatsHourly.hour >= first_full_hour)
+        )
+    ).scalar() or 0.0
+    partial_hour = (
+        await session.execute(
+            select(func.sum(Trade.profit_loss)).where(
+                Trade.timestamp >= window_start, Trade.timestamp < first_full_hour
+            )
+        )
+    ).scalar() or 0.0
+
+    return {
+        "total_trades": stats.total_trades,
+        "total_realized_profit": stats.total_realized_profit,
+        "max_budget": stats.max_budget or 0.0,
+        "min_budget": stats.min_budget or 0.0,
+        "last_24h_profit": bucketed + partial_hour,
+    }
+
+
+async def read_daily_pnl(
+    session: AsyncSession,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: str = "day",
+) -> List[dict]:
+    """
+    Return chart points of summed profit/loss per day, week (starting Monday) or month
+    from the rollup, oldest first. Each point is keyed by the first day of its bucket.
+    """
+    query = select(TradeDailyPnl.day, TradeDailyPnl.profit_loss).order_by(TradeDailyPnl.day)
+    if start:
+        query = query.where(TradeDailyPnl.day >= start)
+    if end:
+        query = query.where(TradeDailyPnl.day <= end)
+    rows = (await session.execute(query)).all()
+
+    totals = {}
+    for day, profit_loss in rows:
+        key = _bucket_start(day, bucket)
+        totals[key] = totals.get(key, 0.0) + profit_loss
+    return [{"timestamp": key, "profit_loss": profit_loss} for key, profit_loss in totals.items()]
+
+
+async def _rebuild():
+    async with async_session_maker() as session:
+        await rebuild_trade_stats(session)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_rebuild())
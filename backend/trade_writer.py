@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import os
+import time
+from typing import List, Optional
+
+from models import Trade
+from trade_stats import record_trades
+
+logger = logging.getLogger(__name__)
+
+TRADE_WRITER_BATCH_SIZE = int(os.getenv("TRADE_WRITER_BATCH_SIZE", 100))
+# Longest a logged trade waits in memory before its batch is committed
+TRADE_WRITER_FLUSH_SECONDS = float(os.getenv("TRADE_WRITER_FLUSH_SECONDS", 1.0))
+# Producers block once this many trades are waiting to be written
+TRADE_WRITER_MAX_QUEUE = int(os.getenv("TRADE_WRITER_MAX_QUEUE", 10000))
+TRADE_WRITER_RETRIES = 3
+BACKPRESSURE_LOG_INTERVAL_SECONDS = 60
+
+_STOP = object()
+
+
+class TradeWriter:
+    """
+    Background writer that group-commits trades fed through an asyncio.Queue.
+
+    `submit` returns as soon as the trade is queued; the writer task commits up to
+    `batch_size` trades per transaction, at least every `flush_seconds`. When the queue
+    is full, `submit` waits for space, slowing producers down to the database's pace.
+    """
+
+    def __init__(
+        self,
+        session_maker,
+        batch_size: int = TRADE_WRITER_BATCH_SIZE,
+        flush_seconds: float = TRADE_WRITER_FLUSH_SECONDS,
+        max_queue: int = TRADE_WRITER_MAX_QUEUE,
+    ):
+        self.session_maker = session_maker
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.dropped = 0
+        self.backpressure_waits = 0
+        self.commit_seconds = 0.0
+        self.max_commit_seconds = 0.0
+        # Time from submit to commit, per trade written
+        self.fill_latency_seconds = 0.0
+        self.max_fill_latency_seconds = 0.0
+        self._last_backpressure_log = 0.0
+
+    def start(self):
+        """
+        Start the writer task on the running event loop.
+        """
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, trade: dict):
+        """
+        Queue a trade (Trade column values) for writing.
+        """
+        if self._queue.full():
+            self.backpressure_waits += 1
+            if time.monotonic() - self._last_backpressure_log > BACKPRESSURE_LOG_INTERVAL_SECONDS:
+                self._last_backpressure_log = time.monotonic()
+                logger.warning(f"Trade writer queue full ({self.max_queue}), waiting for the database.")
+        await self._queue.put((time.monotonic(), trade))
+
+    async def close(self):
+        """
+        Write everything still queued, then stop the writer task.
+        """
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def _next_batch(self) -> tuple:
+        """
+        Wait for one trade, then collect more until the batch is full or the flush deadline passes.
+        Returns (batch, stop_requested).
+        """
+        item = await self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = await self._next_batch()
+            if batch:
+                await self._write(batch)
+
+    async def _write(self, batch: List[tuple]):
+        """Commit a batch of (queued_at, trade) items."""
+        for attempt in range(1, TRADE_WRITER_RETRIES + 1):
+            started = time.monotonic()
+            try:
+                async with self.session_maker() as session:
+                    trades = [Trade(**values) for _, values in batch]
+                    session.add_all(trades)
+                    await record_trades(session, trades)
+                    await session.commit()
+                committed = time.monotonic()
+                self.commit_seconds += committed - started
+                self.max_commit_seconds = max(self.max_commit_seconds, committed - started)
+                self.fill_latency_seconds += sum(committed - queued_at for queued_at, _ in batch)
+                self.max_fill_latency_seconds = max(self.max_fill_latency_seconds, committed - batch[0][0])
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                self.failed_batches += 1
+                logger.error(f"Failed to write {len(batch)} trades (attempt {attempt}/{TRADE_WRITER_RETRIES}): {e}")
+                await asyncio.sleep(attempt)
+        self.dropped += len(batch)
+        logger.error(f"Dropped {len(batch)} trades after {TRADE_WRITER_RETRIES} failed attempts: {[values for _, values in batch]}")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch_size": round(self.written / self.batches, 2) if self.batches else 0.0,
+            "avg_commit_seconds": round(self.commit_seconds / self.batches, 4) if self.batches else 0.0,
+            "max_commit_seconds": round(self.max_commit_seconds, 4),
+            "avg_fill_latency_seconds": round(self.fill_latency_seconds / self.written, 4) if self.written else 0.0,
+            "max_fill_latency_seconds": round(self.max_fill_latency_seconds, 4),
+            "failed_batches": self.failed_batches,
+            "dropped": self.dropped,
+            "backpressure_waits": self.backpressure_waits,
+        }
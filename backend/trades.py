@@ -1,10 +1,16 @@
+import base64
+import os
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy import and_, or_
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
-from datetime import datetime, timedelta
+from datetime import date, datetime
 from database import get_db
 from models import Trade
+from cache import AsyncTTLCache
+from trade_stats import CHART_BUCKETS, read_daily_pnl, read_trade_summary
 import logging
 
 router = APIRouter()
@@ -13,6 +19,10 @@ router = APIRouter()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Total trade count is served from memory for this long instead of counting the table per page
+TRADE_COUNT_CACHE_SECONDS = float(os.getenv("TRADE_COUNT_CACHE_SECONDS", 30))
+trade_count_cache = AsyncTTLCache("trade_count", ttl_seconds=TRADE_COUNT_CACHE_SECONDS, max_size=1)
+
 # Helper function to serialize trades
 def serialize_trade(trade):
     return {
@@ -26,57 +36,85 @@ def serialize_trade(trade):
         "budget": trade.budget,
     }
 
+def encode_cursor(trade):
+    """
+    Opaque pagination cursor pointing just past `trade` in (timestamp, id) order.
+    """
+    raw = f"{trade.timestamp.isoformat()}|{trade.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        timestamp, trade_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(trade_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def get_trade_count(db: AsyncSession):
+    async def count():
+        return (await db.execute(select(func.count()).select_from(Trade))).scalar()
+    return await trade_count_cache.get("total", count)
+
 @router.get("/")
 async def get_trades(
     page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     chart_data: bool = False,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: str = "day",
     db: AsyncSession = Depends(get_db)
 ):
     """
     Fetch either:
-    - Paginated trades with `page` and `limit`.
+    - Trades newest first, paginated with `cursor` (or the legacy `page`) and `limit`.
     - Profit/loss chart data when `chart_data=true`.
 
     Query Parameters:
-    - page (int): Page number for pagination (default: 1).
+    - page (int): Page number for offset pagination (default: 1). Ignored when `cursor` is given.
     - limit (int): Number of records per page (default: 10).
+    - cursor (str): `next_cursor` from the previous response; seeks directly to the next page.
+    - include_total (bool): Include the (cached) total trade count (default: true).
     - chart_data (bool): If true, returns profit/loss over time instead of paginated trades.
+    - start, end (date): Optional inclusive date range for chart data.
+    - bucket (str): Chart bucket size, one of day, week or month (default: day).
     """
     try:
         if chart_data:
-            # Return aggregated daily profit/loss data
-            query = (
-                select(
-                    func.date(Trade.timestamp).label("day"),
-                    func.sum(Trade.profit_loss).label("total_profit_loss")
-                )
-                .where(Trade.profit_loss != None)
-                .group_by(func.date(Trade.timestamp))
-                .order_by("day")
-            )
-            result = await db.execute(query)
-            daily_data = result.all()
-
+            if bucket not in CHART_BUCKETS:
+                raise HTTPException(status_code=400, detail=f"bucket must be one of: {', '.join(CHART_BUCKETS)}")
+            # Read pre-aggregated daily profit/loss from the rollup table
             return {
                 "success": True,
-                "data": [
-                    {"timestamp": row.day, "profit_loss": row.total_profit_loss} for row in daily_data
-                ],
+                "data": await read_daily_pnl(db, start=start, end=end, bucket=bucket),
             }
         else:
             # Default: Paginated trades
             if page < 1 or limit < 1:
                 raise HTTPException(status_code=400, detail="Page and limit must be greater than 0")
 
-            offset = (page - 1) * limit
-            query = select(Trade).order_by(Trade.timestamp.desc()).offset(offset).limit(limit)
-            result = await db.execute(query)
+            # (timestamp, id) descending is served by ix_trades_timestamp, whose entries end in the rowid
+            query = select(Trade).order_by(Trade.timestamp.desc(), Trade.id.desc())
+            if cursor:
+                after_timestamp, after_id = decode_cursor(cursor)
+                query = query.where(
+                    or_(
+                        Trade.timestamp < after_timestamp,
+                        and_(Trade.timestamp == after_timestamp, Trade.id < after_id),
+                    )
+                )
+            elif page > 1:
+                query = query.offset((page - 1) * limit)
+
+            # Fetch one extra row to know whether another page follows
+            result = await db.execute(query.limit(limit + 1))
             trades = result.scalars().all()
+            has_more = len(trades) > limit
+            trades = trades[:limit]
 
-            total_count_query = select(func.count()).select_from(Trade)
-            total_count_result = await db.execute(total_count_query)
-            total_count = total_count_result.scalar()
+            total_count = await get_trade_count(db) if include_total else None
 
             return {
                 "success": True,
@@ -84,8 +122,12 @@ async def get_trades(
                 "total": total_count,
                 "page": page,
                 "limit": limit,
+                "next_cursor": encode_cursor(trades[-1]) if has_more else None,
+                "has_more": has_more,
             }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Error fetching trades")
         raise HTTPException(status_code=500, detail=str(e))
@@ -97,37 +139,21 @@ async def get_trade_summary(db: AsyncSession = Depends(get_db)):
     Endpoint to fetch a summary of trading statistics.
     """
     try:
-        # Total number of trades
-        total_trades = (await db.execute(select(func.count()).select_from(Trade))).scalar()
-
-        # Total realized profit (where profit_loss > 0)
-        total_realized_profit = (await db.execute(
-            select(func.sum(Trade.profit_loss)).where(Trade.profit_loss > 0)
-        )).scalar() or 0.0
-
-        # Starting budget (assumed to be the maximum budget encountered)
-        starting_budget = (await db.execute(select(func.max(Trade.budget)))).scalar() or 0.0
-
-        # Ending budget (assumed to be the minimum budget encountered)
-        ending_budget = (await db.execute(select(func.min(Trade.budget)))).scalar() or 0.0
+        # Running totals are maintained as trades are logged, so this is a constant-time read
+        summary = await read_trade_summary(db)
+        starting_budget = summary["max_budget"]
+        ending_budget = summary["min_budget"]
 
         # Budget used is the difference between starting and ending
         budget_used = starting_budget - ending_budget
 
-        # Profit in the last 24 hours
-        last_24h_profit = (await db.execute(
-            select(func.sum(Trade.profit_loss)).where(
-                Trade.timestamp >= datetime.now() - timedelta(days=1)
-            )
-        )).scalar() or 0.0
-
         return {
-            "total_trades": total_trades,
-            "total_realized_profit": round(total_realized_profit, 2),
+            "total_trades": summary["total_trades"],
+            "total_realized_profit": round(summary["total_realized_profit"], 2),
             "starting_budget": round(starting_budget, 2),
             "ending_budget": round(ending_budget, 2),
             "budget_used": round(budget_used, 2),
-            "last_24h_profit": round(last_24h_profit, 2),
+            "last_24h_profit": round(summary["last_24h_profit"], 2),
         }
 
     except Exception as e: